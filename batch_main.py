@@ -0,0 +1,140 @@
+from dotenv import load_dotenv
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from concurrent.futures import ThreadPoolExecutor
+from utils.answer_providers import AnswersFileProvider, LLMAnswerProvider, use_answer_provider
+from workflow_files.pipeline_stages import make_llm, pipeline_files, run_story_stages
+import utils.vectorstores_utils as vectorstores_utils
+import utils.app_queries as app_queries
+import argparse
+import logging
+import time
+import json
+import os
+
+load_dotenv()
+
+logging.basicConfig(
+    filename='llm_output.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("my_app_logger")
+
+
+def available_app_queries() -> dict:
+    return {
+        name: value for name, value in vars(app_queries).items()
+        if isinstance(value, str) and not name.startswith("_")
+    }
+
+
+def run_app(name, app_query, llm, args, embedding):
+    """
+    Runs the story pipeline for one app in its own workspace directory and pipeline store,
+    answering its clarifying questions headlessly.
+    """
+    workspace = os.path.join(args.workspace_root, name)
+    os.makedirs(workspace, exist_ok=True)
+    with open(os.path.join(workspace, "app_query.txt"), "w", encoding="utf-8") as f:
+        f.write(app_query)
+
+    answers = LLMAnswerProvider(llm, app_query)
+    if args.answers_file:
+        answers = AnswersFileProvider(args.answers_file, fallback=answers)
+    store_name = f"pipeline_parts:{name}"
+    start = time.perf_counter()
+    try:
+        with use_answer_provider(answers):
+            results = run_story_stages(llm, app_query, pipeline_files(workspace), args, store_name=store_name)
+    except Exception as e:
+        logger.error(f"Batch run for {name} failed: {e}")
+        return {"app": name, "status": "error", "message": str(e), "seconds": time.perf_counter() - start}
+    seconds = time.perf_counter() - start
+    counts = {stage: len(items) for stage, items in results.items()}
+    return {
+        "app": name,
+        "status": "success",
+        "seconds": seconds,
+        **counts,
+        "artifacts_per_minute": 60 * sum(counts.values()) / seconds if seconds else 0.0
+    }
+
+
+def main():
+    queries = available_app_queries()
+    parser = argparse.ArgumentParser(description="Runs the story pipeline for many app queries concurrently.")
+    parser.add_argument("--apps", nargs="+", choices=sorted(queries), default=sorted(queries))
+    parser.add_argument("--workspace-root", default="batch_runs")
+    parser.add_argument("--llm", choices=["anthropic", "openai", "gemini"], default="gemini")
+    parser.add_argument("--app-workers", type=int, default=3)  # Apps run at the same time
+    parser.add_argument("--llm-workers", type=int, default=2)  # Concurrent LLM calls inside each app's stages
+    parser.add_argument("--requests-per-second", type=float, default=1.0)  # Shared by every app
+    parser.add_argument("--llm-cache", default=None)  # SQLite file for a persistent response cache; in-memory by default
+    parser.add_argument("--answers-file", default=None)  # Recorded answers; unmatched questions are auto-answered
+    parser.add_argument("--refine-themes", action="store_true")
+    parser.add_argument("--sequential-epics", dest="parallel_epics", action="store_false")
+    parser.add_argument("--dedup-stories", choices=["flag", "merge"], default=None)
+    parser.add_argument("--story-similarity", type=float, default=0.92)
+    parser.add_argument("--resume", action="store_true")  # Continue each app's stages from its checkpoints
+    parser.add_argument("--add-new", action="store_true")
+    parser.add_argument("--persist-pipeline", action="store_true")
+    args = parser.parse_args()
+
+    # One response cache, one rate limiter and one chat model for every app
+    if args.llm_cache:
+        from langchain_community.cache import SQLiteCache
+        set_llm_cache(SQLiteCache(database_path=args.llm_cache))
+    else:
+        set_llm_cache(InMemoryCache())
+    rate_limiter = InMemoryRateLimiter(requests_per_second=args.requests_per_second, check_every_n_seconds=0.1)
+    llm, _ = make_llm(args.llm, rate_limiter)
+
+    # One embedding model: each app gets its own in-memory pipeline store built on it
+    print("Initializing vectorstores...")
+    manager = vectorstores_utils.init_vectorstores(args, local=True)
+    embedding = manager.get_store("pipeline_parts").embeddings
+    for name in args.apps:
+        manager.add_store(
+            f"pipeline_parts:{name}", file_path=None, embedding_model="sentence-transformers/all-MiniLM-L6-v2",
+            index_ids=True, backend="numpy", embedding=embedding
+        )
+
+    print(f"Running {len(args.apps)} apps with {args.app_workers} app workers at {args.requests_per_second} LLM requests/s...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.app_workers)) as pool:
+        reports = list(pool.map(lambda name: run_app(name, queries[name], llm, args, embedding), args.apps))
+    wall_seconds = time.perf_counter() - start
+
+    print(f"\n{'app':<24} {'status':<8} {'seconds':>8} {'themes':>6} {'epics':>6} {'stories':>7} {'flows':>6} {'artifacts/min':>13}")
+    for report in reports:
+        if report["status"] != "success":
+            print(f"{report['app']:<24} {report['status']:<8} {report['seconds']:>8.1f}  {report['message']}")
+            continue
+        print(
+            f"{report['app']:<24} {report['status']:<8} {report['seconds']:>8.1f} {report['themes']:>6} {report['epics']:>6} "
+            f"{report['user_stories']:>7} {report['flows']:>6} {report['artifacts_per_minute']:>13.1f}"
+        )
+    app_seconds = sum(report["seconds"] for report in reports)
+    summary = {
+        "apps": len(reports),
+        "succeeded": sum(report["status"] == "success" for report in reports),
+        "wall_seconds": wall_seconds,
+        "sequential_seconds": app_seconds,
+        "speedup": app_seconds / wall_seconds if wall_seconds else 0.0,
+        "apps_per_hour": 3600 * len(reports) / wall_seconds if wall_seconds else 0.0
+    }
+    print(
+        f"\n{summary['succeeded']}/{summary['apps']} apps in {wall_seconds:.1f}s wall time "
+        f"({app_seconds:.1f}s summed, {summary['speedup']:.1f}x overlap, {summary['apps_per_hour']:.1f} apps/hour)"
+    )
+    report_path = os.path.join(args.workspace_root, "batch_report.json")
+    os.makedirs(args.workspace_root, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "apps": reports}, f, indent=2)
+    print(f"Batch report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Recall and latency of the HNSW backend against exact search (NumpyVectorStore) over the
+same random corpus, for a sweep of ef_search values, plus MMR latency.
+
+Usage:
+    python -m benchmarks.ann_benchmark --size 100000 --ef 16 32 64 128 256
+"""
+from benchmarks.vectorstore_benchmark import make_corpus, build_numpy, percentile_ms, LookupEmbeddings
+from utils.hnsw_vectorstore import HNSWVectorStore
+from typing import List
+import numpy as np
+import argparse
+import time
+
+
+def build_hnsw(texts, vectors, metadatas, ef_construction: int, M: int, batch_size: int = 10000):
+    store = HNSWVectorStore(
+        LookupEmbeddings(dict(zip(texts, vectors))),
+        ef_construction=ef_construction,
+        M=M,
+        initial_capacity=batch_size
+    )
+    # Added in batches to exercise incremental growth of the index.
+    for start in range(0, len(texts), batch_size):
+        end = start + batch_size
+        store.add_embeddings(texts[start:end], vectors[start:end], texts[start:end], metadatas[start:end])
+    return store
+
+def search_ids(store, query: np.ndarray, k: int) -> List[str]:
+    return [doc.metadata["id"] for doc in store.similarity_search_by_vector(query.tolist(), k=k)]
+
+def run(size: int, dim: int, k: int, n_queries: int, ef_values: List[int], ef_construction: int, M: int):
+    texts, vectors, metadatas = make_corpus(size, dim)
+    # Queries near corpus points, as real queries are near their relevant chunks.
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, size, n_queries)
+    queries = vectors[picks] + 0.5 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    exact = build_numpy(texts, vectors, metadatas)
+    truth = [set(search_ids(exact, query, k)) for query in queries]
+    exact_samples = []
+    for query in queries:
+        start = time.perf_counter()
+        exact.similarity_search_by_vector(query.tolist(), k=k)
+        exact_samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    store = build_hnsw(texts, vectors, metadatas, ef_construction, M)
+    build_seconds = time.perf_counter() - start
+    print(f"{size} docs, dim {dim}, k={k}; HNSW build {build_seconds:.2f}s (M={M}, ef_construction={ef_construction})")
+    print(f"{'search':<12} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'exact':<12} {1.0:>9.3f} {percentile_ms(exact_samples, 50):>8.2f} {percentile_ms(exact_samples, 95):>8.2f}")
+    for ef in ef_values:
+        store.ef_search = ef
+        samples, hits = [], 0
+        for query, relevant in zip(queries, truth):
+            start = time.perf_counter()
+            found = search_ids(store, query, k)
+            samples.append(time.perf_counter() - start)
+            hits += len(relevant.intersection(found))
+        recall = hits / (k * len(queries))
+        print(f"{'hnsw ef=' + str(ef):<12} {recall:>9.3f} {percentile_ms(samples, 50):>8.2f} {percentile_ms(samples, 95):>8.2f}")
+
+    for name, backend in (("exact", exact), ("hnsw", store)):
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            backend.max_marginal_relevance_search_by_vector(query.tolist(), k=k, fetch_k=4 * k)
+            samples.append(time.perf_counter() - start)
+        print(f"{'mmr ' + name:<12} {'':>9} {percentile_ms(samples, 50):>8.2f} {percentile_ms(samples, 95):>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)  # all-mpnet-base-v2
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--M", type=int, default=16)
+    args = parser.parse_args()
+    run(args.size, args.dim, args.k, args.queries, args.ef, args.ef_construction, args.M)
@@ -0,0 +1,44 @@
+"""
+Time to reopen a persisted NumpyVectorStore with memory-mapped vectors, compared with
+reading the same matrix fully into memory, plus the latency of the first query.
+
+Usage:
+    python -m benchmarks.mmap_open_benchmark --size 100000 --dir /tmp/numpy_store
+"""
+from benchmarks.vectorstore_benchmark import make_corpus, LookupEmbeddings
+from utils.numpy_vectorstore import NumpyVectorStore, VECTORS_FILE
+import numpy as np
+import argparse
+import shutil
+import time
+import os
+
+
+def run(size: int, dim: int, directory: str):
+    shutil.rmtree(directory, ignore_errors=True)
+    texts, vectors, metadatas = make_corpus(size, dim)
+    store = NumpyVectorStore(LookupEmbeddings({}), initial_capacity=size, persist_directory=directory)
+    store.add_embeddings(texts, vectors, texts, metadatas)
+    start = time.perf_counter()
+    store.persist()
+    print(f"{size} docs, dim {dim}: persist {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    np.load(os.path.join(directory, VECTORS_FILE))
+    print(f"full read of {VECTORS_FILE}: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    reopened = NumpyVectorStore(LookupEmbeddings({}), persist_directory=directory)
+    print(f"memory-mapped open (incl. metadata index): {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    reopened.similarity_search_by_vector(vectors[0].tolist(), k=4)
+    print(f"first query: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--dir", default="benchmark_numpy_store")
+    args = parser.parse_args()
+    run(args.size, args.dim, args.dir)
@@ -0,0 +1,97 @@
+"""
+Memory footprint, disk size, recall and latency of int8-quantized NumpyVectorStore search
+(with and without full-precision re-ranking) against exact float32 search over the same
+random corpus.
+
+Each store is persisted, then reopened and queried in a fresh process, so the reported
+resident memory (VmRSS from /proc) is what serving that store costs rather than what
+building it cost. It is split into anonymous pages (private to the process) and
+file-backed pages (memory-mapped .npy files: shared page cache the OS can reclaim). The
+re-ranked rows of vectors.npy show up in the file-backed column with the kernel's fault
+granularity, which may be whole large folios rather than single rows.
+
+Usage:
+    python -m benchmarks.quantization_benchmark --size 100000 --rerank 0 1 2 4 8
+"""
+from benchmarks.vectorstore_benchmark import make_corpus, LookupEmbeddings, percentile_ms
+from utils.numpy_vectorstore import NumpyVectorStore
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List
+import numpy as np
+import argparse
+import shutil
+import time
+import os
+
+
+def memory_kb() -> Dict[str, int]:
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {key: int(fields[key].split()[0]) for key in ("VmRSS", "RssAnon", "RssFile")}
+
+def directory_bytes(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def build(directory, texts, vectors, metadatas, quantization=None, rerank_factor=4):
+    shutil.rmtree(directory, ignore_errors=True)
+    store = NumpyVectorStore(
+        LookupEmbeddings({}),
+        initial_capacity=len(texts),
+        quantization=quantization,
+        rerank_factor=rerank_factor,
+        persist_directory=directory
+    )
+    store.add_embeddings(texts, vectors, texts, metadatas)
+    store.persist()
+
+def serve(directory, quantization, rerank_factor, queries, k: int):
+    """
+    Runs in a fresh process: opens the persisted store, runs the queries and reports the
+    latencies, result ids and the resident memory the store added.
+    """
+    before = memory_kb()
+    store = NumpyVectorStore(LookupEmbeddings({}), quantization=quantization, rerank_factor=rerank_factor, persist_directory=directory)
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(query.tolist(), k=k)
+        samples.append(time.perf_counter() - start)
+        results.append({doc.metadata["id"] for doc in docs})
+    after = memory_kb()
+    return samples, results, {key: after[key] - before[key] for key in after}
+
+def run(size: int, dim: int, k: int, n_queries: int, rerank_factors: List[int], directory: str):
+    texts, vectors, metadatas = make_corpus(size, dim)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, size, n_queries)
+    queries = vectors[picks] + 0.5 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    configs = [("float32", None, 0)] + [(f"int8 rerank x{factor}", "int8", factor) for factor in rerank_factors]
+    print(f"{size} docs, dim {dim}, k={k}")
+    print(f"{'store':<18} {'disk MB':>8} {'RSS MB':>7} {'anon MB':>8} {'file MB':>8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    truth = None
+    for name, quantization, factor in configs:
+        store_dir = os.path.join(directory, name.replace(" ", "_"))
+        build(store_dir, texts, vectors, metadatas, quantization, factor)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            samples, results, memory = pool.submit(serve, store_dir, quantization, factor, queries, k).result()
+        truth = truth or results
+        recall = sum(len(a & b) for a, b in zip(truth, results)) / (k * len(queries))
+        print(
+            f"{name:<18} {directory_bytes(store_dir) / 2**20:>8.1f} {memory['VmRSS'] / 2**10:>7.1f} {memory['RssAnon'] / 2**10:>8.1f} "
+            f"{memory['RssFile'] / 2**10:>8.1f} {recall:>9.3f} {percentile_ms(samples, 50):>8.2f} {percentile_ms(samples, 95):>8.2f}"
+        )
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)  # all-mpnet-base-v2
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    parser.add_argument("--dir", default="benchmark_quantized_stores")
+    args = parser.parse_args()
+    run(args.size, args.dim, args.k, args.queries, args.rerank, args.dir)
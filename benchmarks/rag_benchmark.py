@@ -0,0 +1,206 @@
+"""
+Retrieval quality and latency benchmark for the RAG stores.
+
+Builds stores from the local rag_docs fixtures for every configuration in the grid
+(splitter x backend x search type x k), runs the checked-in query set in
+benchmarks/fixtures/rag_queries.json, and reports recall@k, MRR, p50/p95 search latency and
+index build time. Chunks are embedded once per splitter setting and shared by all backends,
+so build time is reported as embedding time plus index time.
+
+Runs offline: models are loaded from the local Hugging Face cache (HF_HUB_OFFLINE=1) and
+web sources are never fetched.
+
+Usage:
+    python -m benchmarks.rag_benchmark --chunk-sizes 300 500 800 --k 2 4 8 --search-types similarity mmr
+    python -m benchmarks.rag_benchmark --token-splitter --backends numpy chroma hnsw --hybrid --output results.json
+"""
+import os
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from benchmarks.vectorstore_benchmark import LookupEmbeddings, percentile_ms
+from utils.parallel_ingestion import parse_and_split_file
+from utils.document_registry import iter_file_sources
+from utils.hybrid_retrieval import BM25Index, reciprocal_rank_fusion
+from utils.numpy_vectorstore import NumpyVectorStore
+from typing import Dict, List
+import numpy as np
+import argparse
+import json
+import time
+import re
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "fixtures", "rag_queries.json")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def covers(chunk: str, evidence: str) -> bool:
+    """
+    True if the chunk contains the evidence passage, or at least half of it when the
+    passage straddles a chunk boundary.
+    """
+    if evidence in chunk:
+        return True
+    half = (len(evidence) + 1) // 2
+    for size in range(len(evidence) - 1, half - 1, -1):
+        if chunk.endswith(evidence[:size]) or chunk.startswith(evidence[-size:]):
+            return True
+    return False
+
+def load_queries(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        queries = json.load(f)["queries"]
+    for query in queries:
+        query["evidence"] = [normalize(evidence) for evidence in query["evidence"]]
+    return queries
+
+def score_query(retrieved: List[str], evidence: List[str]) -> Dict[str, float]:
+    """
+    recall: share of the query's evidence passages found in the retrieved chunks.
+    reciprocal_rank: 1 / rank of the first retrieved chunk covering any evidence passage.
+    """
+    found, reciprocal_rank = set(), 0.0
+    for rank, text in enumerate(retrieved, start=1):
+        hits = {e for e in evidence if covers(text, e)}
+        if hits and not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+        found |= hits
+    return {"recall": len(found) / len(evidence), "reciprocal_rank": reciprocal_rank}
+
+
+# === Store Builders ===
+def build_numpy(texts, vectors, metadatas, embeddings):
+    store = NumpyVectorStore(embeddings, initial_capacity=len(texts))
+    store.add_embeddings([m["id"] for m in metadatas], vectors, texts, metadatas)
+    return store
+
+def build_chroma(texts, vectors, metadatas, embeddings):
+    from langchain_chroma import Chroma
+    store = Chroma(
+        collection_name=f"rag_benchmark_{time.time_ns()}",
+        embedding_function=embeddings,
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    store.add_texts(texts, metadatas=metadatas, ids=[m["id"] for m in metadatas])
+    return store
+
+def build_hnsw(texts, vectors, metadatas, embeddings):
+    from utils.hnsw_vectorstore import HNSWVectorStore
+    store = HNSWVectorStore(embeddings, initial_capacity=len(texts))
+    store.add_embeddings([m["id"] for m in metadatas], vectors, texts, metadatas)
+    return store
+
+BUILDERS = {"numpy": build_numpy, "chroma": build_chroma, "hnsw": build_hnsw}
+
+
+def search(store, bm25, query: str, query_vector: List[float], search_type: str, k: int, fetch_k: int, lambda_mult: float):
+    if search_type == "mmr":
+        docs = store.max_marginal_relevance_search_by_vector(query_vector, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+    else:
+        docs = store.similarity_search_by_vector(query_vector, k=k)
+    if bm25 is not None:
+        keyword_docs = [doc for doc, _ in bm25.search(query, k=k)]
+        docs = reciprocal_rank_fusion([docs, keyword_docs])[:k]
+    return docs
+
+
+def run(args):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    queries = load_queries(args.queries)
+    paths = [path for path, _ in iter_file_sources(args.pdf_dir, args.md_dir)]
+    if not paths:
+        raise SystemExit(f"No fixtures found in {args.pdf_dir} or {args.md_dir}.")
+    model = HuggingFaceEmbeddings(model_name=args.model)
+    query_texts = [query["query"] for query in queries]
+    query_vectors = dict(zip(query_texts, model.embed_documents(query_texts)))
+
+    splitters = [(size, args.chunk_overlap, "characters", None) for size in args.chunk_sizes]
+    if args.token_splitter:
+        splitters.append((args.chunk_tokens, args.overlap_tokens, "tokens", args.tokenizer or args.model))
+
+    results = []
+    header = f"{'splitter':<18} {'backend':<7} {'search':<16} {'k':>3} {'chunks':>6} {'recall@k':>8} {'MRR':>6} {'p50 ms':>7} {'p95 ms':>7} {'embed s':>7} {'index s':>7}"
+    print(f"{len(paths)} fixture files, {len(queries)} queries, model {args.model}")
+    print(header)
+    for split_args in splitters:
+        chunks = []
+        for path in paths:
+            chunks.extend(parse_and_split_file(path, split_args))
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [dict(chunk.metadata, id=f"chunk-{i}") for i, chunk in enumerate(chunks)]
+        unlabeled = [e for q in queries for e in q["evidence"] if not any(covers(normalize(t), e) for t in texts)]
+        if unlabeled:
+            print(f"warning: {len(unlabeled)} evidence passages are not covered by any chunk: {unlabeled[:3]}")
+
+        start = time.perf_counter()
+        vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+        embed_seconds = time.perf_counter() - start
+        embeddings = LookupEmbeddings({**dict(zip(texts, vectors)), **{q: np.asarray(v) for q, v in query_vectors.items()}})
+        splitter_name = f"{'chars' if split_args[2] == 'characters' else 'tokens'} {split_args[0]}/{split_args[1]}"
+
+        for backend in args.backends:
+            try:
+                start = time.perf_counter()
+                store = BUILDERS[backend](texts, vectors, metadatas, embeddings)
+                bm25 = BM25Index.from_vectorstore(store) if args.hybrid else None
+                index_seconds = time.perf_counter() - start
+            except ImportError as e:
+                print(f"{splitter_name:<18} {backend:<7} skipped ({e})")
+                continue
+            for search_type in args.search_types:
+                for k in args.k:
+                    samples, scores = [], []
+                    for query in queries:
+                        start = time.perf_counter()
+                        docs = search(store, bm25, query["query"], query_vectors[query["query"]], search_type, k, args.fetch_k, args.lambda_mult)
+                        samples.append(time.perf_counter() - start)
+                        scores.append(score_query([normalize(doc.page_content) for doc in docs], query["evidence"]))
+                    row = {
+                        "splitter": splitter_name,
+                        "backend": backend,
+                        "search_type": search_type + ("+bm25" if bm25 is not None else ""),
+                        "k": k,
+                        "chunks": len(chunks),
+                        "recall_at_k": float(np.mean([s["recall"] for s in scores])),
+                        "mrr": float(np.mean([s["reciprocal_rank"] for s in scores])),
+                        "p50_ms": percentile_ms(samples, 50),
+                        "p95_ms": percentile_ms(samples, 95),
+                        "embed_seconds": embed_seconds,
+                        "index_seconds": index_seconds
+                    }
+                    results.append(row)
+                    print(
+                        f"{row['splitter']:<18} {backend:<7} {row['search_type']:<16} {k:>3} {row['chunks']:>6} "
+                        f"{row['recall_at_k']:>8.3f} {row['mrr']:>6.3f} {row['p50_ms']:>7.2f} {row['p95_ms']:>7.2f} "
+                        f"{embed_seconds:>7.2f} {index_seconds:>7.2f}"
+                    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--pdf-dir", default="rag_docs/pdfs")
+    parser.add_argument("--md-dir", default="rag_docs/mds")
+    parser.add_argument("--model", default="sentence-transformers/all-mpnet-base-v2")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[300, 500, 800])
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--token-splitter", action="store_true")
+    parser.add_argument("--chunk-tokens", type=int, default=380)
+    parser.add_argument("--overlap-tokens", type=int, default=64)
+    parser.add_argument("--tokenizer", default=None)
+    parser.add_argument("--backends", nargs="+", default=["numpy", "chroma"], choices=sorted(BUILDERS))
+    parser.add_argument("--search-types", nargs="+", default=["similarity", "mmr"], choices=["similarity", "mmr"])
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--hybrid", action="store_true")
+    parser.add_argument("--output", default=None)
+    run(parser.parse_args())
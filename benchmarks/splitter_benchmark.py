@@ -0,0 +1,54 @@
+"""
+Compares character and token splitting of the local RAG files: chunk count (index size),
+tokens per chunk, and how many chunks overflow the embedding model's window and get
+truncated, plus the share of all chunk tokens the model actually embeds.
+
+Usage:
+    python -m benchmarks.splitter_benchmark --md-dir rag_docs/mds --pdf-dir rag_docs/pdfs
+"""
+from utils.parallel_ingestion import parse_and_split_file
+from utils.document_registry import iter_file_sources
+from transformers import AutoTokenizer
+import numpy as np
+import argparse
+
+
+def describe(name: str, chunks, tokenizer, window: int):
+    lengths = np.array([len(tokenizer.tokenize(chunk.page_content)) for chunk in chunks])
+    if not len(lengths):
+        print(f"{name:<26} no chunks")
+        return
+    truncated = int((lengths > window - 2).sum())  # [CLS] and [SEP] take two slots
+    print(
+        f"{name:<26} {len(chunks):>7} {lengths.mean():>9.1f} {lengths.max():>7} "
+        f"{truncated:>10} {np.minimum(lengths, window - 2).sum() / lengths.sum():>9.1%}"
+    )
+
+def run(pdf_dir: str, md_dir: str, chunk_size: int, chunk_overlap: int, chunk_tokens: int, overlap_tokens: int, model: str, window: int):
+    paths = [path for path, _ in iter_file_sources(pdf_dir, md_dir)]
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    configurations = [
+        (f"characters {chunk_size}/{chunk_overlap}", (chunk_size, chunk_overlap, "characters", None)),
+        (f"tokens {chunk_tokens}/{overlap_tokens}", (chunk_tokens, overlap_tokens, "tokens", model)),
+    ]
+    print(f"{len(paths)} files, window {window} tokens ({model})")
+    print(f"{'splitter':<26} {'chunks':>7} {'tok/chunk':>9} {'max tok':>7} {'truncated':>10} {'embedded':>9}")
+    for name, split_args in configurations:
+        chunks = []
+        for path in paths:
+            chunks.extend(parse_and_split_file(path, split_args))
+        describe(name, chunks, tokenizer, window)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-dir", default="rag_docs/pdfs")
+    parser.add_argument("--md-dir", default="rag_docs/mds")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--chunk-tokens", type=int, default=380)
+    parser.add_argument("--overlap-tokens", type=int, default=64)
+    parser.add_argument("--model", default="sentence-transformers/all-mpnet-base-v2")
+    parser.add_argument("--window", type=int, default=384)
+    args = parser.parse_args()
+    run(args.pdf_dir, args.md_dir, args.chunk_size, args.chunk_overlap, args.chunk_tokens, args.overlap_tokens, args.model, args.window)
@@ -0,0 +1,102 @@
+"""
+Latency benchmark of the in-process NumpyVectorStore against Chroma for pipeline_parts-like
+collections. Uses random unit vectors in place of a real embedding model so the numbers
+measure only the vectorstore.
+
+Usage:
+    python -m benchmarks.vectorstore_benchmark --sizes 1000 10000 100000
+"""
+from langchain_core.embeddings import Embeddings
+from utils.numpy_vectorstore import NumpyVectorStore
+from typing import Dict, List
+import numpy as np
+import argparse
+import time
+
+CATEGORIES = ["theme", "epic", "story", "flow", "screen", "component_instance"]
+
+
+class LookupEmbeddings(Embeddings):
+    """
+    Returns precomputed vectors for known texts, so adding documents costs no inference.
+    """
+
+    def __init__(self, vectors: Dict[str, np.ndarray]):
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text].tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text].tolist()
+
+
+def make_corpus(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    texts = [f"doc-{i}" for i in range(n)]
+    metadatas = [{"id": text, "category": CATEGORIES[i % len(CATEGORIES)]} for i, text in enumerate(texts)]
+    return texts, vectors, metadatas
+
+def percentile_ms(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+def time_queries(store, queries: np.ndarray, k: int, filter=None) -> List[float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(query.tolist(), k=k, filter=filter)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def build_numpy(texts, vectors, metadatas):
+    store = NumpyVectorStore(LookupEmbeddings(dict(zip(texts, vectors))))
+    store.add_embeddings(texts, vectors, texts, metadatas)
+    return store
+
+def build_chroma(texts, vectors, metadatas, batch_size: int = 5000):
+    from langchain_chroma import Chroma
+    store = Chroma(
+        collection_name=f"benchmark_{len(texts)}",
+        embedding_function=LookupEmbeddings(dict(zip(texts, vectors))),
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    for start in range(0, len(texts), batch_size):
+        end = start + batch_size
+        store.add_texts(texts[start:end], metadatas=metadatas[start:end], ids=texts[start:end])
+    return store
+
+def run(sizes: List[int], dim: int, k: int, n_queries: int, backends: List[str]):
+    builders = {"numpy": build_numpy, "chroma": build_chroma}
+    rng = np.random.default_rng(1)
+    print(f"{'backend':<8} {'docs':>8} {'build s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p50 filt':>9} {'p95 filt':>9}")
+    for n in sizes:
+        texts, vectors, metadatas = make_corpus(n, dim)
+        queries = rng.standard_normal((n_queries, dim)).astype(np.float32)
+        for backend in backends:
+            try:
+                start = time.perf_counter()
+                store = builders[backend](texts, vectors, metadatas)
+                build_seconds = time.perf_counter() - start
+            except ImportError as e:
+                print(f"{backend:<8} {n:>8}  skipped ({e})")
+                continue
+            time_queries(store, queries[:5], k)  # warm-up
+            plain = time_queries(store, queries, k)
+            filtered = time_queries(store, queries, k, filter={"category": "story"})
+            print(
+                f"{backend:<8} {n:>8} {build_seconds:>9.2f} "
+                f"{percentile_ms(plain, 50):>8.2f} {percentile_ms(plain, 95):>8.2f} "
+                f"{percentile_ms(filtered, 50):>9.2f} {percentile_ms(filtered, 95):>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)  # all-MiniLM-L6-v2
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=["numpy", "chroma"])
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.k, args.queries, args.backends)
@@ -31,16 +31,15 @@ class Screen:
 #region: Screen Creation Tools
 def get_box_by_id(box_id):
     """
-    Retrieve a box by its id from the vectorstore.
+    Retrieve a box by its id from the vectorstore's id index.
     """
-    vectorstore = vectorstores_utils.manager.get_store("pipeline_parts")
-    results = vectorstore.get(where={"id": box_id})
-    if results and results.get("documents") and results.get("metadatas"):
-        metadata = results["metadatas"][0]
+    hit = vectorstores_utils.manager.get_by_id("pipeline_parts", box_id)
+    if hit:
+        description, metadata = hit
         box = {
             "id": metadata.get("id"),
             "name": metadata.get("name"),
-            "description": results["documents"][0],
+            "description": description,
             "container": metadata.get("container"),
             "story_ids": metadata.get("story_ids", [])
         }
@@ -4,6 +4,7 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.schema import Document
 import uuid
 from utils.llm_utils import safe_parse_props, safe_parse_supported_props
+from utils.answer_providers import get_answer_provider
 
 #region: Flow to Screen Conversion
 
@@ -72,6 +73,47 @@ class Screen:
             "component_instance_ids": self.component_instance_ids
         }
 
+# ==================================
+# === Vectorstore Document Helpers ===
+# ==================================
+# Every write builds its document here so all screens, component types and instances
+# carry the same metadata fields, including a "category" that searches can filter on.
+
+def component_type_document(comp_type):
+    return Document(
+        page_content=f"Component Type Name: {comp_type.name}\nDescription: {comp_type.description}",
+        metadata={
+            "id": comp_type.id,
+            "name": comp_type.name,
+            "supported_props": str(comp_type.supported_props),
+            "category": "component_type"
+        }
+    )
+
+def component_instance_document(inst):
+    return Document(
+        page_content=f"Props: {str(inst.props)}\nDescription: {inst.description}",
+        metadata={
+            "id": inst.id,
+            "type_id": inst.type_id,
+            "screen_id": inst.screen_id,
+            "props": str(inst.props),
+            "description": inst.description,
+            "category": "component_instance"
+        }
+    )
+
+def screen_document(screen):
+    return Document(
+        page_content=f"Screen Name: {screen.name}\nDescription: {screen.description}",
+        metadata={
+            "id": screen.id,
+            "name": screen.name,
+            "component_instance_ids": str(screen.component_instance_ids),
+            "category": "screen"
+        }
+    )
+
 # ================================
 # === Component Type Functions ===
 # ================================
@@ -82,16 +124,7 @@ def add_component_type(name, description, supported_props, component_types, vect
     new_type = ComponentType(name, description, supported_props)
     component_types[new_type.id] = new_type
     # Add to vectorstore
-    doc_text = f"Component Type Name: {name}\nDescription: {description}"
-    metadata = {
-        "id": new_type.id,
-        "name": name,
-        "supported_props": str(supported_props),
-        "category": "component_type"
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [component_type_document(new_type)])
     return new_type.id
 
 
@@ -122,16 +155,7 @@ def edit_component_type(type_id, new_name=None, new_description=None, new_suppor
             comp_type.supported_props = parsed_props
             changes.append("supported_props")
     # Update vectorstore
-    doc_text = f"Component Type Name: {comp_type.name}\nDescription: {comp_type.description}"
-    metadata = {
-        "id": comp_type.id,
-        "name": comp_type.name,
-        "supported_props": str(comp_type.supported_props)
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete(comp_type.id)
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [component_type_document(comp_type)])
         
     if changes:
         return {
@@ -154,9 +178,7 @@ def delete_component_type(type_id, component_types, component_instances, vectors
         }
     affected_instances = [iid for iid, inst in component_instances.items() if inst.type_id == type_id]
     del component_types[type_id]
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([type_id])
+    vectorstores_utils.manager.delete_documents(vectorstore_name, [type_id])
     return {
         "status": "success",
         "message": f"Component type '{type_id}' deleted.",
@@ -225,30 +247,10 @@ def add_component_instance(type_id, props, screen_id, component_instances, scree
             screen.add_component_instance(new_instance.id)
             new_instance.screen_id = screen_id
             # Update screen in vectorstore
-            doc_text_screen = f"Screen Name: {screen.name}\nDescription: {screen.description}"
-            metadata_screen = {
-                "id": screen.id,
-                "name": screen.name,
-                "component_instance_ids": str(screen.component_instance_ids),
-                "category": "screen"
-            }
-            vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-            if vectorstore:
-                vectorstore.delete([screen.id])  
-                vectorstore.add_documents([Document(page_content=doc_text_screen, metadata=metadata_screen)])
+            vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(screen)])
     component_instances[new_instance.id] = new_instance
     # Add to vectorstore
-    doc_text = f"Props: {str(props)}\nDescription: {new_instance.description}"
-    metadata = {
-        "id": new_instance.id,
-        "type_id": type_id,
-        "screen_id": new_instance.screen_id,
-        "props": str(props),
-        "description": new_instance.description
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [component_instance_document(new_instance)])
     return {
         "status": "success",
         "message": f"Instance '{new_instance.id}' created and added to screen '{screen_id}'." if screen_id else f"Instance '{new_instance.id}' created.",
@@ -272,22 +274,10 @@ def delete_component_instance(instance_id, component_instances, screens, vectors
         if instance_id in screen.component_instance_ids:
             screen.remove_component_instance(instance_id)
             # Optionally update screen in vectorstore
-            doc_text_screen = f"Screen Name: {screen.name}\nDescription: {screen.description}"
-            metadata_screen = {
-                "id": screen.id,
-                "name": screen.name,
-                "component_instance_ids": str(screen.component_instance_ids),
-                "category": "screen"
-            }
-            vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-            if vectorstore:
-                vectorstore.delete([screen.id])
-                vectorstore.add_documents([Document(page_content=doc_text_screen, metadata=metadata_screen)])
+            vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(screen)])
     # Delete the instance itself
     del component_instances[instance_id]
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([instance_id])
+    vectorstores_utils.manager.delete_documents(vectorstore_name, [instance_id])
     return {
         "status": "success",
         "message": f"Component instance '{instance_id}' deleted and removed from all screens."
@@ -317,18 +307,7 @@ def edit_component_instance(instance_id, new_props=None, new_screen_id=None, new
         changes.append("description")
     if changes:
         # Update vectorstore
-        doc_text = f"Props: {str(inst.props)}\nDescription: {inst.description}"
-        metadata = {
-            "id": inst.id,
-            "type_id": inst.type_id,
-            "screen_id": inst.screen_id,
-            "props": str(inst.props),
-            "description": inst.description  # New: include description
-        }
-        vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-        if vectorstore:
-            vectorstore.delete([inst.id])
-            vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+        vectorstores_utils.manager.add_documents(vectorstore_name, [component_instance_document(inst)])
         return {
             "status": "success",
             "message": f"Component instance '{instance_id}' updated: {', '.join(changes)} changed."
@@ -397,16 +376,7 @@ def add_screen(name, description, screens, vectorstore_name="pipeline_parts"):
     new_screen = Screen(name, description)
     screens[new_screen.id] = new_screen
     # Add to vectorstore
-    doc_text = f"Screen Name: {name}\nDescription: {description}"
-    metadata = {
-        "id": new_screen.id,
-        "name": name,
-        "component_instance_ids": str(new_screen.component_instance_ids),
-        "category": "screen"
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(new_screen)])
     return {
         "status": "success",
         "message": f"Screen '{name}' created with ID '{new_screen.id}'.",
@@ -426,16 +396,7 @@ def edit_screen(screen_id, new_name=None, new_description=None, screens=None, ve
         screen.description = new_description
         changes.append("description")
     # Update vectorstore
-    doc_text = f"Screen Name: {screen.name}\nDescription: {screen.description}"
-    metadata = {
-        "id": screen.id,
-        "name": screen.name,
-        "component_instance_ids": str(screen.component_instance_ids)
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([screen.id])
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(screen)])
     if changes:
         return {
             "status": "success",
@@ -468,23 +429,13 @@ def delete_screen(screen_id, screens, component_instances, vectorstore_name="pip
     print(f"Screen found with key: {repr(found_key)}")
     instance_ids = list(screens[found_key].component_instance_ids)
     del screens[found_key]
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([found_key])
+    if vectorstores_utils.manager.delete_documents(vectorstore_name, [found_key]):
         # Remove screen_id from affected component instances and update vectorstore
         for iid in instance_ids:
             inst = component_instances.get(iid)
             if inst and inst.screen_id == found_key:
                 inst.screen_id = None
-                doc_text_inst = f"Props: {str(inst.props)}"
-                metadata_inst = {
-                    "id": inst.id,
-                    "type_id": inst.type_id,
-                    "screen_id": inst.screen_id,
-                    "props": str(inst.props)
-                }
-                vectorstore.delete([inst.id])
-                vectorstore.add_documents([Document(page_content=doc_text_inst, metadata=metadata_inst)])
+                vectorstores_utils.manager.add_documents(vectorstore_name, [component_instance_document(inst)])
         return {"status": "success", "message": f"Screen '{screen_id}' deleted and screen_id removed from affected instances.", "affected_instance_ids": instance_ids}
 
 def add_component_instance_to_screen(screen_id, instance_id, screens, component_instances, vectorstore_name="pipeline_parts"):
@@ -500,29 +451,9 @@ def add_component_instance_to_screen(screen_id, instance_id, screens, component_
     if inst:
         inst.screen_id = screen_id
         # Update component instance in vectorstore
-        doc_text_inst = f"Props: {str(inst.props)}"
-        metadata_inst = {
-            "id": inst.id,
-            "type_id": inst.type_id,
-            "screen_id": inst.screen_id,
-            "props": str(inst.props)
-        }
-        vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-        if vectorstore:
-            vectorstore.delete([inst.id])
-            vectorstore.add_documents([Document(page_content=doc_text_inst, metadata=metadata_inst)])
+        vectorstores_utils.manager.add_documents(vectorstore_name, [component_instance_document(inst)])
     # Update screen in vectorstore
-    doc_text_screen = f"Screen Name: {screen.name}\nDescription: {screen.description}"
-    metadata_screen = {
-        "id": screen.id,
-        "name": screen.name,
-        "component_instance_ids": str(screen.component_instance_ids),
-        "category": "screen"
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([screen.id])
-        vectorstore.add_documents([Document(page_content=doc_text_screen, metadata=metadata_screen)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(screen)])
     return {"status": "success", "message": f"Instance '{instance_id}' added to screen '{screen_id}'."}
 
 def remove_component_instance_from_screen(screen_id, instance_id, screens, component_instances, vectorstore_name="pipeline_parts"):
@@ -534,31 +465,12 @@ def remove_component_instance_from_screen(screen_id, instance_id, screens, compo
         return {"status": "error", "message": f"Instance '{instance_id}' not in screen '{screen_id}'."}
     screen.remove_component_instance(instance_id)
     # Update screen in vectorstore
-    doc_text = f"Screen Name: {screen.name}\nDescription: {screen.description}"
-    metadata = {
-        "id": screen.id,
-        "name": screen.name,
-        "component_instance_ids": str(screen.component_instance_ids),
-        "category": "screen"
-    }
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if vectorstore:
-        vectorstore.delete([screen.id])
-        vectorstore.add_documents([Document(page_content=doc_text, metadata=metadata)])
+    vectorstores_utils.manager.add_documents(vectorstore_name, [screen_document(screen)])
     # Set dangling instance's screen_id to None and update vectorstore
     inst = component_instances.get(instance_id)
     if inst and inst.screen_id == screen_id:
         inst.screen_id = None
-        doc_text_inst = f"Props: {str(inst.props)}"
-        metadata_inst = {
-            "id": inst.id,
-            "type_id": inst.type_id,
-            "screen_id": inst.screen_id,
-            "props": str(inst.props)
-        }
-        if vectorstore:
-            vectorstore.delete([inst.id])
-            vectorstore.add_documents([Document(page_content=doc_text_inst, metadata=metadata_inst)])
+        vectorstores_utils.manager.add_documents(vectorstore_name, [component_instance_document(inst)])
     return {"status": "success", "message": f"Instance '{instance_id}' removed from screen '{screen_id}' and screen_id set to None in instance."}
 
 def get_screens(screens):
@@ -597,31 +509,38 @@ def get_screen_full_details(screen_id, screens, component_instances):
 # === Semantic Search Tool ===
 # ============================
 
-def semantic_search_tool(query, filter_key=None, filter_value=None, vectorstore_name="pipeline_parts", k=5):
+def semantic_search_tool(query, filter_key=None, filter_value=None, vectorstore_name="pipeline_parts", k=5, filters=None):
     """
-    Performs a semantic search in the vectorstore with an optional metadata filter.
+    Performs a semantic search in the vectorstore with optional metadata filters.
     - query: The semantic search string.
     - filter_key: Metadata key to filter on (e.g., "type_id").
     - filter_value: Value for the filter key.
+    - filters: Several conditions at once as {key: value}; a list value matches any of its
+      items, and all conditions must hold (e.g., {"category": ["screen", "component_type"], "name": "Dashboard"}).
+      Stories carry their frontend/backend label in "story_category" (e.g., {"category": "story", "story_category": "frontend"}).
     - k: Number of results to return.
     """
-    vectorstore = vectorstores_utils.manager.get_store(vectorstore_name)
-    if not vectorstore:
+    if not vectorstores_utils.manager.get_store(vectorstore_name):
         return {"status": "error", "message": f"Vectorstore '{vectorstore_name}' not found.", "results": []}
-    
-    # Validate filter key if provided
-    valid_keys = {"id", "name", "type_id", "supported_props", "component_instance_ids", "props", "category", "screen_id"}
-    if filter_key and filter_key not in valid_keys:
+
+    conditions = dict(filters or {})
+    if filter_key and filter_value is not None:
+        conditions[filter_key] = filter_value
+
+    # Validate filter keys if provided
+    valid_keys = {"id", "name", "type_id", "supported_props", "component_instance_ids", "props", "category", "screen_id", "story_category"}
+    invalid_keys = [key for key in conditions if key not in valid_keys]
+    if invalid_keys:
         return {
             "status": "error",
-            "message": f"Invalid filter key '{filter_key}'. Valid keys are: {', '.join(valid_keys)}.",
+            "message": f"Invalid filter key(s) {', '.join(invalid_keys)}. Valid keys are: {', '.join(valid_keys)}.",
             "results": []
         }
-    
-    # Build filter dict if provided
-    filter_dict = {filter_key: filter_value} if filter_key and filter_value is not None else None
-    # Chroma's similarity_search supports metadata filtering
-    results = vectorstore.similarity_search(query, k=k, filter=filter_dict)
+
+    # Build filter dict ($in for lists, $and across keys); partitioned stores only scan matching categories
+    filter_dict = vectorstores_utils.build_metadata_filter(conditions)
+    # Re-ranked by the cross-encoder when a rerank_model is configured
+    results = vectorstores_utils.manager.similarity_search(vectorstore_name, query, k=k, filter=filter_dict, rerank=True)
     # Return results as list of dicts
     return {
         "status": "success",
@@ -632,6 +551,4 @@ def semantic_search_tool(query, filter_key=None, filter_value=None, vectorstore_
 
 
 def ask_human_clarification(question: str) -> str:
-    print("\n--- LLM requests clarification ---")
-    clarification = input(f"LLM needs clarification: {question}\nYour answer: ")
-    return clarification
\ No newline at end of file
+    return get_answer_provider().answer(question)
\ No newline at end of file
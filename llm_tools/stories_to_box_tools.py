@@ -2,6 +2,7 @@ from langchain.tools import tool, Tool, StructuredTool
 import json
 import uuid
 import utils.vectorstores_utils as vectorstores_utils
+from utils.answer_providers import get_answer_provider
 
 #region: Tools for RAG info
 class RAGTool:
@@ -38,6 +39,7 @@ def make_rag_tool(retriever):
 def ask_user_tool(questions: str) -> str:
     """
     Ask the user a set of questions and return their answers as a JSON object.
+    Answers come from the configured answer provider (console, answers file or auto-answer).
     """
     try:
         question_list = json.loads(questions)
@@ -45,16 +47,14 @@ def ask_user_tool(questions: str) -> str:
             question_list = [questions]
     except Exception:
         question_list = [questions]
-    answers = {}
+    question_texts = []
     for q in question_list:
         # If q is a dict, extract the question text
         if isinstance(q, dict) and "question" in q:
-            question_text = q["question"]
+            question_texts.append(q["question"])
         else:
-            question_text = str(q)
-        print(f"\n[LLM Question]: {question_text}")
-        ans = input("[Your answer]: ")
-        answers[question_text] = ans
+            question_texts.append(str(q))
+    answers = get_answer_provider().answer_all(question_texts)
     return json.dumps(answers)
 #endregion: Tools for RAG info
 
@@ -70,6 +70,21 @@ class UIComponentBox:
     def add_story(self, story):
         self.stories.append(story)
 
+def get_story_by_id(story_id):
+    """
+    Look up a story by id in the pipeline_parts id index.
+    Returns the story metadata with its description, or None if the id is not a story.
+    """
+    hit = vectorstores_utils.manager.get_by_id("pipeline_parts", story_id)
+    if not hit:
+        return None
+    description, metadata = hit
+    if metadata.get("type") != "story":
+        return None
+    story = metadata.copy()
+    story["description"] = description
+    return story
+
 def find_box_and_container(box_name, containers):
     """
     Helper function to find a box and its container by box name.
@@ -86,17 +101,7 @@ def add_story_to_box(story_id, box_name, box_description, container_name, contai
     Add a story to a specific box within the specified container.
     If the box does not exist, it will be created.
     """
-    vectorstore = vectorstores_utils.manager.get_store("pipeline_parts")
-    results = vectorstore.get(where={"id": story_id})
-
-    story = None
-    if results and results.get("documents") and results.get("metadatas"):
-        # Find the first result with type == "story"
-        for idx, metadata in enumerate(results["metadatas"]):
-            if metadata.get("type") == "story":
-                story = metadata.copy()
-                story["description"] = results["documents"][idx]
-                break
+    story = get_story_by_id(story_id)
     if not story:
         return {"status": "error", "message": f"Story with id '{story_id}' and type 'story' not found in vector DB."}
 
@@ -156,19 +161,8 @@ def move_story_between_boxes(story_id, from_box_name, to_box_name, containers):
     """
     Move a story from one box to another, searching across all containers.
     """
-    # Retrieve story from vectorstore by story_id
-    vectorstore = vectorstores_utils.manager.get_store("pipeline_parts")
-    results = vectorstore.get(where={"id": story_id})
-
-    # Chroma returns a dict with "documents" and "metadatas" as lists
-    story = None
-    if results and results.get("documents") and results.get("metadatas"):
-        # Find the first result with type == "story"
-        for idx, metadata in enumerate(results["metadatas"]):
-            if metadata.get("type") == "story":
-                story = metadata.copy()
-                story["description"] = results["documents"][idx]
-                break
+    # Retrieve story from the vectorstore's id index by story_id
+    story = get_story_by_id(story_id)
     if not story:
         return {"status": "error", "message": f"Story with id '{story_id}' and type 'story' not found in vector DB."}
 
@@ -27,6 +27,8 @@ import os
 import pickle
 from workflow_files.ui_component_creation import box_user_stories_with_llm
 import utils.vectorstores_utils as vectorstores_utils
+from utils.answer_providers import set_answer_provider, AnswersFileProvider, LLMAnswerProvider, InteractiveAnswerProvider
+from workflow_files.pipeline_stages import run_story_stages
 from depricated_results.screen_creation import assign_boxes_to_screens_with_llm
 from workflow_files.story_creation import *
 from workflow_files.stories_to_flow import generate_user_flows
@@ -163,17 +165,44 @@ def run_swiss_elo_evaluation(llm_list, grader_llm, tools, test_inputs, prompt_va
     return all_ratings_per_prompt
 
 
+def snapshot_vectorstores(stage: str):
+    """
+    Dumps the configured stores after a stage so a crashed or repeated run can restore them
+    with --restore-snapshot instead of re-embedding everything. Stores written to during the
+    stage are persisted first.
+    """
+    vectorstores_utils.manager.persist_all()
+    counts = vectorstores_utils.manager.snapshot(vectorstores_utils.config.snapshot_path, names=vectorstores_utils.config.snapshot_stores)
+    print(f"Vectorstore snapshot after {stage} stage: {counts}")
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--add-new", action="store_true")
+    parser.add_argument("--persist-pipeline", action="store_true")  # Keep pipeline_parts on disk and sync only changes
     parser.add_argument("--llm", choices=["anthropic", "openai", "gemini"], default="gemini")
     parser.add_argument("--test", action="store_true")  # New argument for test mode
+    parser.add_argument("--restore-snapshot", action="store_true")  # Reload pipeline stores from the last stage snapshot
+    parser.add_argument("--parallel-epics", action="store_true")  # Ask all epic questions up front, then generate epics concurrently
+    parser.add_argument("--llm-workers", type=int, default=4)  # Concurrent LLM calls for parallel stages
+    parser.add_argument("--answers-file", default=None)  # JSON of recorded answers to the agents' clarifying questions
+    parser.add_argument("--auto-answer", action="store_true")  # Let the LLM answer clarifying questions (headless runs)
+    parser.add_argument("--refine-themes", action="store_true")  # After the first round, only rewrite themes the answers affect
+    parser.add_argument("--dedup-stories", choices=["flag", "merge"], default=None)  # Near-duplicate frontend stories before flow generation
+    parser.add_argument("--story-similarity", type=float, default=0.92)  # Cosine similarity at which two stories count as duplicates
+    parser.add_argument("--resume", action="store_true")  # Continue theme/epic generation from the last checkpoint after a crash or Ctrl-C
     args = parser.parse_args()
 
     # Initialize vectorstores with correct args
     print("Initializing vectorstores...")
     vectorstores_utils.init_vectorstores(args)
     print("Vectorstores initialized.")
+    if args.restore_snapshot:
+        if os.path.exists(vectorstores_utils.config.snapshot_path):
+            counts = vectorstores_utils.manager.restore(vectorstores_utils.config.snapshot_path, names=vectorstores_utils.config.snapshot_stores)
+            print(f"Restored vectorstores from {vectorstores_utils.config.snapshot_path}: {counts}")
+        else:
+            print(f"No snapshot at {vectorstores_utils.config.snapshot_path}; starting from empty pipeline stores.")
 
     if args.llm == "anthropic":
         llm = ChatAnthropic(model="claude-3-5-sonnet-20241022", temperature=0)
@@ -213,6 +242,13 @@ def main():
 
     google_grader = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0)
     app_query = "build me a weather app. like the one used on a phone"
+
+    # Clarifying questions: recorded answers first, then the LLM (--auto-answer) or the console
+    fallback = LLMAnswerProvider(llm, app_query) if args.auto_answer else None
+    if args.answers_file:
+        set_answer_provider(AnswersFileProvider(args.answers_file, fallback=fallback or InteractiveAnswerProvider()))
+    elif fallback:
+        set_answer_provider(fallback)
     if args.test:
         print("running test")
         # You should have run_tests defined as shown in previous messages
@@ -223,130 +259,16 @@ def main():
 
     print("skipped testing")
 
-#region: Story Generation
-    #Theme generation
-    if not os.path.exists(theme_file):
-        print(f"{theme_file} does not exist. Creating new themes...")
-        interactive_theme_generation(llm, app_query, theme_file, manager)
-    else:
-        print(f"{theme_file} exists. Skipping theme generation.")
-    
-    with open("themes_gemini_flash.json", "r", encoding="utf-8") as f:
-        themes = json.load(f)
-    
-    theme_docs = [
-        Document(
-            page_content=theme["description"],
-            metadata={
-                "name": theme["name"],
-                "id": theme["id"],
-                "type": "theme"
-            }
-        )
-        for theme in themes
-    ]
-    print(f"Loaded {len(theme_docs)} themes from {theme_file}")
-    pipeline_retriever.vectorstore.add_documents(theme_docs)
-    print("Themes added to pipeline retriever.")
-
-    #Epic generation
-    #Only create new epics if epics_file does not exist
-    if not os.path.exists(epics_file):
-        print(f"{epics_file} does not exist. Creating new epics...")
-        interactive_epic_generation(llm, themes, epics_file, manager)
-    else:
-        print(f"{epics_file} exists. Skipping epic generation.")
-
-    with open(epics_file, "r", encoding="utf-8") as f:
-        epics = json.load(f)
-
-    epic_docs = [
-        Document(
-            page_content=epic["description"],
-            metadata={
-                "name": epic["name"],
-                "id": epic["id"],
-                "theme_id": epic["theme_id"],
-                "type": "epic"
-            }
-        )
-        for epic in epics
-    ]
-    print(f"Loaded {len(epic_docs)} epics from {epics_file}")
-    pipeline_retriever.vectorstore.add_documents(epic_docs)
-    print("Epics added to pipeline retriever.")
-
-    # User story generation
-    if not os.path.exists(user_stories_file):
-        print(f"{user_stories_file} does not exist. Creating new user stories...")
-        generate_user_stories(llm, epics, user_stories_file)
-    else:
-        print(f"{user_stories_file} exists. Skipping user story generation.")
-
-    with open(user_stories_file, "r", encoding="utf-8") as f:
-        user_stories = json.load(f)
-
-    story_docs = [
-        Document(
-            page_content=story["description"],
-            metadata={
-                "name": story["name"],
-                "id": story["id"],
-                "epic_id": story["epic_id"],
-                "theme_id": story["theme_id"],
-                "type": "story",
-                "category": story["category"]  # Default to 'general' if not specified
-            }
-        )
-        for story in user_stories
-    ]
-    print(f"Loaded {len(story_docs)} user stories from {user_stories_file}")
-    pipeline_retriever.vectorstore.add_documents(story_docs)
-    print("User stories added to pipeline retriever.")
-#endregion
-    
-#region: Flow Generation
-    # Generate user flows from user stories
-    if os.path.exists(user_stories_file):
-        with open(user_stories_file, "r", encoding="utf-8") as f:
-            all_user_stories = json.load(f)
-        # Filter for frontend user stories (category/type may be "frontend" or similar)
-        frontend_user_stories = [
-            story for story in all_user_stories
-            if story.get("category", story.get("category", "")).lower() == "frontend"
-        ]
-        print(f"Found {len(frontend_user_stories)} frontend user stories.")
-    else:
-        print(f"{user_stories_file} does not exist. No user stories to generate flows.")
-        frontend_user_stories = []
-
-    flows_file = "user_flows.json"
-    if frontend_user_stories:
-        if not os.path.exists(flows_file):
-            # Generate flows and save to file
-            generate_user_flows(llm, frontend_user_stories, flows_file)
-        else:
-            print(f"{flows_file} exists. Skipping flow generation.")
-
-        # Add flows to vector DB
-        with open(flows_file, "r", encoding="utf-8") as f:
-            flows = json.load(f)
-
-        flow_docs = [
-            Document(
-                page_content=flow["description"] + "\n\nSteps:\n" + json.dumps(flow.get("steps", []), indent=2),
-                metadata={
-                    "name": flow["name"],
-                    "id": flow["flow_id"],
-                    "type": "flow"
-                }
-            )
-            for flow in flows
-        ]
-        pipeline_retriever.vectorstore.add_documents(flow_docs)
-        print("Flows added to pipeline retriever.")
-    else:
-        print("No frontend user stories found.")
+#region: Story and Flow Generation
+    stage_files = {
+        "themes": theme_file,
+        "epics": epics_file,
+        "user_stories": user_stories_file,
+        "flows": "user_flows.json",
+        "story_dedup_report": "story_dedup_report.json",
+        "checkpoints": "pipeline_checkpoints.jsonl"
+    }
+    flows = run_story_stages(llm, app_query, stage_files, args, on_stage_synced=snapshot_vectorstores)["flows"]
 #endregion
 
 #region: Screen Generation (agentic)
@@ -375,6 +297,8 @@ def main():
         with open(os.path.join(screen_data_folder, "component_instances.pkl"), "wb") as f:
             pickle.dump(component_instances, f)
         print("Pickled screens, component types, and component instances to .pkl files.")
+        # The screen agents write screens, components and boxes into the pipeline store.
+        vectorstores_utils.manager.persist_all()
 
 #endregion
 
@@ -439,6 +363,9 @@ def main():
          screen_code_output_folder="react-ui/src/pages"
     )
 
+    vectorstores_utils.manager.persist_all()
+    print(f"Retrieval cache stats: {vectorstores_utils.manager.retrieval_cache_stats()}")
+
 
 
 if __name__ == "__main__":
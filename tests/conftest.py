@@ -0,0 +1,41 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# The repo's utils/, llm_tools/ and workflow_files/ are imported from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class NoEmbeddings(Embeddings):
+    """For stores that are only given precomputed vectors."""
+
+    def embed_query(self, text):
+        raise AssertionError("tests pass precomputed embeddings")
+
+    def embed_documents(self, texts):
+        raise AssertionError("tests pass precomputed embeddings")
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic 16-dim vectors seeded from a hash of the text."""
+
+    def embed_query(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "little")
+        return np.random.default_rng(seed).standard_normal(16).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture
+def no_embeddings():
+    return NoEmbeddings()
+
+
+@pytest.fixture
+def hash_embeddings():
+    return HashEmbeddings()
@@ -0,0 +1,29 @@
+import json
+import logging
+
+from utils.answer_providers import AnswersFileProvider, LLMAnswerProvider, DEFAULT_AUTO_ANSWER
+
+
+def write_answers(tmp_path, answers):
+    path = tmp_path / "answers.json"
+    path.write_text(json.dumps(answers), encoding="utf-8")
+    return str(path)
+
+
+def test_theme_labels_are_ignored_when_matching(tmp_path):
+    provider = AnswersFileProvider(write_answers(tmp_path, {"Which platforms should the app support?": "iOS and Android"}))
+    assert provider.answer("[User Accounts] Which platforms should the app support?") == "iOS and Android"
+    assert provider.answer("[Payments]   which platforms should the app support") == "iOS and Android"
+
+    labeled_recording = AnswersFileProvider(write_answers(tmp_path, [{"question": "[Old theme] Do users need offline mode?", "answer": "No"}]))
+    assert labeled_recording.answer("Do users need offline mode?") == "No"
+    assert labeled_recording.unmatched == []
+
+
+def test_fallback_is_used_with_a_warning(tmp_path, caplog):
+    provider = AnswersFileProvider(write_answers(tmp_path, {"Do users need offline mode?": "No"}), fallback=LLMAnswerProvider())
+    with caplog.at_level(logging.WARNING, logger="my_app_logger"):
+        answer = provider.answer("[Reports] What currency should prices use?")
+    assert answer == DEFAULT_AUTO_ANSWER
+    assert provider.unmatched == ["[Reports] What currency should prices use?"]
+    assert "falling back to LLMAnswerProvider" in caplog.text
@@ -0,0 +1,54 @@
+import json
+
+from utils.checkpoints import CheckpointStore
+
+
+def test_records_survive_reload(tmp_path):
+    path = str(tmp_path / "checkpoints.jsonl")
+    store = CheckpointStore(path)
+    store.put("themes", "1", {"themes": ["a"]})
+    store.put("themes", "1", {"themes": ["a", "b"]})
+    store.put("epics", "t1", [{"id": "e1"}])
+
+    reloaded = CheckpointStore(path)
+    assert reloaded.items("themes") == {"1": {"themes": ["a", "b"]}}
+    assert reloaded.get("epics", "t1") == [{"id": "e1"}]
+    assert reloaded.started("epics") and not reloaded.started("stories")
+
+
+def test_cut_off_last_line_is_skipped_and_next_put_starts_a_new_line(tmp_path):
+    path = tmp_path / "checkpoints.jsonl"
+    CheckpointStore(str(path)).put("stories", "e1", ["s1"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"stage": "stories", "ke')
+
+    store = CheckpointStore(str(path))
+    assert store.items("stories") == {"e1": ["s1"]}
+    store.put("stories", "e2", ["s2"])
+
+    assert CheckpointStore(str(path)).items("stories") == {"e1": ["s1"], "e2": ["s2"]}
+
+
+def test_complete_and_clear(tmp_path):
+    path = str(tmp_path / "checkpoints.jsonl")
+    store = CheckpointStore(path)
+    store.put("themes", "1", {})
+    store.put("epics", "t1", [])
+    store.complete("themes")
+    assert store.is_complete("themes") and store.items("themes") == {"1": {}}
+
+    store.clear("epics")
+    reloaded = CheckpointStore(path)
+    assert reloaded.is_complete("themes")
+    assert not reloaded.started("epics")
+    with open(path, encoding="utf-8") as f:
+        assert all(json.loads(line)["stage"] == "themes" for line in f)
+
+
+def test_touch_creates_an_empty_log(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    store = CheckpointStore(str(path))
+    store.touch()
+    assert path.exists() and not store.started("stories")
+    store.delete()
+    assert not path.exists()
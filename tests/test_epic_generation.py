@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain.memory")
+import workflow_files.story_creation as story_creation
+from utils.checkpoints import CheckpointStore
+
+THEMES = [
+    {"id": "t1", "name": "Forecast", "description": "..."},
+    {"id": "t2", "name": "Alerts", "description": "..."},
+    {"id": "t3", "name": "Settings", "description": "..."}
+]
+QUESTIONS = {"t1": [], "t2": ["Which alert types?", "Push or email?"], "t3": ["Metric or imperial?"]}
+
+
+@pytest.fixture
+def generation_started():
+    return threading.Event()
+
+
+@pytest.fixture
+def fake_llm_calls(monkeypatch, generation_started):
+    events, lock, started = [], threading.Lock(), generation_started
+
+    def record(*event):
+        with lock:
+            events.append(event)
+
+    def collect(llm, theme, themes):
+        record("questions", theme["id"])
+        return QUESTIONS[theme["id"]]
+
+    def ask(questions_json):
+        questions = json.loads(questions_json)
+        started.wait(timeout=5)  # only set once a theme without questions is already generating
+        record("ask", tuple(questions))
+        return json.dumps({question: f"answer to {question}" for question in questions})
+
+    def generate(llm, theme, clarifications):
+        record("generate", theme["id"], tuple(sorted(clarifications.items())))
+        if not clarifications:
+            started.set()
+        time.sleep({"t1": 0.3, "t2": 0.0, "t3": 0.1}[theme["id"]])  # finish out of theme order
+        return [{"id": f"{theme['id']}-e1", "name": "Epic", "description": "...", "theme_id": theme["id"]}]
+
+    monkeypatch.setattr(story_creation, "collect_epic_questions", collect)
+    monkeypatch.setattr(story_creation, "ask_user_tool", ask)
+    monkeypatch.setattr(story_creation, "generate_epics_for_theme", generate)
+    return events
+
+
+def test_questions_are_asked_in_one_batch_and_epics_keep_theme_order(tmp_path, fake_llm_calls):
+    epic_file = str(tmp_path / "epics.json")
+    story_creation.parallel_epic_generation(None, THEMES, epic_file, None, max_workers=3)
+
+    asks = [event for event in fake_llm_calls if event[0] == "ask"]
+    assert asks == [("ask", ("[Alerts] Which alert types?", "[Alerts] Push or email?", "[Settings] Metric or imperial?"))]
+    # The theme without questions starts before the user is asked.
+    assert fake_llm_calls.index(("generate", "t1", ())) < fake_llm_calls.index(asks[0])
+    assert ("generate", "t3", (("Metric or imperial?", "answer to [Settings] Metric or imperial?"),)) in fake_llm_calls
+    with open(epic_file, encoding="utf-8") as f:
+        assert [epic["theme_id"] for epic in json.load(f)] == ["t1", "t2", "t3"]
+
+
+def test_resume_reuses_checkpointed_questions_answers_and_epics(tmp_path, fake_llm_calls, generation_started):
+    generation_started.set()  # every theme left has questions
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.jsonl"))
+    checkpoints.put("epic_questions", "t2", QUESTIONS["t2"])
+    checkpoints.put("epic_answers", "t2", {"Which alert types?": "rain", "Push or email?": "push"})
+    checkpoints.put("epics", "t1", [{"id": "saved", "name": "Epic", "description": "...", "theme_id": "t1"}])
+
+    epic_file = str(tmp_path / "epics.json")
+    story_creation.parallel_epic_generation(None, THEMES, epic_file, None, checkpoints=checkpoints, resume=True)
+
+    assert [event for event in fake_llm_calls if event[0] == "questions"] == [("questions", "t3")]
+    assert [event[1] for event in fake_llm_calls if event[0] == "ask"] == [("[Settings] Metric or imperial?",)]
+    assert ("generate", "t2", (("Push or email?", "push"), ("Which alert types?", "rain"))) in fake_llm_calls
+    with open(epic_file, encoding="utf-8") as f:
+        assert [epic["id"] for epic in json.load(f)] == ["saved", "t2-e1", "t3-e1"]
+    assert checkpoints.is_complete("epics")
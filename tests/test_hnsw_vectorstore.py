@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("hnswlib")
+from utils.hnsw_vectorstore import HNSWVectorStore
+
+
+def test_repeated_id_in_one_batch_keeps_only_the_last_copy(no_embeddings):
+    vectors = np.eye(4, dtype=np.float32)
+    store = HNSWVectorStore(no_embeddings)
+    store.add_embeddings(["a", "b", "a"], vectors[:3], ["old a", "b", "new a"], [{"v": 1}, {}, {"v": 2}])
+
+    assert len(store.get()["ids"]) == 2
+    assert store.get(ids=["a"])["documents"] == ["new a"]
+    hits = store.similarity_search_by_vector(vectors[0].tolist(), k=2)
+    assert "old a" not in [doc.page_content for doc in hits]
+    assert store.similarity_search_by_vector(vectors[2].tolist(), k=1)[0].page_content == "new a"
+
+
+def test_upsert_replaces_the_previous_vector(no_embeddings):
+    vectors = np.eye(4, dtype=np.float32)
+    store = HNSWVectorStore(no_embeddings)
+    store.add_embeddings(["a", "b"], vectors[:2], ["a1", "b"], [{}, {}])
+    store.add_embeddings(["a"], vectors[3:4], ["a2"], [{}])
+
+    assert sorted(store.get()["ids"]) == ["a", "b"]
+    assert store.similarity_search_by_vector(vectors[0].tolist(), k=3)[0].page_content != "a1"
@@ -0,0 +1,48 @@
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.hybrid_retrieval import BM25Index, HybridRetriever, reciprocal_rank_fusion, tokenize
+
+
+class FixedRetriever(BaseRetriever):
+    docs: List[Document] = []
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.docs
+
+
+def make_index():
+    index = BM25Index()
+    index.add(
+        ["s1", "e1", "b1"],
+        ["Login screen with WeatherDisplayCard", "Login epic", "Weather box"],
+        [{"id": "s1", "type": "story"}, {"id": "e1", "type": "epic"}, {"id": "b1", "type": "box"}]
+    )
+    return index
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("WeatherDisplayCard icon_button") == ["weatherdisplaycard", "weather", "display", "card", "icon", "button"]
+
+
+def test_hybrid_retriever_applies_the_filter_to_keyword_hits():
+    retriever = HybridRetriever(dense=FixedRetriever(), index=make_index(), k=4, filter={"type": "epic"})
+    docs = retriever.invoke("login")
+    assert [doc.metadata["id"] for doc in docs] == ["e1"]
+
+    unfiltered = HybridRetriever(dense=FixedRetriever(), index=make_index(), k=4)
+    assert {doc.metadata["id"] for doc in unfiltered.invoke("login")} == {"s1", "e1"}
+
+
+def test_deleted_documents_leave_the_index():
+    index = make_index()
+    index.delete(["s1"])
+    assert [doc.metadata["id"] for doc, _ in index.search("login")] == ["e1"]
+
+
+def test_reciprocal_rank_fusion_prefers_documents_in_both_rankings():
+    a, b, c = (Document(page_content=text, metadata={"id": text}) for text in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [c, b]])
+    assert fused[0].metadata["id"] == "b"
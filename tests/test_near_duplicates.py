@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+
+from utils.document_registry import DocumentRegistry, ingest_sources
+from utils.near_duplicates import NearDuplicateFilter
+
+BOILERPLATE = "Sign in to your account to manage buttons, cards, dialogs and navigation bars across every screen of the app"
+
+
+class RecordingStore:
+    def __init__(self):
+        self.docs = {}
+
+    def add_documents(self, docs, ids):
+        self.docs.update(zip(ids, docs))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def get(self, where=None):
+        return {"ids": [doc_id for doc_id, doc in self.docs.items() if doc.metadata.get("source") == where["source"]]}
+
+
+class OneChunkPerDocument:
+    def split_documents(self, docs):
+        return [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in docs]
+
+
+def test_filter_drops_near_duplicates_and_keeps_distinct_text():
+    dedup = NearDuplicateFilter(threshold=0.8)
+    assert not dedup.is_duplicate(BOILERPLATE)
+    assert dedup.is_duplicate(BOILERPLATE + ".")
+    assert not dedup.is_duplicate("A weather card shows the temperature, wind speed and a five day forecast for the city")
+    assert (dedup.checked, dedup.removed) == (3, 1)
+
+    dedup.reset()
+    assert not dedup.is_duplicate(BOILERPLATE)
+
+
+def test_ingestion_dedups_within_a_source_only(tmp_path):
+    store = RecordingStore()
+    registry = DocumentRegistry(str(tmp_path / "registry.json"))
+    pages = {
+        "https://a": [Document(page_content=BOILERPLATE), Document(page_content=BOILERPLATE), Document(page_content="Page A body text")],
+        "https://b": [Document(page_content=BOILERPLATE), Document(page_content="Page B body text")]
+    }
+    sources = [(url, f"v1-{url}", lambda docs=docs: docs) for url, docs in pages.items()]
+    stats = ingest_sources(store, registry, sources, OneChunkPerDocument(), NearDuplicateFilter(threshold=0.8))
+
+    assert stats["duplicates_removed"] == 1
+    assert len(registry.chunk_ids("https://a")) == 2
+    assert len(registry.chunk_ids("https://b")) == 2
+
+    # Changing the first source must not take the shared text away from the second.
+    changed = [("https://a", "v2", lambda: [Document(page_content="Page A rewritten")])]
+    ingest_sources(store, registry, changed, OneChunkPerDocument(), NearDuplicateFilter(threshold=0.8))
+    assert BOILERPLATE in [store.docs[doc_id].page_content for doc_id in registry.chunk_ids("https://b")]
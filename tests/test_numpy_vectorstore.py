@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from utils.numpy_vectorstore import NumpyVectorStore, CODES_FILE, VECTORS_FILE
+
+
+def corpus(n=300, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(n)]
+    metadatas = [{"id": doc_id, "type": "story" if i % 2 else "epic"} for i, doc_id in enumerate(ids)]
+    return ids, vectors, metadatas
+
+
+def top_ids(store, query, k=5, **kwargs):
+    return [doc.metadata["id"] for doc in store.similarity_search_by_vector(query.tolist(), k=k, **kwargs)]
+
+
+def test_int8_keeps_no_float32_matrix_in_memory_and_matches_exact_search(no_embeddings):
+    ids, vectors, metadatas = corpus()
+    exact = NumpyVectorStore(no_embeddings, initial_capacity=8)
+    exact.add_embeddings(ids, vectors, ids, metadatas)
+    quantized = NumpyVectorStore(no_embeddings, initial_capacity=8, quantization="int8", rerank_factor=4)
+    quantized.add_embeddings(ids, vectors, ids, metadatas)
+
+    assert quantized._vectors is None
+    assert isinstance(quantized._full, np.memmap)
+    for query in vectors[:10]:
+        assert top_ids(quantized, query) == top_ids(exact, query)
+        assert top_ids(quantized, query, filter={"type": "epic"}) == top_ids(exact, query, filter={"type": "epic"})
+
+
+def test_int8_persist_reopen_update_and_grow(tmp_path, no_embeddings):
+    ids, vectors, metadatas = corpus()
+    directory = str(tmp_path / "store")
+    store = NumpyVectorStore(no_embeddings, quantization="int8", persist_directory=directory)
+    store.add_embeddings(ids[:200], vectors[:200], ids[:200], metadatas[:200])
+    store.persist()
+
+    reopened = NumpyVectorStore(no_embeddings, quantization="int8", persist_directory=directory)
+    assert reopened._vectors is None and len(reopened) == 200
+    reopened.delete(["doc-0"])
+    reopened.add_embeddings(ids[200:], vectors[200:], ids[200:], metadatas[200:])
+    assert len(reopened) == 299
+    assert top_ids(reopened, vectors[250], k=1) == ["doc-250"]
+    assert "doc-0" not in top_ids(reopened, vectors[0], k=3)
+    embeddings = reopened.get(ids=["doc-7"], include=["embeddings"])["embeddings"]
+    np.testing.assert_allclose(embeddings[0], vectors[7] / np.linalg.norm(vectors[7]), atol=1e-6)
+
+
+def test_int8_without_rerank_stores_only_codes(tmp_path, no_embeddings):
+    ids, vectors, metadatas = corpus()
+    directory = str(tmp_path / "store")
+    store = NumpyVectorStore(no_embeddings, quantization="int8", rerank_factor=0, persist_directory=directory)
+    store.add_embeddings(ids, vectors, ids, metadatas)
+    store.persist()
+
+    assert store._full is None
+    assert os.path.isfile(os.path.join(directory, CODES_FILE))
+    assert not os.path.isfile(os.path.join(directory, VECTORS_FILE))
+    reopened = NumpyVectorStore(no_embeddings, quantization="int8", rerank_factor=0, persist_directory=directory)
+    assert top_ids(reopened, vectors[3], k=1) == ["doc-3"]
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+import utils.parallel_ingestion as parallel_ingestion
+from utils.parallel_ingestion import iter_parsed_files, make_splitter
+
+CHARACTER_SPLIT = (200, 20, "characters", None)
+
+
+def parse_text_file(path, split_args):
+    # Stands in for parse_and_split_file (the PDF/Markdown loaders are not needed here).
+    if path.endswith("broken.md"):
+        raise ValueError(f"cannot parse {path}")
+    if path.endswith("slow.md"):
+        time.sleep(1.0)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return make_splitter(*split_args).create_documents([text], metadatas=[{"source": path}])
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_ingestion, "parse_and_split_file", parse_text_file)
+    paths = []
+    for name in ("slow.md", "a.md", "broken.md", "b.md", "c.md"):
+        path = tmp_path / name
+        path.write_text(f"{name} " * 100, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_process_pool_yields_files_as_they_finish(files):
+    results = list(iter_parsed_files(files, CHARACTER_SPLIT, max_workers=2, max_in_flight=2))
+    assert sorted(path for path, _, _ in results) == sorted(files)
+    # The slow first file does not hold back the ones submitted after it.
+    assert results[-1][0].endswith("slow.md")
+    for path, chunks, error in results:
+        if path.endswith("broken.md"):
+            assert chunks is None and isinstance(error, ValueError) and "broken.md" in str(error)
+        else:
+            assert error is None and chunks and all(chunk.metadata["source"] == path for chunk in chunks)
+
+
+def test_inline_parsing_keeps_input_order_and_reports_errors(files):
+    results = list(iter_parsed_files(files, CHARACTER_SPLIT, max_workers=1))
+    assert [path for path, _, _ in results] == files
+    assert [error is not None for _, _, error in results] == [False, False, True, False, False]
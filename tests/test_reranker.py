@@ -0,0 +1,82 @@
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.reranker import CrossEncoderReranker, RerankingRetriever
+
+
+class OverlapScorer:
+    """Stands in for the cross-encoder: scores a pair by the query words the text contains."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        return [len(set(query.lower().split()) & set(text.lower().split())) for query, text in pairs]
+
+
+class FixedRetriever(BaseRetriever):
+    docs: List[Document] = []
+    calls: List[str] = []
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.calls.append(query)
+        return self.docs
+
+
+def make_reranker():
+    reranker = CrossEncoderReranker("stub")
+    reranker._model = OverlapScorer()
+    return reranker
+
+
+DOCS = [
+    Document(page_content="settings page", metadata={"id": "a"}),
+    Document(page_content="hourly weather forecast chart", metadata={"id": "b"}),
+    Document(page_content="weather icon", metadata={"id": "c"}),
+    Document(page_content="daily forecast", metadata={"id": "d"})
+]
+
+
+def test_rerank_orders_by_score_and_cuts_to_k():
+    reranker = make_reranker()
+    ranked = reranker.rerank("hourly weather forecast", DOCS, k=2)
+    assert [doc.metadata["id"] for doc in ranked] == ["b", "c"]
+    assert [doc.metadata["id"] for doc in reranker.rerank("hourly weather forecast", DOCS)] == ["b", "c", "d", "a"]
+
+
+def test_repeated_query_is_served_from_the_score_cache():
+    reranker = make_reranker()
+    reranker.rerank("weather", DOCS, k=1)
+    reranker.rerank("weather", DOCS, k=1)
+    assert reranker._model.batches == [4]
+    assert reranker.stats()["hits"] == 4
+
+
+def test_reranking_retriever_returns_the_k_best_candidates():
+    retriever = RerankingRetriever(retriever=FixedRetriever(docs=DOCS, calls=[]), reranker=make_reranker(), k=1)
+    assert [doc.metadata["id"] for doc in retriever.invoke("daily forecast")] == ["d"]
+
+
+def test_manager_fetches_rerank_candidates_then_returns_k(monkeypatch, hash_embeddings):
+    for module in ("langchain.embeddings", "langchain_huggingface", "langchain_chroma"):
+        pytest.importorskip(module)
+    import utils.vectorstores_utils as vectorstores_utils
+    from utils.numpy_vectorstore import NumpyVectorStore
+
+    monkeypatch.setattr(vectorstores_utils.config, "rerank_candidates", 3)
+    manager = vectorstores_utils.VectorStoreManager()
+    manager.reranker = make_reranker()
+    manager.add_store("pipeline_parts", NumpyVectorStore(hash_embeddings))
+    manager.add_documents("pipeline_parts", DOCS)
+
+    retriever = manager.get_retriever("pipeline_parts", cache=False, rerank=True, search_kwargs={"k": 2})
+    assert retriever.retriever.search_kwargs["k"] == 3
+    assert len(retriever.invoke("weather forecast")) == 2
+    assert manager.reranker._model.batches == [3]
+
+    hits = manager.similarity_search("pipeline_parts", "weather forecast", k=1, rerank=True)
+    assert len(hits) == 1
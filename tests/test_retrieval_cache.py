@@ -0,0 +1,52 @@
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.retrieval_cache import CachedRetriever, RetrievalCache
+
+
+class CountingRetriever(BaseRetriever):
+    calls: List[str] = []
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.calls.append(query)
+        return [Document(page_content=f"hit for {query}", metadata={"id": query})]
+
+
+def test_hits_return_copies_and_writes_make_entries_stale():
+    cache = RetrievalCache(max_entries=4)
+    key = RetrievalCache.make_key("pipeline_parts", "login", {"k": 4})
+    cache.put(key, 0, [Document(page_content="a", metadata={"id": "a"})])
+
+    docs = cache.get(key, 0)
+    docs[0].metadata["id"] = "changed"
+    assert cache.get(key, 0)[0].metadata["id"] == "a"
+    assert cache.get(key, 1) is None
+    assert cache.get(key, 0) is None
+    assert cache.stats()["stale"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2)
+    keys = [RetrievalCache.make_key("s", query, {}) for query in ("a", "b", "c")]
+    cache.put(keys[0], 0, [])
+    cache.put(keys[1], 0, [])
+    cache.get(keys[0], 0)
+    cache.put(keys[2], 0, [])
+    assert cache.get(keys[1], 0) is None
+    assert cache.get(keys[0], 0) == [] and cache.get(keys[2], 0) == []
+
+
+def test_cached_retriever_calls_the_store_once_per_version():
+    version = [0]
+    inner = CountingRetriever(calls=[])
+    retriever = CachedRetriever(
+        retriever=inner, cache=RetrievalCache(), store_name="pipeline_parts", version=lambda: version[0], search_params={"k": 4}
+    )
+    retriever.invoke("login")
+    retriever.invoke("login")
+    assert inner.calls == ["login"]
+    version[0] += 1
+    retriever.invoke("login")
+    assert inner.calls == ["login", "login"]
@@ -0,0 +1,88 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+from langchain_core.documents import Document
+
+from utils.store_server import RemoteVectorStoreManager, StoreService, make_handler
+
+
+class FakeManager:
+    """
+    The parts of VectorStoreManager the server forwards to, over plain dicts.
+    """
+
+    def __init__(self):
+        self.stores = {
+            "pipeline_parts": {
+                "vectorstore": object(), "backend": "numpy", "file_path": None, "embedding_model": "mini",
+                "manifest_path": None, "manifest": {"theme": {"t1": "hash"}}, "id_index": {}, "partition_key": "category",
+                "partition_factory": lambda value: None, "partitions": {"theme": object()}, "bm25": None, "version": 0
+            }
+        }
+        self.docs = {}
+        self.persisted = 0
+
+    def get_store(self, name):
+        entry = self.stores.get(name)
+        return entry["vectorstore"] if entry else None
+
+    def get_metadata(self, name):
+        return self.stores.get(name)
+
+    def invalidate(self, name):
+        self.stores[name]["version"] += 1
+
+    def add_documents(self, name, docs, ids=None):
+        ids = ids or [doc.metadata["id"] for doc in docs]
+        self.docs.update(zip(ids, docs))
+        self.invalidate(name)
+        return ids
+
+    def clear_untracked(self, name):
+        untracked = [doc_id for doc_id in self.docs if doc_id not in self.stores[name]["manifest"]["theme"]]
+        for doc_id in untracked:
+            del self.docs[doc_id]
+        return len(untracked)
+
+    def persist_all(self):
+        self.persisted += 1
+
+    def retrieval_cache_stats(self):
+        return {"hits": 0}
+
+
+@pytest.fixture
+def remote():
+    manager = FakeManager()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(StoreService(manager)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield manager, RemoteVectorStoreManager(f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+    server.server_close()
+
+
+def test_remote_manager_exposes_stores_metadata_and_invalidate(remote):
+    manager, client = remote
+    assert client.ping()
+    assert list(client.stores) == ["pipeline_parts"]
+    assert "pipeline_parts" in client.stores
+
+    metadata = client.get_metadata("pipeline_parts")
+    assert metadata["backend"] == "numpy" and metadata["partitions"] == ["theme"]
+    assert metadata["manifest"] == {"theme": {"t1": "hash"}}
+    assert "vectorstore" not in metadata
+    assert client.get_metadata("missing") is None
+
+    client.invalidate("pipeline_parts")
+    assert client.get_metadata("pipeline_parts")["version"] == manager.stores["pipeline_parts"]["version"] == 1
+
+
+def test_remote_writes_reach_the_server_manager(remote):
+    manager, client = remote
+    client.add_documents("pipeline_parts", [Document(page_content="Login screen", metadata={"id": "s1"})])
+    assert manager.docs["s1"].page_content == "Login screen"
+    assert client.clear_untracked("pipeline_parts") == 1
+    assert manager.docs == {}
+    client.persist_all()
+    assert manager.persisted == 1
@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from utils.numpy_vectorstore import NumpyVectorStore
+from utils.store_snapshot import write_snapshot, read_snapshot, export_store, add_embedded
+
+
+def test_snapshot_file_round_trip_reuses_the_vectors(tmp_path, no_embeddings):
+    vectors = np.random.default_rng(0).standard_normal((5, 8)).astype(np.float32)
+    ids = [f"d{i}" for i in range(5)]
+    store = NumpyVectorStore(no_embeddings)
+    store.add_embeddings(ids, vectors, [f"text {i}" for i in ids], [{"id": doc_id, "n": i} for i, doc_id in enumerate(ids)])
+
+    path = str(tmp_path / "snapshots" / "stores.npz")
+    write_snapshot(path, {"parts": dict(export_store(store), manifest={"theme": {"d0": "hash"}})})
+    data = read_snapshot(path)["parts"]
+    assert data["ids"] == ids
+    assert data["manifest"] == {"theme": {"d0": "hash"}}
+    # The numpy store keeps unit-length vectors.
+    np.testing.assert_allclose(data["vectors"], vectors / np.linalg.norm(vectors, axis=1, keepdims=True), rtol=1e-5)
+
+    copy = NumpyVectorStore(no_embeddings)
+    add_embedded(copy, data["ids"], data["vectors"], data["documents"], data["metadatas"])
+    query = vectors[3].tolist()
+    assert [doc.metadata["id"] for doc in copy.similarity_search_by_vector(query, k=3)] == \
+        [doc.metadata["id"] for doc in store.similarity_search_by_vector(query, k=3)]
+
+
+def test_restore_undoes_writes_made_after_the_snapshot(tmp_path, hash_embeddings):
+    for module in ("langchain.embeddings", "langchain_huggingface", "langchain_chroma"):
+        pytest.importorskip(module)
+    from utils.vectorstores_utils import VectorStoreManager
+
+    manager = VectorStoreManager()
+    manager.add_store(
+        "pipeline_parts", NumpyVectorStore(hash_embeddings), index_ids=True, partition_key="category",
+        partition_factory=lambda value: NumpyVectorStore(hash_embeddings), hybrid=True
+    )
+    docs = [
+        Document(page_content="Weather overview theme", metadata={"id": "t1", "category": "theme"}),
+        Document(page_content="Hourly forecast epic", metadata={"id": "e1", "category": "epic"}),
+        Document(page_content="See the hourly forecast story", metadata={"id": "u1", "category": "story"})
+    ]
+    manager.sync_documents("pipeline_parts", docs, "artifact")
+
+    def state():
+        entry = manager.stores["pipeline_parts"]
+        return {
+            "ids": sorted(entry["vectorstore"].get()["ids"]),
+            "partitions": {value: sorted(store.get()["ids"]) for value, store in entry["partitions"].items() if store.get()["ids"]},
+            "search": [doc.metadata["id"] for doc in manager.similarity_search("pipeline_parts", "hourly forecast", k=3)],
+            "epic_search": [doc.metadata["id"] for doc in manager.similarity_search("pipeline_parts", "forecast", k=2, filter={"category": "epic"})],
+            "manifest": json.loads(json.dumps(entry["manifest"]))
+        }
+
+    before = state()
+    path = str(tmp_path / "vectorstores.npz")
+    assert manager.snapshot(path) == {"pipeline_parts": 3}
+
+    manager.add_documents("pipeline_parts", [Document(page_content="Forecast screen", metadata={"id": "s1", "category": "screen"})])
+    manager.sync_documents("pipeline_parts", docs[:1], "artifact")
+    assert state() != before
+
+    assert manager.restore(path) == {"pipeline_parts": 3}
+    assert state() == before
+    assert manager.get_by_id("pipeline_parts", "s1") is None
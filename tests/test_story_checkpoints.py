@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("langchain.memory")
+import workflow_files.story_creation as story_creation
+
+
+EPICS = [
+    {"id": "e1", "name": "Accounts", "theme_id": "t1"},
+    {"id": "e2", "name": "Payments", "theme_id": "t1"},
+    {"id": "e3", "name": "Reports", "theme_id": "t1"}
+]
+
+
+def fake_stories(failing=(), calls=None):
+    def generate(llm, epic):
+        if calls is not None:
+            calls.append(epic["id"])
+        if epic["id"] in failing:
+            raise ValueError("LLM error")
+        return [{"id": f"{epic['id']}-s1", "name": "Story", "description": "...", "epic_id": epic["id"], "theme_id": "t1"}]
+    return generate
+
+
+def read_epic_ids(stories_file):
+    with open(stories_file, encoding="utf-8") as f:
+        return [story["epic_id"] for story in json.load(f)]
+
+
+def test_failed_epic_keeps_progress_and_resume_finishes(tmp_path, monkeypatch):
+    stories_file = str(tmp_path / "user_stories.json")
+    progress_file = story_creation.story_progress_path(stories_file)
+
+    calls = []
+    monkeypatch.setattr(story_creation, "generate_stories_for_epic", fake_stories(failing={"e2"}, calls=calls))
+    story_creation.generate_user_stories(None, EPICS, stories_file, max_workers=2, max_attempts=2)
+    assert calls.count("e2") == 2
+    assert os.path.exists(progress_file)
+    assert read_epic_ids(stories_file) == ["e1", "e3"]
+
+    calls = []
+    monkeypatch.setattr(story_creation, "generate_stories_for_epic", fake_stories(calls=calls))
+    story_creation.generate_user_stories(None, EPICS, stories_file, max_workers=2)
+    assert calls == ["e2"]
+    assert not os.path.exists(progress_file)
+    assert read_epic_ids(stories_file) == ["e1", "e2", "e3"]
+
+
+def test_unparseable_response_is_retried(tmp_path, monkeypatch):
+    stories_file = str(tmp_path / "user_stories.json")
+    responses = {"e1": [None, None]}
+    generate = fake_stories()
+    monkeypatch.setattr(
+        story_creation, "generate_stories_for_epic",
+        lambda llm, epic: responses.get(epic["id"], []).pop() if responses.get(epic["id"]) else generate(llm, epic)
+    )
+    story_creation.generate_user_stories(None, EPICS, stories_file, max_attempts=3)
+    assert read_epic_ids(stories_file) == ["e1", "e2", "e3"]
+    assert not os.path.exists(story_creation.story_progress_path(stories_file))
+
+
+def test_progress_marker_exists_when_every_epic_fails(tmp_path, monkeypatch):
+    stories_file = str(tmp_path / "user_stories.json")
+    monkeypatch.setattr(story_creation, "generate_stories_for_epic", fake_stories(failing={"e1", "e2", "e3"}))
+    story_creation.generate_user_stories(None, EPICS, stories_file, max_attempts=1)
+    assert os.path.exists(story_creation.story_progress_path(stories_file))
+    assert read_epic_ids(stories_file) == []
@@ -0,0 +1,53 @@
+import numpy as np
+
+from utils.story_dedup import cluster_duplicates, dedupe_stories, duplicate_pairs
+
+
+class TableEmbeddings:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text.split(":")[0]] for text in texts]
+
+
+def stories():
+    return [
+        {"id": "1", "name": "Login", "description": "Sign in with email"},
+        {"id": "2", "name": "Sign in", "description": "Log in with email"},
+        {"id": "3", "name": "Forecast", "description": "See the weekly weather"},
+        {"id": "4", "name": "Log in", "description": "Authenticate with email"}
+    ]
+
+
+EMBEDDINGS = TableEmbeddings({
+    "Login": [1.0, 0.0, 0.0],
+    "Sign in": [0.99, 0.05, 0.0],
+    "Forecast": [0.0, 1.0, 0.0],
+    "Log in": [0.98, 0.0, 0.1]
+})
+
+
+def test_blocked_pairs_match_brute_force(monkeypatch):
+    vectors = np.random.default_rng(0).standard_normal((50, 4)).astype(np.float32)
+    monkeypatch.setattr("utils.story_dedup.SIMILARITY_BLOCK", 7)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarities = unit @ unit.T
+    expected = {(i, j) for i in range(50) for j in range(i + 1, 50) if similarities[i, j] >= 0.5}
+    assert {tuple(pair) for pair in duplicate_pairs(vectors, 0.5).tolist()} == expected
+
+
+def test_clusters_are_transitive():
+    vectors = np.array([[1, 0], [0.9, 0.44], [0.6, 0.8], [-1, 0]], dtype=np.float32)
+    assert cluster_duplicates(vectors, 0.85) == [[0, 1, 2]]
+
+
+def test_merge_drops_duplicates_and_flag_keeps_them():
+    kept, report = dedupe_stories(stories(), EMBEDDINGS, threshold=0.95)
+    assert [story["id"] for story in kept] == ["1", "3"]
+    assert kept[0]["duplicate_story_ids"] == ["2", "4"]
+    assert report["duplicates"] == report["llm_calls_avoided"] == 2
+
+    flagged, report = dedupe_stories(stories(), EMBEDDINGS, threshold=0.95, merge=False)
+    assert len(flagged) == 4 and flagged[1]["duplicate_of"] == "1"
+    assert report["llm_calls_avoided"] == 0
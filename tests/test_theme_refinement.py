@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+pytest.importorskip("langchain.memory")
+import workflow_files.story_creation as story_creation
+from workflow_files.story_creation import apply_theme_changes, refine_affected_themes
+
+THEMES = [
+    {"id": "t1", "name": "Forecast", "description": "Daily and hourly forecast"},
+    {"id": "t2", "name": "Alerts", "description": "Severe weather alerts"},
+    {"id": "t3", "name": "Settings", "description": "Units and locations"}
+]
+
+
+def test_modify_add_and_remove_keep_ids_and_positions():
+    changes = {
+        "updated": [
+            {"id": "t2", "name": "Alerts", "description": "Severe weather and rain alerts"},
+            {"id": "t3", "name": "Settings", "description": "Units and locations"},  # no actual change
+            {"id": "t9", "name": "Ghost", "description": "Unknown theme"},
+            {"id": "t1", "name": "Forecast"}  # incomplete
+        ],
+        "added": [{"name": "Radar", "description": "Animated rain radar"}, {"name": "Incomplete"}],
+        "removed": ["t1", "t9"]
+    }
+    refined, stats = apply_theme_changes(THEMES, changes)
+
+    assert [theme["name"] for theme in refined] == ["Alerts", "Settings", "Radar"]
+    assert refined[0] == {"id": "t2", "name": "Alerts", "description": "Severe weather and rain alerts"}
+    assert refined[1] is THEMES[2]
+    assert refined[2]["id"] not in {"t1", "t2", "t3"}
+    assert stats == {"updated": 1, "added": 1, "removed": 1, "unchanged": 1}
+    assert THEMES[1]["description"] == "Severe weather alerts"  # the input is not modified
+
+
+def test_themes_the_response_does_not_mention_are_untouched():
+    refined, stats = apply_theme_changes(THEMES, {})
+    assert refined == THEMES
+    assert stats == {"updated": 0, "added": 0, "removed": 0, "unchanged": 3}
+
+
+def test_refinement_sends_only_the_analysis_and_applies_the_response(monkeypatch):
+    calls = []
+
+    def call_agent(llm, prompt, refinement_input, tools):
+        calls.append(json.loads(refinement_input))
+        return {"output": json.dumps({"removed": ["t3"]})}
+
+    monkeypatch.setattr(story_creation, "call_agent", call_agent)
+    refined, stats = refine_affected_themes(None, THEMES, "Users do not need settings.")
+    assert calls == [{"themes": THEMES, "analysis": "Users do not need settings."}]
+    assert [theme["id"] for theme in refined] == ["t1", "t2"]
+    assert stats["removed"] == 1
+
+    assert refine_affected_themes(None, THEMES, "") == (THEMES, {"updated": 0, "added": 0, "removed": 0, "unchanged": 3})
+    assert len(calls) == 1
+
+
+def test_unparseable_refinement_keeps_the_themes(monkeypatch):
+    monkeypatch.setattr(story_creation, "call_agent", lambda *args, **kwargs: {"output": "no json here"})
+    refined, stats = refine_affected_themes(None, THEMES, "Add radar.")
+    assert refined is THEMES
+    assert stats["unchanged"] == 3
@@ -0,0 +1,65 @@
+import sys
+import types
+
+import pytest
+
+from utils.parallel_ingestion import make_splitter, splitter_args, splitter_tag
+
+
+class WordTokenizer:
+    loads = 0
+
+    def tokenize(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def word_tokenizer(monkeypatch):
+    """A whitespace tokenizer in place of transformers.AutoTokenizer, so no model is downloaded."""
+    def from_pretrained(name):
+        WordTokenizer.loads += 1
+        return WordTokenizer()
+
+    transformers = types.ModuleType("transformers")
+    transformers.AutoTokenizer = types.SimpleNamespace(from_pretrained=from_pretrained)
+    # The splitter checks the tokenizer's type against this module.
+    tokenization_utils_base = types.ModuleType("transformers.tokenization_utils_base")
+    tokenization_utils_base.PreTrainedTokenizerBase = WordTokenizer
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    monkeypatch.setitem(sys.modules, "transformers.tokenization_utils_base", tokenization_utils_base)
+    WordTokenizer.loads = 0
+    make_splitter.cache_clear()
+    yield
+    make_splitter.cache_clear()
+
+
+def test_token_chunks_fit_the_budget_and_overlap(word_tokenizer):
+    words = [f"w{i}" for i in range(500)]
+    chunks = make_splitter(50, 10, "tokens", "stub-tokenizer").split_text(" ".join(words))
+    tokens = [chunk.split() for chunk in chunks]
+
+    assert all(len(chunk) <= 50 for chunk in tokens)
+    assert len(tokens[0]) >= 40  # packed up to the budget, not left short
+    assert tokens[0][0] == "w0"
+    for previous, current in zip(tokens, tokens[1:]):
+        start = words.index(current[0])
+        overlap = words.index(previous[-1]) + 1 - start
+        assert 0 < overlap <= 10
+    assert tokens[-1][-1] == "w499"
+
+    make_splitter(50, 10, "tokens", "stub-tokenizer")
+    assert WordTokenizer.loads == 1
+
+
+def test_splitter_settings_follow_the_config():
+    config = types.SimpleNamespace(
+        splitter_mode="tokens", chunk_tokens=380, chunk_overlap_tokens=64, embedding_tokenizer="tok",
+        chunk_size=500, chunk_overlap=100
+    )
+    assert splitter_args(config) == (380, 64, "tokens", "tok")
+    assert splitter_tag(config) == ":tokens:tok:380:64"
+    config.splitter_mode = "characters"
+    assert splitter_args(config) == (500, 100, "characters", None)
+    assert splitter_tag(config) == ""
+    with pytest.raises(ValueError):
+        make_splitter(10, 2, "sentences")
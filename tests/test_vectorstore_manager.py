@@ -0,0 +1,58 @@
+import pytest
+from langchain_core.documents import Document
+
+for module in ("langchain.embeddings", "langchain_huggingface", "langchain_chroma"):
+    pytest.importorskip(module)
+from utils.numpy_vectorstore import NumpyVectorStore
+from utils.vectorstores_utils import VectorStoreManager
+
+
+def open_pipeline_store(path, embedding):
+    manager = VectorStoreManager()
+    manager.add_store("pipeline_parts", NumpyVectorStore(embedding, persist_directory=path), file_path=path, index_ids=True)
+    return manager
+
+
+def test_sync_writes_only_the_delta(tmp_path, hash_embeddings):
+    manager = open_pipeline_store(str(tmp_path), hash_embeddings)
+    themes = [Document(page_content=f"Theme {i}", metadata={"id": f"t{i}", "category": "theme"}) for i in range(3)]
+    assert manager.sync_documents("pipeline_parts", themes, "theme")["added"] == 3
+
+    themes[0] = Document(page_content="Theme 0, reworded", metadata={"id": "t0", "category": "theme"})
+    stats = manager.sync_documents("pipeline_parts", themes[:2], "theme")
+    assert stats == {"added": 0, "updated": 1, "removed": 1, "unchanged": 1}
+    assert sorted(manager.get_store("pipeline_parts").get()["ids"]) == ["t0", "t1"]
+
+
+def test_agent_written_docs_do_not_survive_into_the_next_run(tmp_path, hash_embeddings):
+    manager = open_pipeline_store(str(tmp_path), hash_embeddings)
+    manager.sync_documents("pipeline_parts", [Document(page_content="Theme", metadata={"id": "t1", "category": "theme"})], "theme")
+    manager.add_documents("pipeline_parts", [Document(page_content="Login screen", metadata={"id": "s1", "category": "screen"})])
+    manager.persist("pipeline_parts")  # end of the stage
+
+    next_run = open_pipeline_store(str(tmp_path), hash_embeddings)
+    assert next_run.clear_untracked("pipeline_parts") == 1
+    assert next_run.get_store("pipeline_parts").get()["ids"] == ["t1"]
+    assert next_run.get_by_id("pipeline_parts", "s1") is None
+
+
+def test_writes_are_persisted_once_per_stage_not_per_write(tmp_path, monkeypatch, hash_embeddings):
+    manager = open_pipeline_store(str(tmp_path), hash_embeddings)
+    saves = []
+    monkeypatch.setattr(NumpyVectorStore, "persist", lambda store: saves.append(store))
+
+    for i in range(3):
+        manager.add_documents("pipeline_parts", [Document(page_content=f"Screen {i}", metadata={"id": f"s{i}", "category": "screen"})])
+    manager.delete_documents("pipeline_parts", ["s0"])
+    assert saves == []
+
+    manager.persist("pipeline_parts")
+    manager.persist("pipeline_parts")
+    assert len(saves) == 1
+
+    themes = [Document(page_content=f"Theme {i}", metadata={"id": f"t{i}", "category": "theme"}) for i in range(3)]
+    manager.sync_documents("pipeline_parts", themes, "theme")
+    manager.sync_documents("pipeline_parts", themes[1:], "theme")
+    assert len(saves) == 3
+    manager.sync_documents("pipeline_parts", themes[1:], "theme")
+    assert len(saves) == 3
@@ -0,0 +1,65 @@
+import pytest
+from langchain_core.documents import Document
+
+for module in ("langchain.embeddings", "langchain_huggingface", "langchain_chroma"):
+    pytest.importorskip(module)
+from utils.numpy_vectorstore import NumpyVectorStore
+from utils.vectorstores_utils import VectorStoreManager
+
+
+def partitioned_manager(tmp_path, created, embedding):
+    def factory(value):
+        created.append(value)
+        return NumpyVectorStore(embedding, persist_directory=str(tmp_path / "partitions" / value))
+
+    manager = VectorStoreManager()
+    manager.add_store(
+        "pipeline_parts", NumpyVectorStore(embedding, persist_directory=str(tmp_path / "main")),
+        file_path=str(tmp_path / "main"), index_ids=True, partition_key="category", partition_factory=factory
+    )
+    return manager
+
+
+def test_reads_do_not_create_partitions(tmp_path, hash_embeddings):
+    created = []
+    manager = partitioned_manager(tmp_path, created, hash_embeddings)
+    manager.add_documents("pipeline_parts", [
+        Document(page_content="Login screen", metadata={"id": "s1", "category": "screen"}),
+        Document(page_content="Sign in story", metadata={"id": "u1", "category": "story"})
+    ])
+    assert sorted(created) == ["screen", "story"]
+
+    assert manager.similarity_search("pipeline_parts", "login", filter={"category": "flow"}) == []
+    hits = manager.similarity_search("pipeline_parts", "login", filter={"category": {"$in": ["screen", "epic"]}})
+    assert [doc.metadata["id"] for doc in hits] == ["s1"]
+    manager.delete_documents("pipeline_parts", ["missing"])
+    assert sorted(created) == ["screen", "story"]
+
+
+def test_reopened_store_finds_its_partitions(tmp_path, hash_embeddings):
+    manager = partitioned_manager(tmp_path, [], hash_embeddings)
+    manager.add_documents("pipeline_parts", [Document(page_content="Checkout flow", metadata={"id": "f1", "category": "flow"})])
+    manager.persist("pipeline_parts")
+
+    created = []
+    reopened = partitioned_manager(tmp_path, created, hash_embeddings)
+    assert created == ["flow"]
+    hits = reopened.similarity_search("pipeline_parts", "checkout", filter={"category": "flow"})
+    assert [doc.metadata["id"] for doc in hits] == ["f1"]
+
+
+def test_stories_can_be_filtered_by_story_category(tmp_path, monkeypatch, hash_embeddings):
+    pytest.importorskip("langchain.tools")
+    import utils.vectorstores_utils as vectorstores_utils
+    from llm_tools.flow_decomp_tools import semantic_search_tool
+
+    manager = partitioned_manager(tmp_path, [], hash_embeddings)
+    manager.add_documents("pipeline_parts", [
+        Document(page_content="Sign in form", metadata={"id": "u1", "category": "story", "story_category": "frontend"}),
+        Document(page_content="Sign in endpoint", metadata={"id": "u2", "category": "story", "story_category": "backend"})
+    ])
+    monkeypatch.setattr(vectorstores_utils, "manager", manager)
+
+    result = semantic_search_tool("sign in", filters={"category": "story", "story_category": "backend"})
+    assert result["status"] == "success"
+    assert [hit["id"] for hit in result["results"]] == ["u2"]
@@ -0,0 +1,107 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.web_cache import HTTPResponseCache, fetch_url, fetch_urls
+
+LAST_MODIFIED = "Wed, 01 Oct 2025 08:00:00 GMT"
+
+
+class Site:
+    def __init__(self):
+        self.version = "v1"
+        self.requests = []
+
+
+@pytest.fixture
+def site():
+    state = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.requests.append((self.path, dict(self.headers)))
+            if self.path == "/etag":
+                etag = f'"{state.version}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.reply(f"<html><title>{state.version}</title></html>", {"ETag": etag})
+            elif self.path == "/last-modified":
+                if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.reply("<html>dated page</html>", {"Last-Modified": LAST_MODIFIED})
+            elif self.path == "/stale-304":
+                # Answers the first request with 304, whatever validators it carries.
+                if len([path for path, _ in state.requests if path == self.path]) == 1:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.reply("<html>full page</html>", {})
+            else:
+                self.send_error(404)
+
+        def reply(self, body, headers):
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_etag_revalidation_reuses_the_cached_body(site, tmp_path):
+    cache = HTTPResponseCache(str(tmp_path))
+    url = site.url + "/etag"
+
+    assert fetch_url(url, cache) == ("<html><title>v1</title></html>", False)
+    assert fetch_url(url, cache) == ("<html><title>v1</title></html>", True)
+    assert site.requests[1][1].get("If-None-Match") == '"v1"'
+
+    site.version = "v2"
+    assert fetch_url(url, cache) == ("<html><title>v2</title></html>", False)
+    assert cache.lookup(url)["etag"] == '"v2"'
+
+
+def test_last_modified_revalidation(site, tmp_path):
+    cache = HTTPResponseCache(str(tmp_path))
+    url = site.url + "/last-modified"
+
+    assert fetch_url(url, cache)[1] is False
+    assert fetch_url(url, cache) == ("<html>dated page</html>", True)
+    assert site.requests[1][1].get("If-Modified-Since") == LAST_MODIFIED
+    assert "If-None-Match" not in site.requests[1][1]
+
+
+def test_fetch_urls_skips_failures_and_reports_cache_hits(site, tmp_path):
+    urls = [site.url + "/etag", site.url + "/last-modified", site.url + "/missing"]
+    first = fetch_urls(urls, str(tmp_path), max_workers=3)
+    second = fetch_urls(urls, str(tmp_path), max_workers=3)
+
+    assert set(first) == set(second) == set(urls[:2])
+    assert all(not from_cache for _, from_cache in first.values())
+    assert all(from_cache for _, from_cache in second.values())
+
+
+def test_304_without_a_cache_entry_falls_back_to_a_plain_get(site, tmp_path):
+    cache = HTTPResponseCache(str(tmp_path))
+    html, from_cache = fetch_url(site.url + "/stale-304", cache)
+    assert (html, from_cache) == ("<html>full page</html>", False)
+    assert len(site.requests) == 2
+    assert cache.lookup(site.url + "/stale-304") is not None
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import threading
+import difflib
+import logging
+import json
+import sys
+import re
+
+logger = logging.getLogger("my_app_logger")
+
+AUTO_ANSWER_INSTRUCTIONS = """You are the product owner of the app described below, answering a requirements analyst's clarifying question.
+Answer in one or two sentences with the most common, sensible choice for this kind of app. Do not ask questions back.
+App: {app_query}"""
+DEFAULT_AUTO_ANSWER = "No preference; use the most common, sensible choice for this kind of app."
+LABEL_PATTERN = re.compile(r"^\s*\[[^\]]*\]\s*")
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", question.lower())).strip()
+
+def strip_question_label(question: str) -> str:
+    """
+    Drops a leading "[Theme name] " label, as batched epic questions carry one.
+    """
+    return LABEL_PATTERN.sub("", question, count=1)
+
+
+class AnswerProvider:
+    """
+    Answers clarifying questions the agents ask the user (ask_user_tool, ask_human_clarification).
+    """
+
+    def answer(self, question: str) -> str:
+        raise NotImplementedError
+
+    def answer_all(self, questions: List[str]) -> Dict[str, str]:
+        return {question: self.answer(question) for question in questions}
+
+
+class InteractiveAnswerProvider(AnswerProvider):
+    """
+    Asks on the console. Questions from concurrent agents are asked one at a time, and are
+    printed to the console even while agent output is routed to the verbose log.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def answer(self, question: str) -> str:
+        console = getattr(sys.stdout, "console", sys.stdout)
+        with self._lock:
+            console.write(f"\n[LLM Question]: {question}\n[Your answer]: ")
+            console.flush()
+            return input()
+
+
+class AnswersFileProvider(AnswerProvider):
+    """
+    Answers from a pre-recorded JSON file, either {question: answer} or a list of
+    {"question", "answer"} objects. A question gets the answer of the most similar recorded
+    question (difflib ratio on normalized text) if the similarity is at least min_similarity;
+    otherwise the fallback provider answers, or an empty answer is returned, with a warning
+    either way. Theme labels ("[Theme] ...") are ignored on both sides when matching.
+    """
+
+    def __init__(self, path: str, min_similarity: float = 0.6, fallback: Optional[AnswerProvider] = None):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{"question": question, "answer": answer} for question, answer in data.items()]
+        self.answers = {normalize_question(strip_question_label(item["question"])): str(item["answer"]) for item in data}
+        self.min_similarity = min_similarity
+        self.fallback = fallback
+        self.unmatched = []
+
+    def answer(self, question: str) -> str:
+        key = normalize_question(strip_question_label(question))
+        if key in self.answers:
+            return self.answers[key]
+        matches = difflib.get_close_matches(key, list(self.answers), n=1, cutoff=self.min_similarity)
+        if matches:
+            logger.info(f"Answering '{question}' with the recorded answer to '{matches[0]}'.")
+            return self.answers[matches[0]]
+        self.unmatched.append(question)
+        if self.fallback is None:
+            logger.warning(f"No recorded answer for '{question}'; answering with an empty answer.")
+            return ""
+        logger.warning(f"No recorded answer for '{question}'; falling back to {type(self.fallback).__name__}.")
+        return self.fallback.answer(question)
+
+
+class LLMAnswerProvider(AnswerProvider):
+    """
+    Lets an LLM answer as the product owner, for headless and benchmark runs. Without an llm
+    it is a stub that always returns DEFAULT_AUTO_ANSWER. Answers are cached per question.
+    """
+
+    def __init__(self, llm=None, app_query: str = ""):
+        self.llm = llm
+        self.app_query = app_query
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def answer(self, question: str) -> str:
+        key = normalize_question(question)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        if self.llm is None:
+            answer = DEFAULT_AUTO_ANSWER
+        else:
+            response = self.llm.invoke([
+                ("system", AUTO_ANSWER_INSTRUCTIONS.format(app_query=self.app_query or "not specified")),
+                ("human", question)
+            ])
+            content = response.content
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+            answer = content.strip() or DEFAULT_AUTO_ANSWER
+        with self._lock:
+            self._cache[key] = answer
+        return answer
+
+
+_provider: AnswerProvider = InteractiveAnswerProvider()
+_thread_provider = threading.local()
+
+def get_answer_provider() -> AnswerProvider:
+    return getattr(_thread_provider, "provider", None) or _provider
+
+def set_answer_provider(provider: AnswerProvider):
+    global _provider
+    _provider = provider
+
+@contextmanager
+def use_answer_provider(provider: AnswerProvider):
+    """
+    Answers this thread's questions with provider, e.g. one auto-answer provider per app in a batch run.
+    """
+    previous = getattr(_thread_provider, "provider", None)
+    _thread_provider.provider = provider
+    try:
+        yield provider
+    finally:
+        _thread_provider.provider = previous
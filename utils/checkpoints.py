@@ -0,0 +1,107 @@
+from typing import Any, Dict
+import threading
+import logging
+import json
+import os
+
+logger = logging.getLogger("my_app_logger")
+
+COMPLETE_KEY = "__complete__"
+
+
+class CheckpointStore:
+    """
+    Append-only JSONL log of pipeline checkpoints, one {"stage", "key", "data"} record per line.
+    - Every put is flushed and fsynced before it returns, so a crash or Ctrl-C loses at most
+      the record being written; a cut-off last line is ignored on load.
+    - A later record for the same (stage, key) replaces the earlier one.
+    - complete(stage) marks a stage as finished, so resume logic can tell a finished stage
+      from one that stopped part-way.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._partial_line = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._partial_line = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                    self._records.setdefault(record["stage"], {})[record["key"]] = record["data"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable checkpoint line in {self.path}.")
+
+    def touch(self):
+        """
+        Creates the log file if it does not exist yet, so its presence marks work as started.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def put(self, stage: str, key: str, data: Any):
+        line = json.dumps({"stage": stage, "key": key, "data": data})
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                # Start on a fresh line after a record cut off by a crash
+                f.write(("\n" if self._partial_line else "") + line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._partial_line = False
+            self._records.setdefault(stage, {})[key] = data
+
+    def get(self, stage: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._records.get(stage, {}).get(key, default)
+
+    def items(self, stage: str) -> Dict[str, Any]:
+        """
+        Returns {key: data} for the stage, without the completion marker.
+        """
+        with self._lock:
+            return {key: data for key, data in self._records.get(stage, {}).items() if key != COMPLETE_KEY}
+
+    def started(self, *stages: str) -> bool:
+        with self._lock:
+            return any(self._records.get(stage) for stage in stages)
+
+    def complete(self, stage: str):
+        self.put(stage, COMPLETE_KEY, True)
+
+    def is_complete(self, stage: str) -> bool:
+        return bool(self.get(stage, COMPLETE_KEY))
+
+    def clear(self, *stages: str):
+        """
+        Drops the stages' checkpoints and rewrites the log without them.
+        """
+        with self._lock:
+            for stage in stages:
+                self._records.pop(stage, None)
+            if not os.path.exists(self.path):
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for stage, records in self._records.items():
+                    for key, data in records.items():
+                        f.write(json.dumps({"stage": stage, "key": key, "data": data}) + "\n")
+            os.replace(tmp_path, self.path)
+            self._partial_line = False
+
+    def delete(self):
+        with self._lock:
+            self._records = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
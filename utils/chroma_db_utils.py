@@ -2,10 +2,12 @@
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from dotenv import load_dotenv
-from langchain_community.document_loaders import DirectoryLoader, WebBaseLoader, PyPDFLoader
+from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.document_registry import sync_rag_sources
+from utils.web_cache import load_web_documents
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 import logging
 import os
@@ -17,6 +19,7 @@ class AppConfig(BaseSettings):
     pdf_dir: str = "rag_docs/pdfs"
     md_dir: str = "rag_docs/mds"
     chroma_path: str = "rag_store"
+    document_registry_name: str = "document_registry.json"
     urls: List[str] = [
         "https://m3.material.io/components/buttons/overview",
         "https://www.atlassian.com/agile/project-management/user-stories",
@@ -31,8 +34,23 @@ class AppConfig(BaseSettings):
         "https://developer.android.com/topic/architecture",
         "https://reactnative.dev/docs/navigation"
     ]
+    web_cache_dir: str = "rag_docs/web_cache"
+    web_max_workers: int = 8
+    web_per_host_limit: int = 2
+    web_timeout: int = 30
+    ingest_workers: int = 4
+    ingest_max_in_flight: int = 8
+    embed_batch_size: int = 256
+    # MinHash Jaccard threshold (e.g. 0.9) for dropping near-duplicate chunks; None disables it.
+    # Chunks are only compared within one source, so text repeated across pages (shared nav/footer) is kept.
+    dedup_threshold: Optional[float] = None
+    dedup_num_perm: int = 128
     chunk_size: int = 500
     chunk_overlap: int = 100
+    splitter_mode: str = "characters"  # "characters" or "tokens" (measured with embedding_tokenizer)
+    chunk_tokens: int = 380  # all-mpnet-base-v2 reads at most 384 tokens, including [CLS]/[SEP]
+    chunk_overlap_tokens: int = 64
+    embedding_tokenizer: str = "sentence-transformers/all-mpnet-base-v2"
     search_k: int = 4
 
 config = AppConfig()
@@ -57,35 +75,18 @@ def load_markdown() -> List:
 
 def load_web() -> List:
     docs = []
-    for url in config.urls:
-        try:
-            loader = WebBaseLoader(url)
-            docs.extend(loader.load())
-        except Exception as e:
-            logger.error(f"Failed to load {url}: {e}")
+    for url_docs in load_web_documents(config.urls, config).values():
+        docs.extend(url_docs)
     return docs
 
 def add_new_documents(vectorstore: Chroma, embedding: HuggingFaceEmbeddings, config: AppConfig) -> Chroma:
     """
-    Loads new documents (PDFs, Markdown, and web pages) and adds them to the existing Chroma vectorstore.
+    Embeds only the PDFs, Markdown files and web pages that are new or changed since the last
+    sync, using the document registry stored next to the Chroma vectorstore.
     """
-    # Load all documents (PDF, Markdown, Web)
-    new_docs = []
-    new_docs.extend(load_pdfs())
-    new_docs.extend(load_markdown())
-    new_docs.extend(load_web())
-    
-    if new_docs:
-        # Split documents into chunks
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap
-        )
-        split_new_docs = splitter.split_documents(new_docs)
-        # Add new documents to the existing vectorstore
-        vectorstore.add_documents(split_new_docs)
-        vectorstore.persist()
-        logger.info(f"Added {len(split_new_docs)} new document chunks to the vectorstore.")
+    stats = sync_rag_sources(vectorstore, config, os.path.join(config.chroma_path, config.document_registry_name))
+    if stats["chunks_added"] or stats["chunks_deleted"]:
+        logger.info(f"Added {stats['chunks_added']} and removed {stats['chunks_deleted']} document chunks in the vectorstore.")
     else:
         logger.info("No new documents found to add.")
     return vectorstore
@@ -99,25 +100,15 @@ def load_all_documents() -> List:
     return docs
 
 def prepare_vectorstore(embedding: HuggingFaceEmbeddings, config: AppConfig, add_new: bool = False) -> Chroma:
-    if not os.path.exists(config.chroma_path):
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap
-        )
-        docs = splitter.split_documents(load_all_documents())
-        vectorstore = Chroma.from_documents(
-            docs,
-            embedding,
-            persist_directory=config.chroma_path
-        )
-        vectorstore.persist()
-        logger.info("Created new vectorstore and added all documents.")
+    is_new = not os.path.exists(config.chroma_path)
+    vectorstore = Chroma(
+        persist_directory=config.chroma_path,
+        embedding_function=embedding
+    )
+    if is_new:
+        logger.info("Created new vectorstore.")
     else:
-        vectorstore = Chroma(
-            persist_directory=config.chroma_path,
-            embedding_function=embedding
-        )
         logger.info("Loaded existing vectorstore.")
-        if add_new:
-            vectorstore = add_new_documents(vectorstore, embedding, config)
-    return vectorstore
\ No newline at end of file
+    if is_new or add_new:
+        vectorstore = add_new_documents(vectorstore, embedding, config)
+    return vectorstore
@@ -0,0 +1,296 @@
+from langchain_core.documents import Document
+from utils.web_cache import load_web_documents
+from utils.parallel_ingestion import iter_parsed_files, make_splitter, splitter_args, splitter_tag
+from utils.near_duplicates import NearDuplicateFilter
+from typing import Callable, Iterable, List, Optional, Tuple
+from pathlib import Path
+import hashlib
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger("my_app_logger")
+
+# (source key, content fingerprint, loader returning the source's documents)
+Source = Tuple[str, str, Callable[[], List[Document]]]
+
+
+class DocumentRegistry:
+    """
+    Tracks which version of each RAG source (file path or URL) is embedded in a vectorstore.
+    Maps source -> {"hash": <content fingerprint>, "chunk_ids": [<vectorstore ids>]} and is
+    persisted as JSON next to the store.
+    With autosave=False, checkpoints are skipped and the caller saves once the store itself
+    has been persisted, so the registry never runs ahead of what is on disk.
+    """
+
+    def __init__(self, path: str, autosave: bool = True):
+        self.path = path
+        self.autosave = autosave
+        self.entries = {}
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to read document registry {path}, starting from an empty one: {e}")
+
+    def is_current(self, source: str, fingerprint: str) -> bool:
+        entry = self.entries.get(source)
+        return bool(entry) and entry.get("hash") == fingerprint
+
+    def knows(self, source: str) -> bool:
+        return source in self.entries
+
+    def chunk_ids(self, source: str) -> List[str]:
+        return list(self.entries.get(source, {}).get("chunk_ids", []))
+
+    def record(self, source: str, fingerprint: str, chunk_ids: List[str]):
+        self.entries[source] = {"hash": fingerprint, "chunk_ids": list(chunk_ids)}
+
+    def forget(self, source: str):
+        self.entries.pop(source, None)
+
+    def sources(self) -> List[str]:
+        return list(self.entries.keys())
+
+    def checkpoint(self):
+        if self.autosave:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def fingerprint_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint_documents(docs: List[Document]) -> str:
+    digest = hashlib.sha256()
+    for doc in docs:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def make_chunk_id(source: str, fingerprint: str, index: int) -> str:
+    source_key = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    return f"{source_key}-{fingerprint[:12]}-{index}"
+
+
+# === Source Enumeration ===
+def iter_file_sources(pdf_dir: str, md_dir: str) -> Iterable[Tuple[str, str]]:
+    """
+    Yields (path, fingerprint) for PDF and Markdown files, fingerprinted on their raw bytes
+    so unchanged files are never parsed.
+    """
+    for filename in sorted(Path(pdf_dir).glob("*.pdf")):
+        yield str(filename), fingerprint_file(filename)
+    for filename in sorted(Path(md_dir).glob("**/*.md")):
+        yield str(filename), fingerprint_file(filename)
+
+def iter_web_sources(config) -> Iterable[Source]:
+    """
+    Yields web sources. Pages have to be fetched to be fingerprinted, so they are fetched
+    concurrently through the HTTP response cache and the loader just hands them back.
+    """
+    for url, docs in load_web_documents(config.urls, config).items():
+        yield url, fingerprint_documents(docs), lambda docs=docs: docs
+
+def configured_source_keys(config) -> set:
+    keys = {str(p) for p in Path(config.pdf_dir).glob("*.pdf")}
+    keys.update(str(p) for p in Path(config.md_dir).glob("**/*.md"))
+    keys.update(config.urls)
+    return keys
+
+
+# === Incremental Ingestion ===
+def _stale_chunk_ids(vectorstore, registry: DocumentRegistry, source: str) -> List[str]:
+    if registry.knows(source):
+        return registry.chunk_ids(source)
+    # Source was embedded before the registry existed: find its chunks by metadata.
+    results = vectorstore.get(where={"source": source})
+    return list(results.get("ids", [])) if results else []
+
+def _assign_chunk_ids(chunks: List[Document], source: str, fingerprint: str) -> List[str]:
+    chunk_ids = [make_chunk_id(source, fingerprint, i) for i in range(len(chunks))]
+    for chunk, chunk_id in zip(chunks, chunk_ids):
+        chunk.metadata["source"] = source
+        chunk.metadata["id"] = chunk_id
+    return chunk_ids
+
+def _drop_stale_chunks(vectorstore, registry: DocumentRegistry, source: str, stats: dict):
+    stale_ids = _stale_chunk_ids(vectorstore, registry, source)
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+        stats["chunks_deleted"] += len(stale_ids)
+    stats["changed" if stale_ids or registry.knows(source) else "new"] += 1
+
+def new_ingest_stats() -> dict:
+    return {
+        "new": 0, "changed": 0, "unchanged": 0, "failed": 0, "chunks_added": 0, "chunks_deleted": 0,
+        "duplicates_removed": 0, "embed_seconds": 0.0
+    }
+
+def _drop_duplicates(chunks: List[Document], dedup: Optional[NearDuplicateFilter], stats: dict) -> List[Document]:
+    # Only within one source: the registry tracks chunks per source, so a chunk dropped as a
+    # copy of another source's chunk would never come back when that source changes.
+    if dedup is None:
+        return chunks
+    dedup.reset()
+    kept = dedup.filter(chunks)
+    stats["duplicates_removed"] += len(chunks) - len(kept)
+    return kept
+
+def _timed_add(vectorstore, chunks: List[Document], chunk_ids: List[str], stats: dict):
+    start = time.perf_counter()
+    vectorstore.add_documents(chunks, ids=chunk_ids)
+    stats["embed_seconds"] += time.perf_counter() - start
+    stats["chunks_added"] += len(chunks)
+
+def ingest_sources(vectorstore, registry: DocumentRegistry, sources: Iterable[Source], splitter,
+                   dedup: Optional[NearDuplicateFilter] = None) -> dict:
+    """
+    Splits and embeds only new or changed sources. Chunks of a changed source are deleted
+    before its new chunks are added. The registry is saved after every source so an
+    interrupted run does not re-embed finished sources.
+    With dedup set, near-duplicate chunks within a source are dropped between splitting
+    and embedding.
+    """
+    stats = new_ingest_stats()
+    for source, fingerprint, load in sources:
+        if registry.is_current(source, fingerprint):
+            stats["unchanged"] += 1
+            continue
+        try:
+            docs = load()
+        except Exception as e:
+            logger.error(f"Failed to load {source}: {e}")
+            stats["failed"] += 1
+            continue
+
+        _drop_stale_chunks(vectorstore, registry, source, stats)
+        chunks = _drop_duplicates(splitter.split_documents(docs), dedup, stats)
+        chunk_ids = _assign_chunk_ids(chunks, source, fingerprint)
+        if chunks:
+            _timed_add(vectorstore, chunks, chunk_ids, stats)
+        registry.record(source, fingerprint, chunk_ids)
+        registry.checkpoint()
+    return stats
+
+def ingest_file_sources(vectorstore, registry: DocumentRegistry, file_sources: Iterable[Tuple[str, str]], config,
+                        dedup: Optional[NearDuplicateFilter] = None) -> dict:
+    """
+    Parses and splits new or changed files on a process pool and streams their chunks into
+    the vectorstore in batches of config.embed_batch_size. A file is only recorded in the
+    registry once all of its chunks have been written.
+    With dedup set, near-duplicate chunks within a file are dropped between splitting and
+    embedding.
+    """
+    stats = new_ingest_stats()
+    fingerprints = {}
+    for path, fingerprint in file_sources:
+        if registry.is_current(path, fingerprint):
+            stats["unchanged"] += 1
+        else:
+            fingerprints[path] = fingerprint
+
+    batch, batch_ids, pending = [], [], []
+
+    def flush():
+        for start in range(0, len(batch), config.embed_batch_size):
+            end = start + config.embed_batch_size
+            _timed_add(vectorstore, batch[start:end], batch_ids[start:end], stats)
+        for path, chunk_ids in pending:
+            registry.record(path, fingerprints[path], chunk_ids)
+        if pending:
+            registry.checkpoint()
+        batch.clear()
+        batch_ids.clear()
+        pending.clear()
+
+    parsed = iter_parsed_files(
+        fingerprints.keys(),
+        splitter_args(config),
+        max_workers=config.ingest_workers,
+        max_in_flight=config.ingest_max_in_flight
+    )
+    for path, chunks, error in parsed:
+        if error is not None:
+            logger.error(f"Failed to load {path}: {error}")
+            stats["failed"] += 1
+            continue
+        _drop_stale_chunks(vectorstore, registry, path, stats)
+        chunks = _drop_duplicates(chunks, dedup, stats)
+        chunk_ids = _assign_chunk_ids(chunks, path, fingerprints[path])
+        batch.extend(chunks)
+        batch_ids.extend(chunk_ids)
+        pending.append((path, chunk_ids))
+        if len(batch) >= config.embed_batch_size:
+            flush()
+    flush()
+    return stats
+
+def prune_sources(vectorstore, registry: DocumentRegistry, keep: set) -> int:
+    """
+    Deletes the chunks of registered sources that are no longer configured (removed files
+    or URLs). Returns the number of sources pruned.
+    """
+    pruned = 0
+    for source in registry.sources():
+        if source in keep:
+            continue
+        stale_ids = registry.chunk_ids(source)
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        registry.forget(source)
+        pruned += 1
+    if pruned:
+        registry.checkpoint()
+    return pruned
+
+def sync_rag_sources(vectorstore, config, registry_path: str) -> dict:
+    """
+    Brings a RAG vectorstore in line with the configured PDFs, Markdown files and URLs.
+    With config.dedup_threshold set, near-duplicate chunks are dropped within each source
+    (text repeated across sources, e.g. a site's nav or footer, is kept); the stats report the
+    dedup scope, how many chunks were dropped and the embedding time that saved, estimated
+    from the measured time per embedded chunk.
+    """
+    # Stores that write to disk only on persist() (numpy, hnsw) record progress after persisting.
+    registry = DocumentRegistry(registry_path, autosave=not hasattr(vectorstore, "persist"))
+    splitter = make_splitter(*splitter_args(config))
+    # Sources split with other settings count as changed and are re-chunked.
+    tag = splitter_tag(config)
+    file_sources = ((path, fingerprint + tag) for path, fingerprint in iter_file_sources(config.pdf_dir, config.md_dir))
+    web_sources = ((url, fingerprint + tag, load) for url, fingerprint, load in iter_web_sources(config))
+    dedup = NearDuplicateFilter(config.dedup_threshold, config.dedup_num_perm) if config.dedup_threshold else None
+    stats = ingest_file_sources(vectorstore, registry, file_sources, config, dedup)
+    web_stats = ingest_sources(vectorstore, registry, web_sources, splitter, dedup)
+    for key, value in web_stats.items():
+        stats[key] += value
+    seconds_per_chunk = stats["embed_seconds"] / stats["chunks_added"] if stats["chunks_added"] else 0.0
+    stats["embed_seconds_saved"] = round(stats["duplicates_removed"] * seconds_per_chunk, 2)
+    stats["embed_seconds"] = round(stats["embed_seconds"], 2)
+    stats["dedup_scope"] = "within_source" if dedup else None
+    if dedup:
+        print(
+            f"Near-duplicate filter removed {stats['duplicates_removed']} chunks within their own source, saving "
+            f"~{stats['embed_seconds_saved']}s of embedding. Text repeated across sources (shared nav/footer) is kept."
+        )
+    stats["pruned"] = prune_sources(vectorstore, registry, configured_source_keys(config))
+    if hasattr(vectorstore, "persist"):
+        vectorstore.persist()
+    registry.save()
+    logger.info(f"RAG source sync: {stats}")
+    return stats
@@ -0,0 +1,279 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from utils.numpy_vectorstore import normalize_rows
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import logging
+import json
+import uuid
+import os
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger("my_app_logger")
+
+INDEX_FILE = "hnsw_index.bin"
+DOCSTORE_FILE = "hnsw_docstore.json"
+
+
+def metadata_matches(metadata: dict, where: Optional[dict]) -> bool:
+    """
+    Evaluates a Chroma-style filter ($eq, $ne, $in, $nin, $and, $or) against one metadata dict.
+    """
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op not in ("$eq", "$ne", "$in", "$nin"):
+                    raise ValueError(f"Unsupported filter operator '{op}' for key '{key}'.")
+    return True
+
+
+class HNSWVectorStore(VectorStore):
+    """
+    Approximate nearest-neighbour vectorstore on an hnswlib graph, for large RAG corpora where
+    exact search and MMR over Chroma get slow.
+    - Incremental: adds grow the index in place; upserts and deletes mark the old graph node
+      deleted and its slot is reused by later adds.
+    - Tunable: ef_search trades recall for latency at query time (raised to k when smaller),
+      ef_construction and M trade build time for graph quality.
+    - Persistent: with persist_directory set, persist() writes the graph plus a JSON docstore
+      and the store reopens them on the next run.
+    Scores are cosine distances (lower is closer), like Chroma's.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        persist_directory: Optional[str] = None,
+        ef_search: int = 64,
+        ef_construction: int = 200,
+        M: int = 16,
+        initial_capacity: int = 10000
+    ):
+        if hnswlib is None:
+            raise ImportError("The hnsw backend needs hnswlib: pip install hnswlib")
+        self._embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.ef_search = ef_search
+        self.ef_construction = ef_construction
+        self.M = M
+        self._initial_capacity = max(1, initial_capacity)
+        self._index = None  # created on first add, once the dimension is known
+        self._next_label = 0
+        self._label_of: Dict[str, int] = {}
+        self._docs: Dict[int, Tuple[str, str, dict]] = {}  # label -> (id, text, metadata)
+        if persist_directory and os.path.isfile(os.path.join(persist_directory, INDEX_FILE)):
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # === Persistence ===
+    def _load(self):
+        with open(os.path.join(self.persist_directory, DOCSTORE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self._index = hnswlib.Index(space="cosine", dim=state["dim"])
+        self._index.load_index(
+            os.path.join(self.persist_directory, INDEX_FILE),
+            max_elements=state["max_elements"],
+            allow_replace_deleted=True
+        )
+        self._next_label = state["next_label"]
+        self._docs = {int(label): (doc_id, text, metadata) for label, (doc_id, text, metadata) in state["docs"].items()}
+        self._label_of = {doc_id: label for label, (doc_id, _, _) in self._docs.items()}
+        logger.info(f"Loaded HNSW index with {len(self._docs)} documents from {self.persist_directory}.")
+
+    def persist(self):
+        if not self.persist_directory or self._index is None:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        index_path = os.path.join(self.persist_directory, INDEX_FILE)
+        self._index.save_index(index_path + ".tmp")
+        os.replace(index_path + ".tmp", index_path)
+        state = {
+            "dim": self._index.dim,
+            "max_elements": self._index.get_max_elements(),
+            "next_label": self._next_label,
+            "docs": {str(label): list(doc) for label, doc in self._docs.items()}
+        }
+        docstore_path = os.path.join(self.persist_directory, DOCSTORE_FILE)
+        with open(docstore_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(docstore_path + ".tmp", docstore_path)
+
+    # === Writes ===
+    def _ensure_capacity(self, dim: int, extra: int):
+        if self._index is None:
+            self._index = hnswlib.Index(space="cosine", dim=dim)
+            self._index.init_index(
+                max_elements=max(self._initial_capacity, extra),
+                ef_construction=self.ef_construction,
+                M=self.M,
+                allow_replace_deleted=True
+            )
+            return
+        # Deleted slots are reused, but the element count still includes them until then.
+        needed = self._index.get_current_count() + extra
+        capacity = self._index.get_max_elements()
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            self._index.resize_index(capacity)
+
+    def add_embeddings(self, ids: List[str], embeddings, texts: List[str], metadatas: List[dict]) -> List[str]:
+        """
+        Upserts precomputed embeddings without running the embedding model. An id repeated
+        within the batch is written once, with its last occurrence.
+        """
+        if not len(ids):
+            return []
+        vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        rows = sorted({doc_id: row for row, doc_id in enumerate(ids)}.values())
+        if len(rows) < len(ids):
+            vectors = vectors[rows]
+            batch = [(ids[row], texts[row], metadatas[row]) for row in rows]
+        else:
+            batch = list(zip(ids, texts, metadatas))
+        self.delete([doc_id for doc_id, _, _ in batch if doc_id in self._label_of])
+        self._ensure_capacity(vectors.shape[1], len(batch))
+        labels = np.arange(self._next_label, self._next_label + len(batch))
+        self._next_label += len(batch)
+        self._index.add_items(vectors, labels, replace_deleted=True)
+        for label, (doc_id, text, metadata) in zip(labels.tolist(), batch):
+            self._docs[label] = (doc_id, text, dict(metadata or {}))
+            self._label_of[doc_id] = label
+        return list(ids)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(i) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        embeddings = self._embedding_function.embed_documents(texts)
+        return self.add_embeddings(ids, embeddings, texts, metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        for doc_id in ids or []:
+            label = self._label_of.pop(doc_id, None)
+            if label is None:
+                continue
+            self._index.mark_deleted(label)
+            del self._docs[label]
+        return True
+
+    # === Reads ===
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        """
+        Chroma-compatible get: returns {"ids", "documents", "metadatas"} (plus "embeddings"
+        if requested) for the given ids and/or metadata filter.
+        """
+        if ids is not None:
+            labels = [self._label_of[doc_id] for doc_id in ids if doc_id in self._label_of]
+        else:
+            labels = list(self._docs.keys())
+        labels = [label for label in labels if metadata_matches(self._docs[label][2], where)]
+        results = {
+            "ids": [self._docs[label][0] for label in labels],
+            "documents": [self._docs[label][1] for label in labels],
+            "metadatas": [dict(self._docs[label][2]) for label in labels],
+        }
+        if include and "embeddings" in include:
+            results["embeddings"] = np.asarray(self._index.get_items(labels), dtype=np.float32) if labels else np.zeros((0, 0), dtype=np.float32)
+        return results
+
+    def _exact_search(self, query_vector: np.ndarray, labels: List[int], k: int) -> Tuple[List[int], List[float]]:
+        vectors = normalize_rows(np.asarray(self._index.get_items(labels), dtype=np.float32))
+        distances = 1.0 - vectors @ query_vector
+        order = np.argsort(distances)[:k]
+        return [labels[i] for i in order], [float(distances[i]) for i in order]
+
+    def _knn(self, query_vector: np.ndarray, k: int, filter: Optional[dict]) -> Tuple[List[int], List[float]]:
+        if not self._docs or k <= 0:
+            return [], []
+        allowed = None
+        if filter:
+            allowed = {label for label, (_, _, metadata) in self._docs.items() if metadata_matches(metadata, filter)}
+            if not allowed:
+                return [], []
+        k = min(k, len(allowed) if allowed is not None else len(self._docs))
+        self._index.set_ef(max(self.ef_search, k))
+        try:
+            labels, distances = self._index.knn_query(
+                query_vector, k=k, filter=(lambda label: label in allowed) if allowed is not None else None
+            )
+        except RuntimeError:
+            # The graph walk found fewer than k matches (very selective filter): scan them exactly.
+            return self._exact_search(query_vector, sorted(allowed or self._docs.keys()), k)
+        return labels[0].tolist(), distances[0].tolist()
+
+    def _document(self, label: int) -> Document:
+        _, text, metadata = self._docs[label]
+        return Document(page_content=text, metadata=dict(metadata))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        query_vector = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        labels, distances = self._knn(query_vector, k, filter)
+        return [(self._document(label), float(distance)) for label, distance in zip(labels, distances)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        """
+        MMR over the fetch_k approximate nearest neighbours, so only fetch_k vectors are
+        compared pairwise instead of the whole corpus.
+        """
+        query_vector = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        labels, _ = self._knn(query_vector, fetch_k, filter)
+        if not labels:
+            return []
+        candidates = np.asarray(self._index.get_items(labels), dtype=np.float32)
+        selected = maximal_marginal_relevance(query_vector, candidates, k=k, lambda_mult=lambda_mult)
+        return [self._document(labels[i]) for i in selected]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self._embedding_function.embed_query(query), k, fetch_k, lambda_mult, filter)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> "HNSWVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
@@ -0,0 +1,145 @@
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.hnsw_vectorstore import metadata_matches
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import threading
+import math
+import re
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens. Identifiers such as WeatherDisplayCard or icon_button are kept
+    whole and also split into their parts (weather, display, card), so an exact component
+    name matches strongly and its parts still match loosely.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall(text or ""):
+        tokens.append(word.lower())
+        parts = CAMEL_PATTERN.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+def doc_key(doc: Document) -> str:
+    return doc.metadata.get("id") or doc.page_content
+
+
+class BM25Index:
+    """
+    Inverted BM25 index kept next to a vectorstore and updated on the same writes.
+    Postings map term -> {doc_id: term frequency}; only documents sharing a term with the
+    query are scored.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._docs: Dict[str, Tuple[str, dict]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[dict]):
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove(doc_id)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                length = sum(counts.values())
+                self._lengths[doc_id] = length
+                self._total_length += length
+                self._docs[doc_id] = (text, dict(metadata or {}))
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        if doc_id not in self._docs:
+            return
+        text, _ = self._docs.pop(doc_id)
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def search(self, query: str, k: int = 4, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            for doc_id, score in ranked:
+                text, metadata = self._docs[doc_id]
+                if filter and not metadata_matches(metadata, filter):
+                    continue
+                results.append((Document(page_content=text, metadata=dict(metadata)), score))
+                if len(results) >= k:
+                    break
+            return results
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "BM25Index":
+        # Persistent stores may already hold documents from a previous run.
+        index = cls()
+        results = vectorstore.get(include=["documents", "metadatas"])
+        index.add(results.get("ids", []), results.get("documents", []), results.get("metadatas", []))
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """
+    Fuses several rankings: each document scores sum(1 / (k + rank)) over the rankings it
+    appears in, so documents ranked well by both retrievers come first.
+    """
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Runs the store's dense retriever and a BM25 search for the same query and fuses both
+    rankings with reciprocal-rank fusion. filter is the dense retriever's metadata filter,
+    applied to the BM25 hits too.
+    """
+    dense: BaseRetriever
+    index: Any
+    k: int = 4
+    rrf_k: int = 60
+    filter: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense_docs = self.dense.invoke(query, config={"callbacks": run_manager.get_child()})
+        keyword_docs = [doc for doc, _ in self.index.search(query, k=self.k, filter=self.filter)]
+        return reciprocal_rank_fusion([dense_docs, keyword_docs], k=self.rrf_k)[:self.k]
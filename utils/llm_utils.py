@@ -5,6 +5,8 @@ from typing import Any, Type, Union
 import logging
 import ast
 import sys
+import threading
+from contextlib import contextmanager
 from pydantic import BaseModel, ValidationError
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -14,6 +16,7 @@ from langchain_anthropic import ChatAnthropic
 from langchain_xai import ChatXAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.documents import Document
+import utils.vectorstores_utils as vectorstores_utils
 
 logger = logging.getLogger("my_app_logger")
 
@@ -108,11 +111,61 @@ def extract_code_block(text: str) -> str:
     if match:
         return match.group(1).strip()
 
+class _ThreadRoutedStdout:
+    """
+    Stands in for sys.stdout while agents run: threads inside call_agent write to the verbose
+    log, every other thread (e.g. the main thread asking the user questions) keeps the console.
+    """
+
+    def __init__(self, console, log_file):
+        self.console = console
+        self.log_file = log_file
+        self.local = threading.local()
+
+    def _target(self):
+        return self.log_file if getattr(self.local, "depth", 0) else self.console
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+_stdout_lock = threading.Lock()
+_stdout_users = 0
+_routed_stdout = None
+
+@contextmanager
+def verbose_output_to_log(log_path: str = "llm_verbose.log"):
+    """
+    Sends this thread's stdout to log_path. Safe to nest and to use from several threads:
+    the routing stdout is installed by the first user and removed by the last one.
+    """
+    global _stdout_users, _routed_stdout
+    with _stdout_lock:
+        if _stdout_users == 0:
+            _routed_stdout = _ThreadRoutedStdout(sys.stdout, open(log_path, "a", encoding="utf-8"))
+            sys.stdout = _routed_stdout
+        _stdout_users += 1
+        routed = _routed_stdout
+    routed.local.depth = getattr(routed.local, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        routed.local.depth -= 1
+        with _stdout_lock:
+            _stdout_users -= 1
+            if _stdout_users == 0:
+                sys.stdout = routed.console
+                routed.log_file.close()
+                _routed_stdout = None
+
 def call_agent(llm: Union[ChatOpenAI, ChatAnthropic, ChatXAI, ChatGoogleGenerativeAI], prompt_template: ChatPromptTemplate, input_text: str, tools: list, memory=None, verbose: bool = True) -> str:
     agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt_template)
-    original_stdout = sys.stdout
-    try:
-        sys.stdout = open("llm_verbose.log", "a", encoding="utf-8")
+    with verbose_output_to_log():
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=verbose, max_iterations=30)
         if memory and hasattr(memory, "load_memory_variables"):
             messages = memory.load_memory_variables({}).get("chat_history", [])
@@ -125,9 +178,6 @@ def call_agent(llm: Union[ChatOpenAI, ChatAnthropic, ChatXAI, ChatGoogleGenerati
         elif isinstance(output, dict) and "text" in output:
             return output["text"]
         return str(output)
-    finally:
-        sys.stdout.close()
-        sys.stdout = original_stdout
 
 
 
@@ -143,9 +193,10 @@ def call_agent(llm: Union[ChatOpenAI, ChatAnthropic, ChatXAI, ChatGoogleGenerati
 
 
 
-def add_boxes_to_vectordb(boxes, vectorstore):
+def add_boxes_to_vectordb(boxes, vectorstore_name="pipeline_parts"):
     """
     Add all boxes to the vector DB, storing only story IDs in metadata (as a JSON string).
+    Writes go through the VectorStoreManager so boxes can be looked up by id.
     """
     box_docs = []
     for box in boxes:
@@ -157,16 +208,17 @@ def add_boxes_to_vectordb(boxes, vectorstore):
                 "name": box["name"],
                 "container": box["container"],
                 "story_ids": json.dumps(story_ids),  # <-- Serialize as JSON string
-                "type": "box"
+                "type": "box",
+                "category": "box"
             }
         )
         box_docs.append(doc)
     print(f"Adding {len(box_docs)} boxes to vectorstore (with story IDs only)...")
-    vectorstore.add_documents(box_docs)
+    vectorstores_utils.manager.add_documents(vectorstore_name, box_docs)
     print("Boxes added to vectorstore.")
 
 
-def add_screens_to_vectordb(screens, vectorstore):
+def add_screens_to_vectordb(screens, vectorstore_name="pipeline_parts"):
     """
     Add all screens to the vector DB, storing box IDs in metadata as a JSON string.
     """
@@ -178,12 +230,13 @@ def add_screens_to_vectordb(screens, vectorstore):
             metadata={
                 "name": screen.name,
                 "boxes": json.dumps(box_ids),  # <-- Serialize as JSON string
-                "type": "screen"
+                "type": "screen",
+                "category": "screen"
             }
         )
         screen_docs.append(doc)
     print(f"Adding {len(screen_docs)} screens to vectorstore...")
-    vectorstore.add_documents(screen_docs)
+    vectorstores_utils.manager.add_documents(vectorstore_name, screen_docs)
     print("Screens added to vectorstore.")
 
 
@@ -0,0 +1,95 @@
+from langchain_core.documents import Document
+from typing import List, Tuple
+import numpy as np
+import hashlib
+import re
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """
+    Returns the 32-bit hashes of the text's word n-grams (whitespace and case are ignored).
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") for gram in grams],
+        dtype=np.uint64
+    )
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows <= num_perm so that the LSH collision curve
+    (1 / bands) ** (1 / rows) lies closest to the threshold.
+    """
+    best, best_error = (num_perm, 1), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateFilter:
+    """
+    MinHash/LSH filter that drops chunks whose word-shingle Jaccard similarity with an
+    already accepted chunk is at least threshold, e.g. boilerplate repeated within a long
+    document. Candidates come from LSH buckets and are confirmed on the estimated Jaccard
+    similarity of their full signatures, so each chunk costs O(num_perm), not O(n).
+    reset() forgets the accepted chunks but keeps the counters.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+        self.checked = 0
+        self.removed = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text, self.shingle_size)
+        # a * x + b stays below 2**63 for 31-bit a, b and 32-bit x, so uint64 cannot overflow.
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def is_duplicate(self, text: str) -> bool:
+        """
+        Returns True if text nearly duplicates an accepted chunk; otherwise accepts it.
+        """
+        self.checked += 1
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        for candidate in candidates:
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                self.removed += 1
+                return True
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(position)
+        return False
+
+    def reset(self):
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+
+    def filter(self, chunks: List[Document]) -> List[Document]:
+        return [chunk for chunk in chunks if not self.is_duplicate(chunk.page_content)]
@@ -0,0 +1,463 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import tempfile
+import logging
+import json
+import uuid
+import os
+
+logger = logging.getLogger("my_app_logger")
+
+VECTORS_FILE = "vectors.npy"
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+INDEX_FILE = "index.json"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Symmetric per-row int8 quantization: returns (codes, scale) with vector ~= codes * scale.
+    """
+    scale = float(np.abs(vector).max()) / 127 or 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vectorstore for small collections such as pipeline_parts.
+    Keeps every vector L2-normalized in one contiguous float32 matrix, so top-k is a single
+    matrix-vector product, and keeps one object column per metadata key so filters are
+    evaluated as vectorized masks. Deletes swap the last row into the freed slot to keep
+    the matrix contiguous.
+
+    Scores follow Chroma's convention of distances (lower is closer): 1 - cosine similarity.
+    Supports the same add/delete/get API as the Chroma store it replaces, including
+    Chroma-style filters with $eq, $ne, $in, $nin, $and and $or.
+
+    With quantization="int8", vectors are held in memory only as int8 codes with one float32
+    scale per row (a quarter of the float32 size). Searches scan the codes and re-rank the
+    best k * rerank_factor candidates against the full-precision vectors, which live in a
+    disk-backed memory map (vectors.npy once persisted, an unlinked temp file before that),
+    so only the re-ranked rows are paged in. rerank_factor=0 keeps no full-precision vectors
+    at all, in memory or on disk, and ranks by the int8 scores alone.
+
+    With persist_directory set, persist() writes the matrices as .npy files plus an
+    index.json sidecar (ids, texts, metadata). Reopening memory-maps the .npy files
+    copy-on-write, so the store opens without deserializing any vectors, processes on the
+    same host share the pages through the OS cache, and a write only copies the pages it
+    touches. Growing past the persisted row count copies the in-memory matrices.
+    """
+
+    SCAN_BLOCK = 1024  # rows dequantized at a time, bounding the scan's temporary memory
+
+    def __init__(self, embedding_function: Embeddings, initial_capacity: int = 1024,
+                 quantization: Optional[str] = None, rerank_factor: int = 4, persist_directory: Optional[str] = None):
+        """
+        - quantization: None (float32 in memory) or "int8".
+        - rerank_factor: int8 only; candidates re-ranked in full precision per result, 0 for none.
+        """
+        if quantization not in (None, "int8"):
+            raise ValueError(f"Unsupported quantization '{quantization}'.")
+        self._embedding_function = embedding_function
+        self._capacity = max(1, initial_capacity)
+        self.quantization = quantization
+        self.rerank_factor = max(0, rerank_factor)
+        self._vectors = None  # float32 mode; allocated on first add, once the dimension is known
+        self._codes = None  # int8 mode
+        self._scales = None
+        self._full = None  # int8 mode: disk-backed full-precision vectors for re-ranking
+        self._count = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self.persist_directory = persist_directory
+        if persist_directory and os.path.isfile(os.path.join(persist_directory, INDEX_FILE)):
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def __len__(self) -> int:
+        return self._count
+
+    # === Persistence ===
+    def _load(self):
+        with open(os.path.join(self.persist_directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self._ids = index["ids"]
+        self._texts = index["documents"]
+        self._metadatas = index["metadatas"]
+        self._count = len(self._ids)
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        if self._count:
+            self._capacity = self._count
+            self._load_matrices(index.get("quantization"))
+        self._columns = {}
+        for key in {key for metadata in self._metadatas for key in metadata}:
+            column = self._column(key)
+            column[:self._count] = [metadata.get(key) for metadata in self._metadatas]
+        logger.info(f"Memory-mapped {self._count} vectors from {self.persist_directory}.")
+
+    def _map(self, name: str) -> Optional[np.ndarray]:
+        path = os.path.join(self.persist_directory, name)
+        return np.load(path, mmap_mode="c") if os.path.isfile(path) else None
+
+    def _load_matrices(self, stored_quantization: Optional[str]):
+        vectors = self._map(VECTORS_FILE)
+        if self.quantization is None:
+            if vectors is None:
+                # Persisted without full-precision vectors: dequantizing is the best available.
+                logger.warning(f"{self.persist_directory} has only int8 codes; loading dequantized vectors.")
+                vectors = self._map(CODES_FILE).astype(np.float32) * self._map(SCALES_FILE)[:, None]
+            self._vectors = vectors
+            return
+        if stored_quantization == self.quantization:
+            self._codes = self._map(CODES_FILE)
+            self._scales = self._map(SCALES_FILE)
+        else:
+            self._quantize_all(vectors)
+        if self.rerank_factor:
+            if vectors is None:
+                logger.warning(f"{self.persist_directory} has no full-precision vectors; ranking by int8 scores only.")
+                self.rerank_factor = 0
+            else:
+                self._full = vectors
+
+    def _quantize_all(self, vectors: np.ndarray):
+        self._codes = np.zeros((self._capacity, vectors.shape[1]), dtype=np.int8)
+        self._scales = np.zeros(self._capacity, dtype=np.float32)
+        for row in range(self._count):
+            self._codes[row], self._scales[row] = quantize_int8(vectors[row])
+
+    def _disk_matrix(self, dim: int) -> np.ndarray:
+        # Unlinked temp file: the pages are file-backed, so the OS can drop them instead of
+        # holding them in process memory, and the file disappears with the store.
+        # It goes in persist_directory when there is one, as the temp dir may be RAM-backed.
+        if self.persist_directory:
+            os.makedirs(self.persist_directory, exist_ok=True)
+        with tempfile.TemporaryFile(dir=self.persist_directory) as f:
+            return np.memmap(f, dtype=np.float32, mode="w+", shape=(self._capacity, dim))
+
+    @staticmethod
+    def _save_array(path: str, array: np.ndarray):
+        # np.save appends .npy to names without it, so the temp name keeps the suffix.
+        tmp_path = path[:-len(".npy")] + ".tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+    def persist(self):
+        """
+        Writes the store to persist_directory. Files are replaced atomically, so processes
+        that still map the previous version keep reading it consistently.
+        """
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        n = self._count
+        files = {}
+        if n:
+            if self.quantization:
+                files = {CODES_FILE: self._codes[:n], SCALES_FILE: self._scales[:n]}
+                if self._full is not None:
+                    files[VECTORS_FILE] = self._full[:n]
+            else:
+                files = {VECTORS_FILE: self._vectors[:n]}
+        for name in (VECTORS_FILE, CODES_FILE, SCALES_FILE):
+            path = os.path.join(self.persist_directory, name)
+            if name in files:
+                self._save_array(path, files[name])
+            elif os.path.isfile(path):
+                os.remove(path)
+        index = {
+            "quantization": self.quantization,
+            "ids": self._ids,
+            "documents": self._texts,
+            "metadatas": self._metadatas
+        }
+        index_path = os.path.join(self.persist_directory, INDEX_FILE)
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    # === Storage ===
+    def _ensure_capacity(self, dim: int, needed: int):
+        if self._vectors is None and self._codes is None:
+            self._capacity = max(self._capacity, needed)
+            if not self.quantization:
+                self._vectors = np.zeros((self._capacity, dim), dtype=np.float32)
+                return
+            self._codes = np.zeros((self._capacity, dim), dtype=np.int8)
+            self._scales = np.zeros(self._capacity, dtype=np.float32)
+            if self.rerank_factor:
+                self._full = self._disk_matrix(dim)
+            return
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        if self.quantization:
+            self._codes = self._grow_matrix(self._codes)
+            self._scales = self._grow_matrix(self._scales)
+            if self._full is not None:
+                full = self._disk_matrix(dim)
+                for start in range(0, self._count, self.SCAN_BLOCK):
+                    end = min(start + self.SCAN_BLOCK, self._count)
+                    full[start:end] = self._full[start:end]
+                self._full = full
+        else:
+            self._vectors = self._grow_matrix(self._vectors)
+        for key, column in self._columns.items():
+            self._columns[key] = self._grow_column(column)
+
+    def _grow_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        grown = np.zeros((self._capacity,) + matrix.shape[1:], dtype=matrix.dtype)
+        grown[:self._count] = matrix[:self._count]
+        return grown
+
+    def _grow_column(self, column: np.ndarray) -> np.ndarray:
+        grown = np.empty(self._capacity, dtype=object)
+        grown[:len(column)] = column
+        return grown
+
+    def _column(self, key: str) -> np.ndarray:
+        if key not in self._columns:
+            self._columns[key] = np.empty(self._capacity, dtype=object)
+        return self._columns[key]
+
+    def _write_row(self, row: int, doc_id: str, vector: np.ndarray, text: str, metadata: dict):
+        if self.quantization:
+            self._codes[row], self._scales[row] = quantize_int8(vector)
+            if self._full is not None:
+                self._full[row] = vector
+        else:
+            self._vectors[row] = vector
+        if row == len(self._ids):
+            self._ids.append(doc_id)
+            self._texts.append(text)
+            self._metadatas.append(metadata)
+        else:
+            self._ids[row] = doc_id
+            self._texts[row] = text
+            self._metadatas[row] = metadata
+        for key, column in self._columns.items():
+            column[row] = metadata.get(key)
+        for key, value in metadata.items():
+            self._column(key)[row] = value
+        self._row_of[doc_id] = row
+
+    def add_embeddings(self, ids: List[str], embeddings, texts: List[str], metadatas: List[dict]) -> List[str]:
+        """
+        Upserts precomputed embeddings without running the embedding model.
+        """
+        vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        if not len(ids):
+            return []
+        new_rows = sum(1 for doc_id in set(ids) if doc_id not in self._row_of)
+        self._ensure_capacity(vectors.shape[1], self._count + new_rows)
+        for doc_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+            row = self._row_of.get(doc_id)
+            if row is None:
+                row = self._count
+                self._count += 1
+            self._write_row(row, doc_id, vector, text, dict(metadata or {}))
+        return list(ids)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(i) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        embeddings = self._embedding_function.embed_documents(texts)
+        return self.add_embeddings(ids, embeddings, texts, metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        for doc_id in ids or []:
+            row = self._row_of.pop(doc_id, None)
+            if row is None:
+                continue
+            last = self._count - 1
+            if row != last:
+                # Swap the last row into the hole to keep rows contiguous.
+                for matrix in (self._vectors, self._codes, self._scales, self._full):
+                    if matrix is not None:
+                        matrix[row] = matrix[last]
+                self._ids[row] = self._ids[last]
+                self._texts[row] = self._texts[last]
+                self._metadatas[row] = self._metadatas[last]
+                for column in self._columns.values():
+                    column[row] = column[last]
+                self._row_of[self._ids[row]] = row
+            for column in self._columns.values():
+                column[last] = None
+            self._ids.pop()
+            self._texts.pop()
+            self._metadatas.pop()
+            self._count -= 1
+        return True
+
+    # === Filters ===
+    def _filter_mask(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        n = self._count
+        mask = np.ones(n, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._filter_mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(n, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._filter_mask(clause)
+                mask &= any_mask
+            else:
+                mask &= self._condition_mask(key, condition)
+        return mask
+
+    def _condition_mask(self, key: str, condition) -> np.ndarray:
+        n = self._count
+        column = self._columns.get(key)
+        values = column[:n] if column is not None else np.full(n, None, dtype=object)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        mask = np.ones(n, dtype=bool)
+        for op, operand in condition.items():
+            if op == "$eq":
+                mask &= values == operand
+            elif op == "$ne":
+                mask &= values != operand
+            elif op in ("$in", "$nin"):
+                hits = np.zeros(n, dtype=bool)
+                for item in operand:
+                    hits |= values == item
+                mask &= hits if op == "$in" else ~hits
+            else:
+                raise ValueError(f"Unsupported filter operator '{op}' for key '{key}'.")
+        return mask
+
+    # === Reads ===
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        """
+        Chroma-compatible get: returns {"ids", "documents", "metadatas"} (plus "embeddings"
+        if requested) for the given ids and/or metadata filter.
+        """
+        if ids is not None:
+            rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+        else:
+            rows = list(range(self._count))
+        mask = self._filter_mask(where)
+        if mask is not None:
+            rows = [row for row in rows if mask[row]]
+        results = {
+            "ids": [self._ids[row] for row in rows],
+            "documents": [self._texts[row] for row in rows],
+            "metadatas": [dict(self._metadatas[row]) for row in rows],
+        }
+        if include and "embeddings" in include:
+            results["embeddings"] = self._row_vectors(np.asarray(rows, dtype=np.int64)) if rows else np.zeros((0, 0), dtype=np.float32)
+        return results
+
+    def _row_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Full-precision vectors of rows, or their dequantized codes if none are kept.
+        """
+        if not self.quantization:
+            return self._vectors[rows]
+        if self._full is not None:
+            # Sorted reads page in the memory map sequentially
+            order = np.argsort(rows)
+            vectors = np.empty((len(rows), self._full.shape[1]), dtype=np.float32)
+            vectors[order] = self._full[rows[order]]
+            return vectors
+        return self._codes[rows].astype(np.float32) * self._scales[rows][:, None]
+
+    def _approximate_similarities(self, query_vector: np.ndarray) -> np.ndarray:
+        similarities = np.empty(self._count, dtype=np.float32)
+        block = np.empty((min(self.SCAN_BLOCK, self._count), self._codes.shape[1]), dtype=np.float32)
+        for start in range(0, self._count, self.SCAN_BLOCK):
+            end = min(start + self.SCAN_BLOCK, self._count)
+            np.copyto(block[:end - start], self._codes[start:end], casting="unsafe")
+            np.dot(block[:end - start], query_vector, out=similarities[start:end])
+        return similarities * self._scales[:self._count]
+
+    def _top_rows(self, query_vector: np.ndarray, k: int, filter: Optional[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        if self._count == 0 or k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        if self.quantization:
+            return self._top_rows_quantized(query_vector, k, filter)
+        similarities = self._vectors[:self._count] @ query_vector
+        return self._select_top(similarities, k, filter)
+
+    def _top_rows_quantized(self, query_vector: np.ndarray, k: int, filter: Optional[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        approximate = self._approximate_similarities(query_vector)
+        if self._full is None:
+            return self._select_top(approximate, k, filter)
+        candidates, _ = self._select_top(approximate, k * self.rerank_factor, filter)
+        if len(candidates) == 0:
+            return candidates, np.array([], dtype=np.float32)
+        exact = self._row_vectors(candidates) @ query_vector
+        order = np.argsort(-exact)[:k]
+        return candidates[order], exact[order]
+
+    def _select_top(self, similarities: np.ndarray, k: int, filter: Optional[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        mask = self._filter_mask(filter)
+        if mask is not None:
+            similarities = np.where(mask, similarities, -np.inf)
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        k = min(k, self._count)
+        rows = np.argpartition(-similarities, k - 1)[:k]
+        rows = rows[np.argsort(-similarities[rows])]
+        return rows, similarities[rows]
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        query_vector = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        rows, similarities = self._top_rows(query_vector, k, filter)
+        return [(self._document(row), float(1.0 - sim)) for row, sim in zip(rows, similarities)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        query_vector = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        rows, _ = self._top_rows(query_vector, fetch_k, filter)
+        if len(rows) == 0:
+            return []
+        selected = maximal_marginal_relevance(query_vector, self._row_vectors(rows), k=k, lambda_mult=lambda_mult)
+        return [self._document(rows[i]) for i in selected]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self._embedding_function.embed_query(query), k, fetch_k, lambda_mult, filter)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
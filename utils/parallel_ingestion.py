@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from langchain_community.document_loaders import UnstructuredFileLoader, PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger("my_app_logger")
+
+
+# (chunk_size, chunk_overlap, mode, tokenizer_name): picklable, so it can be sent to workers
+SplitterArgs = Tuple[int, int, str, Optional[str]]
+
+
+@lru_cache(maxsize=4)
+def make_splitter(chunk_size: int, chunk_overlap: int, mode: str = "characters", tokenizer_name: Optional[str] = None) -> RecursiveCharacterTextSplitter:
+    """
+    Builds the text splitter used for RAG ingestion:
+    - "characters": chunk_size and chunk_overlap are character counts.
+    - "tokens": they are counted with the embedding model's own tokenizer (tokenizer_name),
+      so chunks are packed up to the model's window instead of being truncated or left short.
+    Cached, so each worker process loads the tokenizer only once.
+    """
+    if mode == "tokens":
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        return RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            tokenizer,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+    if mode != "characters":
+        raise ValueError(f"Unknown splitter mode '{mode}'.")
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+def splitter_args(config) -> SplitterArgs:
+    if config.splitter_mode == "tokens":
+        return config.chunk_tokens, config.chunk_overlap_tokens, "tokens", config.embedding_tokenizer
+    return config.chunk_size, config.chunk_overlap, "characters", None
+
+def splitter_tag(config) -> str:
+    """
+    Suffix appended to source fingerprints so that switching to token splitting re-chunks
+    every source. Empty for the default character splitter, keeping existing registries valid.
+    """
+    chunk_size, chunk_overlap, mode, tokenizer_name = splitter_args(config)
+    if mode == "characters":
+        return ""
+    return f":{mode}:{tokenizer_name}:{chunk_size}:{chunk_overlap}"
+
+def parse_and_split_file(path: str, split_args: SplitterArgs) -> List[Document]:
+    """
+    Parses one PDF or Markdown file and splits it into chunks.
+    Runs inside a worker process, so it only takes picklable arguments.
+    """
+    if path.lower().endswith(".pdf"):
+        docs = PyPDFLoader(path).load()
+    else:
+        docs = UnstructuredFileLoader(path).load()
+    return make_splitter(*split_args).split_documents(docs)
+
+def iter_parsed_files(
+    paths: Iterable[str],
+    split_args: SplitterArgs,
+    max_workers: int = 4,
+    max_in_flight: int = 8
+) -> Iterator[Tuple[str, Optional[List[Document]], Optional[Exception]]]:
+    """
+    Parses and splits files on a process pool and yields (path, chunks, error) as files finish.
+    At most max_in_flight files are submitted at once, so only a bounded number of parsed
+    files is ever held in memory regardless of how many files there are.
+    With max_workers <= 1 files are parsed inline in the calling process.
+    """
+    if max_workers <= 1:
+        for path in paths:
+            try:
+                yield path, parse_and_split_file(path, split_args), None
+            except Exception as e:
+                yield path, None, e
+        return
+
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+
+        def submit_next():
+            path = next(paths, None)
+            if path is None:
+                return False
+            in_flight[pool.submit(parse_and_split_file, path, split_args)] = path
+            return True
+
+        while len(in_flight) < max(max_in_flight, max_workers) and submit_next():
+            pass
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    yield path, future.result(), None
+                except Exception as e:
+                    yield path, None, e
+                submit_next()
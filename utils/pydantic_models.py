@@ -284,6 +284,10 @@ class SemanticSearchInput(BaseModel):
     query: str = Field(..., description="The semantic search string.")
     filter_key: Optional[str] = Field(None, description="Metadata key to filter on (e.g., 'type_id', 'name').")
     filter_value: Optional[str] = Field(None, description="Value for the filter key.")
+    filters: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Several metadata conditions that must all hold, as {key: value}. A list value matches any of its items (e.g., {'category': ['screen', 'component_type']})."
+    )
     k: Optional[int] = Field(5, description="Number of results to return (default 5).")
 
 
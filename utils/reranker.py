@@ -0,0 +1,101 @@
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.hybrid_retrieval import doc_key
+from collections import OrderedDict
+from typing import Any, List
+import threading
+import hashlib
+import logging
+
+logger = logging.getLogger("my_app_logger")
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieval candidates with a small cross-encoder run on the CPU
+    (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2).
+    - Only (query, document) pairs missing from the score cache are scored, in batches of batch_size.
+    - Scores are cached per (query, doc id, content digest), so a rewritten doc is rescored
+      and a repeated agent query costs no model call at all.
+    - The model is loaded on first use.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, max_entries: int = 10000, device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_entries = max_entries
+        self.device = device
+        self._model = None
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                logger.info(f"Loading cross-encoder {self.model_name} on {self.device}.")
+                self._model = CrossEncoder(self.model_name, device=self.device)
+            return self._model
+
+    @staticmethod
+    def _key(query: str, doc: Document) -> tuple:
+        digest = hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=8).hexdigest()
+        return query, doc_key(doc), digest
+
+    def score(self, query: str, docs: List[Document]) -> List[float]:
+        keys = [self._key(query, doc) for doc in docs]
+        scores, missing = {}, {}
+        with self._lock:
+            for key, doc in zip(keys, docs):
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key] = self._scores[key]
+                    self.hits += 1
+                elif key not in missing:
+                    missing[key] = doc
+                    self.misses += 1
+        if missing:
+            pairs = [(query, doc.page_content) for doc in missing.values()]
+            predicted = self._load_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            with self._lock:
+                for key, value in zip(missing, predicted):
+                    scores[key] = self._scores[key] = float(value)
+                while self.max_entries and len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        return [scores[key] for key in keys]
+
+    def rerank(self, query: str, docs: List[Document], k: int = None) -> List[Document]:
+        """
+        Returns docs ordered by cross-encoder relevance (best first), cut to k if given.
+        """
+        if not docs:
+            return []
+        scores = self.score(query, docs)
+        order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+        return [docs[i] for i in order[:k]]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._scores),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Fetches a wide candidate list from retriever and returns the k best after re-ranking.
+    """
+    retriever: BaseRetriever
+    reranker: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        candidates = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.reranker.rerank(query, candidates, self.k)
@@ -0,0 +1,97 @@
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+import threading
+import logging
+import json
+
+logger = logging.getLogger("my_app_logger")
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieval results keyed on (store, query, search params).
+    Every entry is tagged with the store's write version at the time it was cached; a lookup
+    under a newer version counts as a stale miss and drops the entry, so results never
+    outlive a write to their store.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def make_key(store: str, query: str, params: dict) -> tuple:
+        return store, query, json.dumps(params, sort_keys=True, default=str)
+
+    def get(self, key: tuple, version: int) -> Optional[List[Document]]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            if cached[0] != version:
+                del self._entries[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [doc.model_copy(deep=True) for doc in cached[1]]
+
+    def put(self, key: tuple, version: int, docs: List[Document]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, [doc.model_copy(deep=True) for doc in docs])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: tuple, version: int, compute: Callable[[], List[Document]]) -> List[Document]:
+        docs = self.get(key, version)
+        if docs is None:
+            docs = compute()
+            self.put(key, version, docs)
+        return docs
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Wraps a store's retriever and answers repeated queries from the manager's
+    RetrievalCache until the store is written to.
+    """
+    retriever: BaseRetriever
+    cache: Any
+    store_name: str
+    version: Callable[[], int]
+    search_params: dict = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key = RetrievalCache.make_key(self.store_name, query, self.search_params)
+        return self.cache.get_or_compute(
+            key,
+            self.version(),
+            lambda: self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        )
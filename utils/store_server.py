@@ -0,0 +1,347 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from typing import Any, List, Optional
+import threading
+import requests
+import logging
+import json
+import os
+
+logger = logging.getLogger("my_app_logger")
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer. Waiting writers block new readers, so a steady
+    stream of searches cannot starve writes.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+def doc_to_json(doc: Document) -> dict:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+def doc_from_json(data: dict) -> Document:
+    return Document(page_content=data["page_content"], metadata=data.get("metadata") or {})
+
+def store_metadata(entry: dict) -> dict:
+    """
+    JSON-safe view of a VectorStoreManager entry: the in-process objects (vectorstore, id
+    index, BM25 index, partition factory) are left out, partitions are listed by value.
+    """
+    metadata = {
+        key: value for key, value in entry.items()
+        if key not in ("vectorstore", "id_index", "bm25", "partition_factory", "partitions")
+    }
+    metadata["partitions"] = sorted(entry.get("partitions", {}))
+    metadata["hybrid"] = entry.get("bm25") is not None
+    return metadata
+
+
+# === Server ===
+READ_METHODS = {"has_store", "stores", "get_metadata", "similarity_search", "get_by_id", "retrieve", "retrieval_cache_stats", "get", "snapshot"}
+WRITE_METHODS = {"add_documents", "delete_documents", "sync_documents", "persist", "persist_all", "restore", "invalidate", "clear_untracked"}
+
+
+class StoreService:
+    """
+    Executes manager calls for the server: reads run concurrently under the read lock,
+    writes are serialized under the write lock.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.lock = ReadWriteLock()
+        self._retrievers = {}
+        self._retrievers_lock = threading.Lock()
+
+    def call(self, method: str, params: dict):
+        if method in READ_METHODS:
+            self.lock.acquire_read()
+            try:
+                return getattr(self, "_" + method)(**params)
+            finally:
+                self.lock.release_read()
+        if method in WRITE_METHODS:
+            self.lock.acquire_write()
+            try:
+                return getattr(self, "_" + method)(**params)
+            finally:
+                self.lock.release_write()
+        raise ValueError(f"Unknown method '{method}'.")
+
+    def _retriever(self, name: str, kwargs: dict):
+        key = (name, json.dumps(kwargs, sort_keys=True))
+        with self._retrievers_lock:
+            if key not in self._retrievers:
+                self._retrievers[key] = self.manager.get_retriever(name, **kwargs)
+            return self._retrievers[key]
+
+    def _has_store(self, name):
+        return self.manager.get_store(name) is not None
+
+    def _stores(self):
+        return {name: store_metadata(entry) for name, entry in self.manager.stores.items()}
+
+    def _get_metadata(self, name):
+        entry = self.manager.get_metadata(name)
+        return store_metadata(entry) if entry else None
+
+    def _similarity_search(self, name, query, k=4, filter=None, rerank=False):
+        return [doc_to_json(doc) for doc in self.manager.similarity_search(name, query, k=k, filter=filter, rerank=rerank)]
+
+    def _get_by_id(self, name, doc_id):
+        hit = self.manager.get_by_id(name, doc_id)
+        return list(hit) if hit else None
+
+    def _get(self, name, ids=None, where=None):
+        store = self.manager.get_store(name)
+        if store is None:
+            return None
+        results = store.get(ids=ids, where=where)
+        return {key: results.get(key) for key in ("ids", "documents", "metadatas")}
+
+    def _retrieve(self, name, query, kwargs=None):
+        retriever = self._retriever(name, kwargs or {})
+        if retriever is None:
+            return []
+        return [doc_to_json(doc) for doc in retriever.invoke(query)]
+
+    def _retrieval_cache_stats(self):
+        return self.manager.retrieval_cache_stats()
+
+    def _add_documents(self, name, docs, ids=None):
+        return self.manager.add_documents(name, [doc_from_json(doc) for doc in docs], ids=ids)
+
+    def _delete_documents(self, name, ids):
+        return self.manager.delete_documents(name, ids)
+
+    def _sync_documents(self, name, docs, artifact_type):
+        return self.manager.sync_documents(name, [doc_from_json(doc) for doc in docs], artifact_type)
+
+    def _persist(self, name):
+        self.manager.persist(name)
+
+    def _persist_all(self):
+        self.manager.persist_all()
+
+    def _invalidate(self, name):
+        self.manager.invalidate(name)
+
+    def _clear_untracked(self, name):
+        return self.manager.clear_untracked(name)
+
+    def _snapshot(self, path, names=None):
+        return self.manager.snapshot(path, names)
+
+    def _restore(self, path, names=None):
+        return self.manager.restore(path, names)
+
+
+def make_handler(service: StoreService):
+    class StoreRequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                body = {"status": "success", "result": service.call(request["method"], request.get("params") or {})}
+                code = 200
+            except Exception as e:
+                logger.error(f"Store server call failed: {e}")
+                body = {"status": "error", "message": str(e)}
+                code = 500
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug("store server: " + format % args)
+
+    return StoreRequestHandler
+
+def serve(host: str = "127.0.0.1", port: int = 8765, args=None):
+    """
+    Builds the stores once in this process and serves them on localhost, e.g.:
+        python -m utils.store_server --port 8765 [--add-new] [--persist-pipeline]
+    Workers started with STORE_SERVER_URL=http://127.0.0.1:8765 then share its models and indexes.
+    """
+    import utils.vectorstores_utils as vectorstores_utils
+    manager = vectorstores_utils.init_vectorstores(args, local=True)
+    server = ThreadingHTTPServer((host, port), make_handler(StoreService(manager)))
+    print(f"Vector store server listening on http://{host}:{port} (stores: {', '.join(manager.stores)})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        manager.persist_all()
+
+
+# === Client ===
+class StoreServerError(RuntimeError):
+    pass
+
+
+class RemoteRetriever(BaseRetriever):
+    """
+    Retriever that runs on the store server with the given as_retriever kwargs.
+    """
+    client: Any
+    store_name: str
+    search_params: dict = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        results = self.client.call("retrieve", name=self.store_name, query=query, kwargs=self.search_params)
+        return [doc_from_json(doc) for doc in results]
+
+
+class RemoteStore:
+    """
+    Minimal handle for a store on the server, for callers that use a store directly.
+    """
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs) -> List[Document]:
+        return self.client.similarity_search(self.name, query, k=k, filter=filter)
+
+    def add_documents(self, docs: List[Document], ids: Optional[List[str]] = None, **kwargs):
+        return self.client.add_documents(self.name, docs, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs):
+        return self.client.delete_documents(self.name, ids or [])
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, **kwargs) -> dict:
+        return self.client.call("get", name=self.name, ids=ids, where=where)
+
+
+class RemoteVectorStoreManager:
+    """
+    Drop-in replacement for VectorStoreManager that forwards every call to a store server.
+    stores and get_metadata return JSON-safe copies of the server's entries (see
+    store_metadata), without the in-process vectorstore objects.
+    """
+
+    def __init__(self, url: str, timeout: float = 120):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = threading.local()
+
+    def _http(self) -> requests.Session:
+        if not hasattr(self._session, "session"):
+            self._session.session = requests.Session()
+        return self._session.session
+
+    def call(self, method: str, **params):
+        response = self._http().post(self.url, json={"method": method, "params": params}, timeout=self.timeout)
+        body = response.json()
+        if body.get("status") != "success":
+            raise StoreServerError(body.get("message", f"HTTP {response.status_code}"))
+        return body["result"]
+
+    def ping(self) -> bool:
+        try:
+            self.call("retrieval_cache_stats")
+            return True
+        except (requests.RequestException, StoreServerError, ValueError):
+            return False
+
+    @property
+    def stores(self) -> dict:
+        return self.call("stores")
+
+    def get_metadata(self, name):
+        return self.call("get_metadata", name=name)
+
+    def get_store(self, name):
+        return RemoteStore(self, name) if self.call("has_store", name=name) else None
+
+    def get_retriever(self, name, **kwargs):
+        if not self.call("has_store", name=name):
+            return None
+        return RemoteRetriever(client=self, store_name=name, search_params=kwargs)
+
+    def add_documents(self, name, docs: List[Document], ids: List[str] = None):
+        return self.call("add_documents", name=name, docs=[doc_to_json(doc) for doc in docs], ids=ids)
+
+    def delete_documents(self, name, ids: List[str]) -> bool:
+        return self.call("delete_documents", name=name, ids=list(ids))
+
+    def similarity_search(self, name, query: str, k: int = 4, filter: Optional[dict] = None, rerank: bool = False) -> List[Document]:
+        return [doc_from_json(doc) for doc in self.call("similarity_search", name=name, query=query, k=k, filter=filter, rerank=rerank)]
+
+    def get_by_id(self, name, doc_id):
+        hit = self.call("get_by_id", name=name, doc_id=doc_id)
+        return (hit[0], dict(hit[1])) if hit else None
+
+    def sync_documents(self, name, docs: List[Document], artifact_type: str) -> dict:
+        return self.call("sync_documents", name=name, docs=[doc_to_json(doc) for doc in docs], artifact_type=artifact_type)
+
+    def persist(self, name):
+        self.call("persist", name=name)
+
+    def persist_all(self):
+        self.call("persist_all")
+
+    def invalidate(self, name):
+        self.call("invalidate", name=name)
+
+    def clear_untracked(self, name) -> int:
+        return self.call("clear_untracked", name=name)
+
+    def snapshot(self, path: str, names: List[str] = None) -> dict:
+        # The path is resolved by the server process.
+        return self.call("snapshot", path=os.path.abspath(path), names=names)
+
+    def restore(self, path: str, names: List[str] = None) -> dict:
+        return self.call("restore", path=os.path.abspath(path), names=names)
+
+    def retrieval_cache_stats(self) -> dict:
+        return self.call("retrieval_cache_stats")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--add-new", action="store_true")
+    parser.add_argument("--persist-pipeline", action="store_true")
+    args = parser.parse_args()
+    serve(args.host, args.port, args)
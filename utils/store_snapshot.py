@@ -0,0 +1,76 @@
+from typing import Dict, List
+import numpy as np
+import json
+import os
+
+CHROMA_MAX_BATCH = 5000
+
+
+def _encode_json(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode("utf-8"), dtype=np.uint8)
+
+def _decode_json(array: np.ndarray):
+    return json.loads(array.tobytes().decode("utf-8"))
+
+def write_snapshot(path: str, stores: Dict[str, dict]):
+    """
+    Writes {name: {"ids", "vectors", "documents", "metadatas", "manifest"}} to one .npz file.
+    Vectors are stored as float32 matrices; everything else as a JSON blob per store, so the
+    file can be loaded without pickle.
+    """
+    arrays = {"__header__": _encode_json({"stores": list(stores.keys())})}
+    for name, data in stores.items():
+        vectors = np.asarray(data["vectors"], dtype=np.float32)
+        arrays[f"{name}.vectors"] = vectors if vectors.ndim == 2 else vectors.reshape(len(data["ids"]), -1)
+        arrays[f"{name}.records"] = _encode_json({
+            "ids": data["ids"],
+            "documents": data["documents"],
+            "metadatas": data["metadatas"],
+            "manifest": data.get("manifest", {})
+        })
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path[:-len(".npz")] + ".tmp.npz" if path.endswith(".npz") else path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def read_snapshot(path: str) -> Dict[str, dict]:
+    stores = {}
+    with np.load(path, allow_pickle=False) as snapshot:
+        for name in _decode_json(snapshot["__header__"])["stores"]:
+            data = _decode_json(snapshot[f"{name}.records"])
+            data["vectors"] = snapshot[f"{name}.vectors"]
+            stores[name] = data
+    return stores
+
+def export_store(vectorstore) -> dict:
+    """
+    Reads every id, vector, text and metadata out of a vectorstore (Chroma, numpy or hnsw).
+    """
+    results = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(results.get("ids", []))
+    vectors = results.get("embeddings")
+    return {
+        "ids": ids,
+        "vectors": np.asarray(vectors if vectors is not None and len(ids) else np.zeros((0, 0)), dtype=np.float32),
+        "documents": list(results.get("documents", [])),
+        "metadatas": [dict(metadata or {}) for metadata in results.get("metadatas", [])]
+    }
+
+def add_embedded(vectorstore, ids: List[str], vectors, texts: List[str], metadatas: List[dict]):
+    """
+    Writes documents with precomputed vectors, so restoring runs no model inference.
+    """
+    if not ids:
+        return
+    if hasattr(vectorstore, "add_embeddings"):
+        vectorstore.add_embeddings(ids, vectors, texts, metadatas)
+        return
+    # Chroma: upsert straight into the collection, bypassing the embedding function.
+    for start in range(0, len(ids), CHROMA_MAX_BATCH):
+        end = start + CHROMA_MAX_BATCH
+        vectorstore._collection.upsert(
+            ids=ids[start:end],
+            embeddings=np.asarray(vectors[start:end], dtype=np.float32).tolist(),
+            documents=texts[start:end],
+            metadatas=metadatas[start:end] or None
+        )
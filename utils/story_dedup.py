@@ -0,0 +1,91 @@
+from typing import Dict, List, Tuple
+import numpy as np
+import json
+
+SIMILARITY_BLOCK = 1024
+
+
+def story_text(story: dict) -> str:
+    return f"{story.get('name', '')}: {story.get('description', '')}"
+
+def duplicate_pairs(vectors: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Returns the (i, j) pairs with i < j whose cosine similarity is at least threshold.
+    Similarities are computed one block of rows at a time, so memory stays O(block * n).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    pairs = []
+    for start in range(0, len(unit), SIMILARITY_BLOCK):
+        similarities = unit[start:start + SIMILARITY_BLOCK] @ unit.T
+        rows, cols = np.nonzero(similarities >= threshold)
+        rows += start
+        upper = rows < cols
+        pairs.append(np.stack([rows[upper], cols[upper]], axis=1))
+    return np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int64)
+
+def cluster_duplicates(vectors: np.ndarray, threshold: float) -> List[List[int]]:
+    """
+    Groups rows into clusters of near-duplicates (union-find over the duplicate pairs).
+    Each cluster is sorted by row, and only clusters with more than one row are returned.
+    """
+    parent = list(range(len(vectors)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in duplicate_pairs(vectors, threshold):
+        root_i, root_j = find(int(i)), find(int(j))
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    clusters = {}
+    for i in range(len(vectors)):
+        clusters.setdefault(find(i), []).append(i)
+    return [rows for rows in clusters.values() if len(rows) > 1]
+
+
+def dedupe_stories(stories: List[dict], embedding, threshold: float = 0.92, merge: bool = True) -> Tuple[List[dict], Dict]:
+    """
+    Finds near-duplicate stories by the cosine similarity of their name + description embeddings.
+    The first story of each cluster is kept as its representative and lists the others in
+    "duplicate_story_ids"; the others get "duplicate_of".
+    - merge=True: duplicates are dropped from the returned list, so no flow is generated for them.
+    - merge=False: all stories are returned, only flagged.
+    The report counts the flow-generation calls merging avoids (one per dropped story).
+    """
+    if len(stories) < 2:
+        return list(stories), {"stories": len(stories), "clusters": [], "duplicates": 0, "llm_calls_avoided": 0}
+    vectors = np.asarray(embedding.embed_documents([story_text(story) for story in stories]), dtype=np.float32)
+    clusters = cluster_duplicates(vectors, threshold)
+
+    stories = [dict(story) for story in stories]
+    dropped = set()
+    report_clusters = []
+    for rows in clusters:
+        representative = stories[rows[0]]
+        representative["duplicate_story_ids"] = [stories[row].get("id") for row in rows[1:]]
+        for row in rows[1:]:
+            stories[row]["duplicate_of"] = representative.get("id")
+            dropped.add(row)
+        report_clusters.append({
+            "kept": {"id": representative.get("id"), "name": representative.get("name")},
+            "duplicates": [{"id": stories[row].get("id"), "name": stories[row].get("name")} for row in rows[1:]]
+        })
+
+    kept = [story for row, story in enumerate(stories) if not (merge and row in dropped)]
+    report = {
+        "stories": len(stories),
+        "threshold": threshold,
+        "clusters": report_clusters,
+        "duplicates": len(dropped),
+        "llm_calls_avoided": len(dropped) if merge else 0
+    }
+    return kept, report
+
+def save_dedup_report(report: Dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -1,12 +1,27 @@
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from dotenv import load_dotenv
-from langchain_community.document_loaders import DirectoryLoader, WebBaseLoader, PyPDFLoader
+from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import InMemoryByteStore
+from utils.document_registry import sync_rag_sources
+from utils.web_cache import load_web_documents
+from utils.numpy_vectorstore import NumpyVectorStore
+from utils.hnsw_vectorstore import HNSWVectorStore
+from utils.retrieval_cache import RetrievalCache, CachedRetriever
+from utils.hybrid_retrieval import BM25Index, HybridRetriever, reciprocal_rank_fusion
+from utils.reranker import CrossEncoderReranker, RerankingRetriever
+from utils.store_server import RemoteVectorStoreManager
+from utils.store_snapshot import write_snapshot, read_snapshot, export_store, add_embedded
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from pathlib import Path
+import hashlib
+import uuid
 import logging
+import json
 import os
 import argparse
 
@@ -19,6 +34,16 @@ class AppConfig(BaseSettings):
     information_chroma_path: str = "rag_store_information"
     questions_chroma_path: str = "rag_store_questions"
     story_pipeline_chroma_path: str = "rag_store_story_pipeline"
+    pipeline_manifest_name: str = "pipeline_manifest.json"
+    document_registry_name: str = "document_registry.json"
+    pipeline_partition_key: Optional[str] = None  # e.g. "category" to keep one sub-collection per category
+    pipeline_backend: str = "chroma"  # "chroma" or "numpy" (in-process)
+    information_backend: str = "chroma"  # "chroma", "numpy" (memory-mapped) or "hnsw" (approximate search, for large corpora)
+    hnsw_ef_search: int = 64
+    hnsw_ef_construction: int = 200
+    hnsw_m: int = 16
+    numpy_quantization: Optional[str] = None  # "int8" keeps int8 codes in memory and re-ranks candidates from memory-mapped float32
+    numpy_rerank_factor: int = 4  # 0 drops the float32 vectors entirely (int8 scores only)
     urls: List[str] = [
         "https://m3.material.io/components/buttons/overview",
         "https://www.atlassian.com/agile/project-management/user-stories",
@@ -33,9 +58,34 @@ class AppConfig(BaseSettings):
         "https://developer.android.com/topic/architecture",
         "https://reactnative.dev/docs/navigation"
     ]
+    web_cache_dir: str = "rag_docs/web_cache"
+    web_max_workers: int = 8
+    web_per_host_limit: int = 2
+    web_timeout: int = 30
+    ingest_workers: int = 4
+    ingest_max_in_flight: int = 8
+    embed_batch_size: int = 256
+    # MinHash Jaccard threshold (e.g. 0.9) for dropping near-duplicate chunks; None disables it.
+    # Chunks are only compared within one source, so text repeated across pages (shared nav/footer) is kept.
+    dedup_threshold: Optional[float] = None
+    dedup_num_perm: int = 128
     chunk_size: int = 500
     chunk_overlap: int = 100
+    splitter_mode: str = "characters"  # "characters" or "tokens" (measured with embedding_tokenizer)
+    chunk_tokens: int = 380  # all-mpnet-base-v2 reads at most 384 tokens, including [CLS]/[SEP]
+    chunk_overlap_tokens: int = 64
+    embedding_tokenizer: str = "sentence-transformers/all-mpnet-base-v2"
     search_k: int = 4
+    retrieval_cache_size: int = 1024  # 0 disables the retrieval cache
+    hybrid_stores: List[str] = []  # stores that keep a BM25 index, e.g. ["rag_info", "pipeline_parts"]
+    rrf_k: int = 60
+    rerank_model: Optional[str] = None  # e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2" to re-rank agent RAG results
+    rerank_candidates: int = 20  # candidates fetched per query before re-ranking down to k
+    rerank_batch_size: int = 32
+    rerank_cache_size: int = 10000  # cached (query, doc) scores
+    snapshot_path: str = "snapshots/vectorstores.npz"
+    snapshot_stores: List[str] = ["pipeline_parts"]  # in-memory stores that would otherwise be re-embedded after a crash
+    store_server_url: Optional[str] = None  # e.g. http://127.0.0.1:8765 to share stores served by utils/store_server.py
 
 config = AppConfig()
 
@@ -58,28 +108,19 @@ def load_markdown() -> List:
 
 def load_web() -> List:
     docs = []
-    for url in config.urls:
-        try:
-            loader = WebBaseLoader(url)
-            docs.extend(loader.load())
-        except Exception as e:
-            logger.error(f"Failed to load {url}: {e}")
+    for url_docs in load_web_documents(config.urls, config).values():
+        docs.extend(url_docs)
     return docs
 
-def add_new_documents(vectorstore: Chroma, embedding: HuggingFaceEmbeddings, config: AppConfig) -> Chroma:
-    new_docs = []
-    new_docs.extend(load_pdfs())
-    new_docs.extend(load_markdown())
-    new_docs.extend(load_web())
-    if new_docs:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap
-        )
-        split_new_docs = splitter.split_documents(new_docs)
-        vectorstore.add_documents(split_new_docs)
-        vectorstore.persist()
-        logger.info(f"Added {len(split_new_docs)} new document chunks to the vectorstore.")
+def add_new_documents(vectorstore: Chroma, embedding: HuggingFaceEmbeddings, config: AppConfig, store_path: str = None) -> Chroma:
+    """
+    Embeds only the PDFs, Markdown files and web pages that are new or changed since the last
+    sync, using the document registry stored next to the vectorstore.
+    """
+    store_path = store_path or config.information_chroma_path
+    stats = sync_rag_sources(vectorstore, config, os.path.join(store_path, config.document_registry_name))
+    if stats["chunks_added"] or stats["chunks_deleted"]:
+        logger.info(f"Added {stats['chunks_added']} and removed {stats['chunks_deleted']} document chunks in the vectorstore.")
     else:
         logger.info("No new documents found to add.")
     return vectorstore
@@ -95,96 +136,615 @@ def prepare_empty_vectorstore(embedding: HuggingFaceEmbeddings) -> Chroma:
     # Create an empty vectorstore in memory (no documents)
     return Chroma(embedding_function=embedding)
 
+def create_vectorstore(backend: str, embedding: HuggingFaceEmbeddings, store_path: str = None, **options):
+    """
+    Creates (or reopens) a vectorstore with the given backend:
+    - "chroma": Chroma, persistent at store_path or in-memory if store_path is None.
+    - "numpy": in-process NumpyVectorStore with exact (or int8-quantized) search, persisted as
+      memory-mapped .npy files at store_path if given.
+    - "hnsw": HNSWVectorStore with approximate search, persistent at store_path if given.
+      options are passed through (ef_search, ef_construction, M).
+    """
+    if backend == "chroma":
+        if store_path is None:
+            return prepare_empty_vectorstore(embedding)
+        return Chroma(persist_directory=store_path, embedding_function=embedding, **options)
+    if backend == "numpy":
+        return NumpyVectorStore(embedding, persist_directory=store_path, **options)
+    if backend == "hnsw":
+        return HNSWVectorStore(embedding, persist_directory=store_path, **options)
+    raise ValueError(f"Unknown vectorstore backend '{backend}'.")
+
+def hnsw_options(config: AppConfig) -> dict:
+    return {"ef_search": config.hnsw_ef_search, "ef_construction": config.hnsw_ef_construction, "M": config.hnsw_m}
+
+def numpy_options(config: AppConfig) -> dict:
+    return {"quantization": config.numpy_quantization, "rerank_factor": config.numpy_rerank_factor}
+
+def backend_options(backend: str, config: AppConfig) -> dict:
+    if backend == "numpy":
+        return numpy_options(config)
+    if backend == "hnsw":
+        return hnsw_options(config)
+    return {}
+
+def prepare_pipeline_vectorstore(embedding: HuggingFaceEmbeddings, store_path: str = None, backend: str = "chroma"):
+    """
+    Prepares the pipeline_parts vectorstore:
+    - With the "numpy" or "hnsw" backend, creates (or reopens) an in-process store.
+    - If store_path is None, creates an empty in-memory vectorstore (rebuilt every run).
+    - Otherwise opens (or creates) a persistent vectorstore at store_path, so previously
+      synced themes, epics, stories and flows survive between runs.
+    """
+    if backend != "chroma" or store_path is None:
+        return create_vectorstore(backend, embedding, store_path, **backend_options(backend, config))
+    vectorstore = create_vectorstore(backend, embedding, store_path)
+    logger.info(f"Opened persistent pipeline vectorstore at {store_path}.")
+    return vectorstore
+
+def prepare_pipeline_partition(embedding: HuggingFaceEmbeddings, store_path: str, value: str, backend: str = "chroma"):
+    """
+    Opens (or creates) the sub-collection of the pipeline vectorstore for one partition value.
+    """
+    collection_name = "pipeline_parts_" + "".join(c if c.isalnum() else "_" for c in value)
+    if backend != "chroma":
+        partition_path = os.path.join(store_path, "partitions", collection_name) if store_path else None
+        return create_vectorstore(backend, embedding, partition_path, **backend_options(backend, config))
+    return Chroma(
+        collection_name=collection_name,
+        persist_directory=store_path,
+        embedding_function=embedding
+    )
+
+def content_hash(doc: Document) -> str:
+    """
+    Returns a stable hash of a document's text and metadata.
+    """
+    payload = json.dumps(
+        {"page_content": doc.page_content, "metadata": doc.metadata},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_manifest(manifest_path: str) -> dict:
+    if not manifest_path or not os.path.isfile(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to read manifest {manifest_path}, starting from an empty one: {e}")
+        return {}
+
+def save_manifest(manifest_path: str, manifest: dict):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
 def prepare_vectorstore(
     embedding: HuggingFaceEmbeddings,
     config: AppConfig,
     add_new: bool = False,
-    store_path: str = None
-) -> Chroma:
+    store_path: str = None,
+    backend: str = "chroma"
+):
     """
-    Prepares a Chroma vectorstore:
-    - If the store_path does not exist, loads all documents, splits them, and creates a new persistent vectorstore.
+    Prepares a persistent RAG vectorstore (Chroma, or the "numpy" or "hnsw" backend):
+    - If the store_path does not exist, creates a new persistent vectorstore and embeds all documents.
     - If the store_path exists, loads the existing vectorstore.
-    - If add_new is True, loads new documents and adds them to the existing vectorstore.
+    - If add_new is True, embeds only new or changed documents and drops chunks of removed ones.
     - Handles empty document lists gracefully.
     """
-    # Create new vectorstore if path does not exist
-    if not os.path.exists(store_path):
-        docs = load_all_documents()
-        if docs:
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=config.chunk_size,
-                chunk_overlap=config.chunk_overlap
-            )
-            split_docs = splitter.split_documents(docs)
-            vectorstore = Chroma.from_documents(
-                split_docs,
-                embedding,
-                persist_directory=store_path
-            )
-            logger.info(f"Created new vectorstore at {store_path} with {len(split_docs)} chunks.")
-        else:
-            # Create an empty persistent vectorstore
-            vectorstore = Chroma(
-                persist_directory=store_path,
-                embedding_function=embedding
-            )
-            logger.info(f"Created empty vectorstore at {store_path}.")
+    is_new = not os.path.exists(store_path)
+    vectorstore = create_vectorstore(backend, embedding, store_path, **backend_options(backend, config))
+    if is_new:
+        logger.info(f"Created new vectorstore at {store_path}.")
     else:
-        # Load existing vectorstore
-        vectorstore = Chroma(
-            persist_directory=store_path,
-            embedding_function=embedding
-        )
         logger.info(f"Loaded existing vectorstore from {store_path}.")
-        # Optionally add new documents
-        if add_new:
-            vectorstore = add_new_documents(vectorstore, embedding, config)
+    if is_new or add_new:
+        vectorstore = add_new_documents(vectorstore, embedding, config, store_path)
     return vectorstore
 
+def build_metadata_filter(conditions: dict) -> Optional[dict]:
+    """
+    Builds a Chroma-style metadata filter from {key: value} conditions.
+    List values match any of their items ($in); several conditions are combined with $and.
+    """
+    clauses = []
+    for key, value in (conditions or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append({key: values[0]} if len(values) == 1 else {key: {"$in": values}})
+        else:
+            clauses.append({key: value})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def filter_partition_values(metadata_filter: Optional[dict], key: str) -> Optional[List]:
+    """
+    Returns the values of key that a metadata filter restricts results to, or None if the
+    filter does not pin key down (so every partition has to be searched).
+    """
+    if not metadata_filter:
+        return None
+    clauses = metadata_filter.get("$and", [metadata_filter])
+    for clause in clauses:
+        if key not in clause:
+            continue
+        condition = clause[key]
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                return [condition["$eq"]]
+            if "$in" in condition:
+                return list(condition["$in"])
+            return None
+        return [condition]
+    return None
+
 class VectorStoreManager:
     def __init__(self):
         self.stores = {}
+        self.retrieval_cache = RetrievalCache(config.retrieval_cache_size)
+        self.reranker = CrossEncoderReranker(
+            config.rerank_model, batch_size=config.rerank_batch_size, max_entries=config.rerank_cache_size
+        ) if config.rerank_model else None
 
-    def add_store(self, name, vectorstore, file_path=None, embedding_model=None):
+    def add_store(self, name, vectorstore=None, file_path=None, embedding_model=None, index_ids=False,
+                  partition_key=None, partition_factory=None, backend=None, embedding=None, backend_options=None,
+                  hybrid=False):
+        """
+        Registers a vectorstore. If vectorstore is None, one is created with the given backend
+        ("chroma", "numpy" or "hnsw") from embedding, persisted at file_path when the backend
+        supports it; backend_options are passed to the backend (e.g. ef_search for hnsw).
+        With index_ids=True the manager keeps an in-process
+        id -> (document, metadata) index for the store, so exact-id reads never hit the
+        vector DB. The index is only consistent if writes go through add_documents,
+        delete_documents and sync_documents.
+        With partition_key set, every write is mirrored into a sub-collection per value of
+        that metadata key (created with partition_factory(value)), and similarity_search
+        only scans the partitions a filter pins down.
+        With hybrid=True a BM25 index is kept next to the store, and its retrievers and
+        similarity_search fuse keyword and dense rankings.
+        """
+        if vectorstore is None:
+            if embedding is None:
+                raise ValueError(f"Store '{name}' needs either a vectorstore or an embedding to build one.")
+            vectorstore = create_vectorstore(backend or "chroma", embedding, file_path, **(backend_options or {}))
+        manifest_path = os.path.join(file_path, config.pipeline_manifest_name) if file_path else None
         self.stores[name] = {
             "vectorstore": vectorstore,
+            "backend": backend or type(vectorstore).__name__,
             "file_path": file_path,
-            "embedding_model": embedding_model
+            "embedding_model": embedding_model,
+            "manifest_path": manifest_path,
+            "manifest": load_manifest(manifest_path),
+            "id_index": self._build_id_index(vectorstore) if index_ids else None,
+            "partition_key": partition_key if partition_factory else None,
+            "partition_factory": partition_factory,
+            "partitions": {},
+            "bm25": BM25Index.from_vectorstore(vectorstore) if hybrid else None,
+            "version": 0,
+            "dirty": False
         }
+        if self.stores[name]["partition_key"]:
+            # Reopen the partitions a persistent store already mirrors its documents into.
+            metadatas = vectorstore.get(include=["metadatas"]).get("metadatas", [])
+            for value in {(metadata or {}).get(partition_key) for metadata in metadatas}:
+                self._partition(self.stores[name], value)
+
+    @staticmethod
+    def _build_id_index(vectorstore) -> dict:
+        # Persistent stores may already hold documents from a previous run.
+        results = vectorstore.get(include=["documents", "metadatas"])
+        id_index = {}
+        for doc_id, text, metadata in zip(results.get("ids", []), results.get("documents", []), results.get("metadatas", [])):
+            id_index[doc_id] = (text, dict(metadata or {}))
+        return id_index
 
     def get_store(self, name):
         entry = self.stores.get(name)
         return entry["vectorstore"] if entry else None
 
-    def get_retriever(self, name, **kwargs):
+    def get_retriever(self, name, cache=True, hybrid=True, rerank=False, **kwargs):
+        """
+        Returns a retriever for the named store. For stores with a BM25 index (and hybrid=True)
+        the dense retriever is fused with keyword search. With rerank=True and a rerank_model
+        configured, rerank_candidates hits are re-ranked by the cross-encoder down to k.
+        With cache=True, results are served from the retrieval cache until the store is
+        written to through the manager.
+        """
         store = self.get_store(name)
-        if store:
-            return store.as_retriever(**kwargs)
-        return None
+        if not store:
+            return None
+        rerank = rerank and self.reranker is not None
+        search_kwargs = dict(kwargs.pop("search_kwargs", None) or {})
+        k = search_kwargs.get("k", 4)
+        if rerank:
+            search_kwargs["k"] = max(k, config.rerank_candidates)
+            if "fetch_k" in search_kwargs:
+                search_kwargs["fetch_k"] = max(search_kwargs["fetch_k"], search_kwargs["k"])
+        retriever = store.as_retriever(search_kwargs=search_kwargs, **kwargs)
+        search_params = {"search_type": retriever.search_type, "search_kwargs": retriever.search_kwargs}
+        bm25 = self.stores[name]["bm25"]
+        if hybrid and bm25 is not None:
+            retriever = HybridRetriever(
+                dense=retriever, index=bm25, k=retriever.search_kwargs.get("k", 4), rrf_k=config.rrf_k,
+                filter=retriever.search_kwargs.get("filter")
+            )
+            search_params["hybrid"] = True
+        if rerank:
+            retriever = RerankingRetriever(retriever=retriever, reranker=self.reranker, k=k)
+            search_params["rerank"] = {"model": config.rerank_model, "k": k}
+        if not cache:
+            return retriever
+        return CachedRetriever(
+            retriever=retriever,
+            cache=self.retrieval_cache,
+            store_name=name,
+            version=lambda: self.stores[name]["version"],
+            search_params=search_params
+        )
+
+    def invalidate(self, name):
+        """
+        Bumps the write version of the named store, so cached retrieval results for it are
+        dropped. Called by every manager write; call it after writing to a store directly.
+        """
+        entry = self.stores.get(name)
+        if entry:
+            entry["version"] += 1
+
+    def persist(self, name):
+        """
+        Writes a file-backed in-process store (numpy, hnsw) and its partitions to disk if it
+        was written to since the last save. Writes through the manager only mark the store
+        dirty, so callers persist at stage boundaries rather than on every write.
+        Chroma persists on its own, so this is a no-op for it.
+        """
+        entry = self.stores.get(name)
+        if not entry or not entry["file_path"] or not entry["dirty"]:
+            return
+        for store in [entry["vectorstore"], *entry["partitions"].values()]:
+            if hasattr(store, "persist"):
+                store.persist()
+        entry["dirty"] = False
+
+    def persist_all(self):
+        for name in self.stores:
+            self.persist(name)
+
+    def retrieval_cache_stats(self) -> dict:
+        stats = self.retrieval_cache.stats()
+        if self.reranker is not None:
+            stats["rerank_scores"] = self.reranker.stats()
+        return stats
 
     def get_metadata(self, name):
         return self.stores.get(name)
 
+    def _partition(self, entry, value, create=True):
+        """
+        Returns the partition for value. Writes create it; reads and deletes pass create=False
+        and get None for a value nothing was ever written under.
+        """
+        value = str(value) if value is not None else "uncategorized"
+        if value not in entry["partitions"]:
+            if not create:
+                return None
+            entry["partitions"][value] = entry["partition_factory"](value)
+        return entry["partitions"][value]
+
+    def _partition_value(self, entry, metadata):
+        value = metadata.get(entry["partition_key"])
+        if value is None:
+            logger.warning(f"Document {metadata.get('id')} has no '{entry['partition_key']}'; storing it as uncategorized.")
+        return value
+
+    def add_documents(self, name, docs: List[Document], ids: List[str] = None):
+        """
+        Adds documents to the named store, overwriting any document with the same id.
+        ids default to each doc's metadata["id"] (a uuid is generated if it has none).
+        Returns the ids written, or None if the store does not exist.
+        """
+        entry = self.stores.get(name)
+        if not entry:
+            return None
+        if ids is None:
+            ids = [str(doc.metadata.get("id") or uuid.uuid4()) for doc in docs]
+        if not docs:
+            return []
+        entry["vectorstore"].add_documents(docs, ids=ids)
+        self.invalidate(name)
+        if entry["partition_key"]:
+            by_partition = {}
+            for doc_id, doc in zip(ids, docs):
+                value = self._partition_value(entry, doc.metadata)
+                previous = entry["id_index"].get(doc_id) if entry["id_index"] is not None else None
+                if previous and previous[1].get(entry["partition_key"]) != value:
+                    # The doc moved to another partition; drop the stale copy.
+                    stale = self._partition(entry, previous[1].get(entry["partition_key"]), create=False)
+                    if stale is not None:
+                        stale.delete(ids=[doc_id])
+                by_partition.setdefault(value, ([], []))
+                by_partition[value][0].append(doc)
+                by_partition[value][1].append(doc_id)
+            for value, (partition_docs, partition_ids) in by_partition.items():
+                self._partition(entry, value).add_documents(partition_docs, ids=partition_ids)
+        if entry["id_index"] is not None:
+            for doc_id, doc in zip(ids, docs):
+                entry["id_index"][doc_id] = (doc.page_content, dict(doc.metadata))
+        if entry["bm25"] is not None:
+            entry["bm25"].add(ids, [doc.page_content for doc in docs], [doc.metadata for doc in docs])
+        entry["dirty"] = True
+        return ids
+
+    def delete_documents(self, name, ids: List[str]) -> bool:
+        """
+        Deletes documents by id from the named store. Returns False if the store does not exist.
+        """
+        entry = self.stores.get(name)
+        if not entry:
+            return False
+        if ids:
+            entry["vectorstore"].delete(ids=list(ids))
+            self.invalidate(name)
+            if entry["partition_key"]:
+                if entry["id_index"] is not None:
+                    for doc_id in ids:
+                        hit = entry["id_index"].get(doc_id)
+                        partition = self._partition(entry, hit[1].get(entry["partition_key"]), create=False) if hit else None
+                        if partition is not None:
+                            partition.delete(ids=[doc_id])
+                else:
+                    for partition in entry["partitions"].values():
+                        partition.delete(ids=list(ids))
+            if entry["id_index"] is not None:
+                for doc_id in ids:
+                    entry["id_index"].pop(doc_id, None)
+            if entry["bm25"] is not None:
+                entry["bm25"].delete(ids)
+            entry["dirty"] = True
+        return True
+
+    def similarity_search(self, name, query: str, k: int = 4, filter: Optional[dict] = None, rerank: bool = False) -> List[Document]:
+        """
+        Runs a similarity search with an optional metadata filter. For partitioned stores,
+        only the partitions the filter pins down are scanned; hits from several partitions
+        are merged by score. With rerank=True (and a rerank_model configured) the cross-encoder
+        picks the k best of rerank_candidates hits. Results are cached until the store is written to.
+        """
+        entry = self.stores.get(name)
+        if not entry:
+            return []
+        if not (rerank and self.reranker is not None):
+            key = RetrievalCache.make_key(name, query, {"search_type": "similarity", "k": k, "filter": filter})
+            return self.retrieval_cache.get_or_compute(
+                key, entry["version"], lambda: self._similarity_search(entry, query, k, filter)
+            )
+        key = RetrievalCache.make_key(name, query, {"search_type": "similarity", "k": k, "filter": filter, "rerank": config.rerank_model})
+        candidates = max(k, config.rerank_candidates)
+        return self.retrieval_cache.get_or_compute(
+            key, entry["version"], lambda: self.reranker.rerank(query, self._similarity_search(entry, query, candidates, filter), k)
+        )
+
+    def _similarity_search(self, entry, query: str, k: int, filter: Optional[dict]) -> List[Document]:
+        dense_docs = self._dense_search(entry, query, k, filter)
+        if entry["bm25"] is None:
+            return dense_docs
+        keyword_docs = [doc for doc, _ in entry["bm25"].search(query, k=k, filter=filter)]
+        return reciprocal_rank_fusion([dense_docs, keyword_docs], k=config.rrf_k)[:k]
+
+    def _dense_search(self, entry, query: str, k: int, filter: Optional[dict]) -> List[Document]:
+        values = filter_partition_values(filter, entry["partition_key"]) if entry["partition_key"] else None
+        if values is None:
+            return entry["vectorstore"].similarity_search(query, k=k, filter=filter)
+        partitions = [self._partition(entry, value, create=False) for value in values]
+        partitions = [partition for partition in partitions if partition is not None]
+        if len(partitions) == 1:
+            return partitions[0].similarity_search(query, k=k, filter=filter)
+        scored = []
+        for partition in partitions:
+            scored.extend(partition.similarity_search_with_score(query, k=k, filter=filter))
+        # Chroma scores are distances: lower is closer.
+        scored.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in scored[:k]]
+
+    def snapshot(self, path: str, names: List[str] = None) -> dict:
+        """
+        Dumps the ids, vectors, texts and metadata of the named stores (all by default),
+        plus their sync manifests, to one binary .npz file. Returns {name: document count}.
+        """
+        names = [name for name in (names or self.stores.keys()) if name in self.stores]
+        stores = {}
+        for name in names:
+            data = export_store(self.stores[name]["vectorstore"])
+            data["manifest"] = self.stores[name]["manifest"]
+            stores[name] = data
+        write_snapshot(path, stores)
+        counts = {name: len(data["ids"]) for name, data in stores.items()}
+        logger.info(f"Wrote vectorstore snapshot {path}: {counts}")
+        return counts
+
+    def restore(self, path: str, names: List[str] = None) -> dict:
+        """
+        Replaces the contents of registered stores with a snapshot, reusing the stored vectors
+        so no model inference runs. Partitions, the id index, the BM25 index and the sync
+        manifest are rebuilt to match. Returns {name: document count}.
+        """
+        snapshot = read_snapshot(path)
+        counts = {}
+        for name, data in snapshot.items():
+            entry = self.stores.get(name)
+            if not entry or (names and name not in names):
+                continue
+            self.delete_documents(name, entry["vectorstore"].get()["ids"])
+            ids, vectors = data["ids"], data["vectors"]
+            texts, metadatas = data["documents"], data["metadatas"]
+            add_embedded(entry["vectorstore"], ids, vectors, texts, metadatas)
+            if entry["partition_key"]:
+                by_partition = {}
+                for row, metadata in enumerate(metadatas):
+                    by_partition.setdefault(metadata.get(entry["partition_key"]), []).append(row)
+                for value, rows in by_partition.items():
+                    add_embedded(
+                        self._partition(entry, value), [ids[row] for row in rows], vectors[rows],
+                        [texts[row] for row in rows], [metadatas[row] for row in rows]
+                    )
+            if entry["id_index"] is not None:
+                entry["id_index"] = {doc_id: (text, dict(metadata)) for doc_id, text, metadata in zip(ids, texts, metadatas)}
+            if entry["bm25"] is not None:
+                entry["bm25"].add(ids, texts, metadatas)
+            entry["manifest"] = data.get("manifest", {})
+            if entry["manifest_path"]:
+                save_manifest(entry["manifest_path"], entry["manifest"])
+            self.invalidate(name)
+            entry["dirty"] = True
+            self.persist(name)
+            counts[name] = len(ids)
+        logger.info(f"Restored vectorstore snapshot {path}: {counts}")
+        return counts
+
+    def get_by_id(self, name, doc_id):
+        """
+        Returns (page_content, metadata) for an exact id, or None if it is not found.
+        Indexed stores answer from the in-process index; others fall back to a metadata lookup.
+        """
+        entry = self.stores.get(name)
+        if not entry or not doc_id:
+            return None
+        if entry["id_index"] is not None:
+            hit = entry["id_index"].get(doc_id)
+            return (hit[0], dict(hit[1])) if hit else None
+        results = entry["vectorstore"].get(where={"id": doc_id})
+        if results and results.get("documents") and results.get("metadatas"):
+            return results["documents"][0], dict(results["metadatas"][0])
+        return None
+
+    def sync_documents(self, name, docs: List[Document], artifact_type: str) -> dict:
+        """
+        Brings every artifact of artifact_type in the named store in line with docs.
+        Each doc must carry its artifact id in metadata["id"], which is also used as the
+        vectorstore id. Only the delta is written:
+        - docs whose id is not in the manifest are added,
+        - docs whose content hash changed are re-embedded,
+        - ids in the manifest that are no longer in docs are deleted.
+        The manifest is saved next to persistent stores so the next run only syncs changes.
+        """
+        entry = self.stores.get(name)
+        if not entry:
+            raise KeyError(f"Vectorstore '{name}' not found.")
+        known = entry["manifest"].get(artifact_type, {})
+
+        current = {}
+        for doc in docs:
+            doc_id = doc.metadata.get("id")
+            if not doc_id:
+                logger.warning(f"Skipping {artifact_type} without an id: {doc.metadata.get('name')}")
+                continue
+            current[str(doc_id)] = doc
+
+        hashes = {doc_id: content_hash(doc) for doc_id, doc in current.items()}
+        to_write = [doc_id for doc_id, h in hashes.items() if known.get(doc_id) != h]
+        to_remove = [doc_id for doc_id in known if doc_id not in current]
+        added = sum(1 for doc_id in to_write if doc_id not in known)
+
+        self.delete_documents(name, to_remove)
+        self.add_documents(name, [current[doc_id] for doc_id in to_write], ids=to_write)
+        self.persist(name)
+
+        entry["manifest"][artifact_type] = hashes
+        if entry["manifest_path"]:
+            save_manifest(entry["manifest_path"], entry["manifest"])
+
+        stats = {
+            "added": added,
+            "updated": len(to_write) - added,
+            "removed": len(to_remove),
+            "unchanged": len(current) - len(to_write)
+        }
+        logger.info(f"Synced {artifact_type} docs into '{name}': {stats}")
+        return stats
+
+    def clear_untracked(self, name) -> int:
+        """
+        Deletes the documents of the named store that no sync manifest tracks: the screens,
+        component types, component instances and boxes agents write during a run. Called when
+        a persistent pipeline store is opened, so they never leak into a later run.
+        Returns the number of documents deleted.
+        """
+        entry = self.stores.get(name)
+        if not entry:
+            return 0
+        tracked = {doc_id for hashes in entry["manifest"].values() for doc_id in hashes}
+        untracked = [doc_id for doc_id in entry["vectorstore"].get()["ids"] if doc_id not in tracked]
+        self.delete_documents(name, untracked)
+        self.persist(name)
+        return len(untracked)
+
 manager = None  # Will be initialized by init_vectorstores()
 
-def init_vectorstores(args=None):
+def init_vectorstores(args=None, local=False):
+    """
+    Builds the stores and installs them in the module-level manager. If store_server_url is
+    configured (and local is False), the manager forwards to that shared store server instead.
+    """
     global manager
+    if config.store_server_url and not local:
+        remote = RemoteVectorStoreManager(config.store_server_url)
+        if remote.ping():
+            logger.info(f"Using shared vector store server at {config.store_server_url}.")
+            manager = remote
+            return manager
+        logger.warning(f"Vector store server at {config.store_server_url} is not reachable; building local stores.")
     manager = VectorStoreManager()
     # If args is None, parse them here
     if args is None:
         parser = argparse.ArgumentParser()
         parser.add_argument("--add-new", action="store_true")
+        parser.add_argument("--persist-pipeline", action="store_true")
         args, _ = parser.parse_known_args()
 
         # General story info vectorstore (persistent)
     embedding_story = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
-    vectorstore_story = prepare_vectorstore(embedding_story, config, args.add_new, config.information_chroma_path)
-    manager.add_store("rag_info", vectorstore_story, file_path=config.information_chroma_path, embedding_model="sentence-transformers/all-mpnet-base-v2")
+    information_path = config.information_chroma_path
+    if config.information_backend != "chroma":
+        # Kept apart from the Chroma store, whose registry would mark every source as embedded.
+        information_path += "_" + config.information_backend
+    vectorstore_story = prepare_vectorstore(embedding_story, config, args.add_new, information_path, config.information_backend)
+    manager.add_store(
+        "rag_info", vectorstore_story, file_path=information_path,
+        embedding_model="sentence-transformers/all-mpnet-base-v2", backend=config.information_backend,
+        hybrid="rag_info" in config.hybrid_stores
+    )
 
-    # Empty themes/epics/stories vectorstore (non-persistent, always empty)
+    # Themes/epics/stories vectorstore (in-memory by default, persistent with --persist-pipeline)
+    pipeline_path = config.story_pipeline_chroma_path if getattr(args, "persist_pipeline", False) else None
+    backend = config.pipeline_backend
     embedding_themes = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore_themes = prepare_empty_vectorstore(embedding_themes)
-    manager.add_store("pipeline_parts", vectorstore_themes, file_path=None, embedding_model="sentence-transformers/all-MiniLM-L6-v2")
+    partition_factory = None
+    if config.pipeline_partition_key:
+        # Partitions mirror the main collection, so cache embeddings to embed each doc only once.
+        embedding_themes = CacheBackedEmbeddings.from_bytes_store(
+            embedding_themes, InMemoryByteStore(), namespace="all-MiniLM-L6-v2"
+        )
+        partition_factory = lambda value: prepare_pipeline_partition(embedding_themes, pipeline_path, value, backend)
+    vectorstore_themes = prepare_pipeline_vectorstore(embedding_themes, pipeline_path, backend)
+    manager.add_store(
+        "pipeline_parts", vectorstore_themes, file_path=pipeline_path,
+        embedding_model="sentence-transformers/all-MiniLM-L6-v2", index_ids=True, backend=backend,
+        partition_key=config.pipeline_partition_key, partition_factory=partition_factory,
+        hybrid="pipeline_parts" in config.hybrid_stores
+    )
+    if pipeline_path:
+        # Only the synced themes, epics, stories and flows carry over between runs.
+        cleared = manager.clear_untracked("pipeline_parts")
+        if cleared:
+            logger.info(f"Removed {cleared} agent-written docs left in pipeline_parts by an earlier run.")
 
     return manager
@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.documents import Document
+from urllib.parse import urlparse
+from typing import Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup
+import threading
+import requests
+import hashlib
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger("my_app_logger")
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+class HTTPResponseCache:
+    """
+    On-disk cache of HTTP responses keyed by URL. Stores the body plus the ETag and
+    Last-Modified validators so later fetches can be sent as conditional requests.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        meta_path, body_path = self._paths(url)
+        if not (os.path.isfile(meta_path) and os.path.isfile(body_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def read_body(self, url: str, encoding: str = "utf-8") -> str:
+        _, body_path = self._paths(url)
+        with open(body_path, "rb") as f:
+            return f.read().decode(encoding or "utf-8", errors="replace")
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self.lookup(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response: requests.Response):
+        meta_path, body_path = self._paths(url)
+        encoding = response.encoding or response.apparent_encoding or "utf-8"
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(response.content)
+        os.replace(body_path + ".tmp", body_path)
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": encoding,
+            "fetched_at": time.time()
+        }
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+_thread_state = threading.local()
+
+def _session() -> requests.Session:
+    # requests.Session is not thread-safe, so every worker thread gets its own.
+    if not hasattr(_thread_state, "session"):
+        _thread_state.session = requests.Session()
+        _thread_state.session.headers.update(DEFAULT_HEADERS)
+    return _thread_state.session
+
+def fetch_url(url: str, cache: HTTPResponseCache, timeout: float = 30) -> Tuple[str, bool]:
+    """
+    Fetches a URL with a conditional request. Returns (html, from_cache); from_cache is True
+    when the server answered 304 Not Modified and the cached body was used. A 304 without a
+    cached body to reuse (the entry is gone, or the server ignored the validators) is followed
+    by a plain GET.
+    """
+    response = _session().get(url, headers=cache.conditional_headers(url), timeout=timeout)
+    if response.status_code == 304:
+        entry = cache.lookup(url)
+        if entry is not None:
+            return cache.read_body(url, entry.get("encoding")), True
+        logger.warning(f"{url} answered 304 but nothing is cached for it; fetching it in full.")
+        response = _session().get(url, headers={"Cache-Control": "no-cache"}, timeout=timeout)
+        if response.status_code == 304:
+            raise requests.HTTPError(f"304 Not Modified for an unconditional request to {url}", response=response)
+    response.raise_for_status()
+    cache.store(url, response)
+    return response.content.decode(response.encoding or response.apparent_encoding or "utf-8", errors="replace"), False
+
+def fetch_urls(
+    urls: List[str],
+    cache_dir: str,
+    max_workers: int = 8,
+    per_host_limit: int = 2,
+    timeout: float = 30
+) -> Dict[str, Tuple[str, bool]]:
+    """
+    Fetches URLs concurrently, allowing at most per_host_limit requests in flight per host.
+    Returns {url: (html, from_cache)} for every URL that could be fetched; failures are logged.
+    """
+    cache = HTTPResponseCache(cache_dir)
+    host_limits = {}
+    host_limits_lock = threading.Lock()
+
+    def host_slot(url):
+        host = urlparse(url).netloc
+        with host_limits_lock:
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(per_host_limit)
+            return host_limits[host]
+
+    def fetch(url):
+        with host_slot(url):
+            try:
+                return url, fetch_url(url, cache, timeout)
+            except Exception as e:
+                logger.error(f"Failed to load {url}: {e}")
+                return url, None
+
+    results = {}
+    if not urls:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+        for url, result in pool.map(fetch, urls):
+            if result is not None:
+                results[url] = result
+    cached = sum(1 for _, from_cache in results.values() if from_cache)
+    logger.info(f"Fetched {len(results)}/{len(urls)} URLs ({cached} unchanged, served from cache).")
+    return results
+
+def html_to_documents(url: str, html: str) -> List[Document]:
+    """
+    Turns a fetched page into documents the same way WebBaseLoader does.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    metadata = {"source": url}
+    if soup.find("title"):
+        metadata["title"] = soup.find("title").get_text()
+    description = soup.find("meta", attrs={"name": "description"})
+    if description:
+        metadata["description"] = description.get("content", "No description found.")
+    html_tag = soup.find("html")
+    if html_tag:
+        metadata["language"] = html_tag.get("lang", "No language found.")
+    return [Document(page_content=soup.get_text(), metadata=metadata)]
+
+def load_web_documents(urls: List[str], config) -> Dict[str, List[Document]]:
+    """
+    Fetches the configured URLs concurrently through the response cache and returns
+    {url: documents} in the order of urls.
+    """
+    pages = fetch_urls(
+        urls,
+        config.web_cache_dir,
+        max_workers=config.web_max_workers,
+        per_host_limit=config.web_per_host_limit,
+        timeout=config.web_timeout
+    )
+    return {url: html_to_documents(url, pages[url][0]) for url in urls if url in pages}
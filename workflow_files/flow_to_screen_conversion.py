@@ -265,13 +265,19 @@ batch_delete_component_instances_tool = StructuredTool.from_function(
     func=lambda instance_ids: batch_delete_component_instances(instance_ids, component_instances, screens)
 )
 semantic_search_structured_tool = StructuredTool.from_function(
-    func=lambda query, filter_key=None, filter_value=None, k=5: semantic_search_tool(
-        query, filter_key, filter_value, vectorstore_name="pipeline_parts", k=k
+    func=lambda query, filter_key=None, filter_value=None, k=5, filters=None: semantic_search_tool(
+        query, filter_key, filter_value, vectorstore_name="pipeline_parts", k=k, filters=filters
     ),
     name="semantic_search_tool",
-    description="Performs a semantic search in the vectorstore with an optional metadata filter. "
-        "Valid filter keys: id, name, type_id, supported_props, component_instance_ids, props, category. "
-        "Use 'category' to filter for 'screen', 'component_type', or 'component_instance'. "
+    description="Performs a semantic search in the vectorstore with optional metadata filters. "
+        "Valid filter keys: id, name, type_id, supported_props, component_instance_ids, props, category, screen_id, story_category. "
+        "Use 'category' to filter for 'screen', 'component_type', or 'component_instance' "
+        "(pipeline artifacts use 'theme', 'epic', 'story' and 'flow'). "
+        "Use 'story_category' to filter stories by area, e.g. {'category': 'story', 'story_category': 'frontend'} "
+        "(values include 'frontend' and 'backend'). "
+        "Use 'filters' to combine several conditions in one call, e.g. "
+        "{'category': 'component_instance', 'screen_id': 'abc123'}; a list value matches any of its items, "
+        "e.g. {'category': ['screen', 'component_type']}. "
         "Returns matching items' metadata.",
     args_schema=SemanticSearchInput
 )
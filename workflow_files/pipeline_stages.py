@@ -0,0 +1,238 @@
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.documents import Document
+from workflow_files.story_creation import (
+    interactive_theme_generation, interactive_epic_generation, parallel_epic_generation,
+    generate_user_stories, story_progress_path
+)
+from workflow_files.stories_to_flow import generate_user_flows
+from utils.story_dedup import dedupe_stories, save_dedup_report
+from utils.checkpoints import CheckpointStore
+import utils.vectorstores_utils as vectorstores_utils
+import json
+import os
+
+
+LLM_MODELS = {
+    "anthropic": ("claude-3-5-sonnet-20241022", "anthropic"),
+    "openai": ("gpt-4o-mini", "gpt4o_mini"),
+    "gemini": ("gemini-2.5-flash", "gemini_flash")
+}
+
+
+def make_llm(name: str, rate_limiter=None):
+    """
+    Builds the chat model main.py uses for name ("anthropic", "openai" or "gemini"), optionally
+    throttled by a shared rate limiter. Returns (llm, file tag).
+    """
+    model, tag = LLM_MODELS[name]
+    if name == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(model=model, temperature=0, rate_limiter=rate_limiter), tag
+    if name == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, temperature=0, rate_limiter=rate_limiter), tag
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, temperature=0, rate_limiter=rate_limiter), tag
+
+
+def pipeline_files(workspace: str, tag: str = "") -> dict:
+    """
+    Paths of the story pipeline's artifacts inside workspace; tag (e.g. the LLM name) is added
+    to the theme, epic and story files.
+    """
+    suffix = f"_{tag}" if tag else ""
+    return {
+        "themes": os.path.join(workspace, f"themes{suffix}.json"),
+        "epics": os.path.join(workspace, f"epics{suffix}.json"),
+        "user_stories": os.path.join(workspace, f"user_stories{suffix}.json"),
+        "flows": os.path.join(workspace, "user_flows.json"),
+        "story_dedup_report": os.path.join(workspace, "story_dedup_report.json"),
+        "checkpoints": os.path.join(workspace, "pipeline_checkpoints.jsonl")
+    }
+
+
+def run_story_stages(llm, app_query, files, args, store_name="pipeline_parts", on_stage_synced=None):
+    """
+    Runs themes -> epics -> user stories -> user flows for one app query. Each stage is
+    skipped if its file in files already exists, and its artifacts are synced into the
+    store_name vectorstore, which is persisted at the end of each stage (covering the agent
+    writes made during it). on_stage_synced(stage) is called after that.
+    args carries the stage options of main.py (refine_themes, parallel_epics, llm_workers,
+    dedup_stories, story_similarity, resume).
+    Theme iterations and per-theme epic batches are checkpointed to files["checkpoints"]; with
+    args.resume a stage that stopped part-way continues from its last checkpoint even if its
+    file exists. Story generation always resumes from its own per-epic checkpoints.
+    Returns the themes, epics, user stories and flows.
+    """
+    theme_file, epics_file, user_stories_file, flows_file = files["themes"], files["epics"], files["user_stories"], files["flows"]
+    on_stage_synced = on_stage_synced or (lambda stage: None)
+    def stage_done(stage):
+        vectorstores_utils.manager.persist(store_name)
+        on_stage_synced(stage)
+    flows = []
+    checkpoints = CheckpointStore(files["checkpoints"])
+    unfinished = lambda stage, *parts: args.resume and checkpoints.started(stage, *parts) and not checkpoints.is_complete(stage)
+
+#region: Story Generation
+    #Theme generation
+    resume_themes = unfinished("themes")
+    if resume_themes:
+        print(f"Theme generation stopped part-way. Resuming from checkpoints in {files['checkpoints']}...")
+        interactive_theme_generation(
+            llm, app_query, theme_file, vectorstores_utils.manager, refine_themes=args.refine_themes, checkpoints=checkpoints, resume=True
+        )
+    elif not os.path.exists(theme_file):
+        print(f"{theme_file} does not exist. Creating new themes...")
+        # New themes get new ids, so older theme and epic checkpoints no longer apply.
+        checkpoints.clear("themes", "epics", "epic_questions", "epic_answers")
+        interactive_theme_generation(llm, app_query, theme_file, vectorstores_utils.manager, refine_themes=args.refine_themes, checkpoints=checkpoints)
+    else:
+        print(f"{theme_file} exists. Skipping theme generation.")
+    
+    with open(theme_file, "r", encoding="utf-8") as f:
+        themes = json.load(f)
+    
+    theme_docs = [
+        Document(
+            page_content=theme["description"],
+            metadata={
+                "name": theme["name"],
+                "id": theme["id"],
+                "type": "theme",
+                "category": "theme"
+            }
+        )
+        for theme in themes
+    ]
+    print(f"Loaded {len(theme_docs)} themes from {theme_file}")
+    sync_stats = vectorstores_utils.manager.sync_documents(store_name, theme_docs, "theme")
+    print(f"Themes synced to pipeline retriever: {sync_stats}")
+    stage_done("theme")
+
+    #Epic generation
+    #Only create new epics if epics_file does not exist
+    resume_epics = unfinished("epics", "epic_questions", "epic_answers")
+    if resume_epics or not os.path.exists(epics_file):
+        if resume_epics:
+            print(f"Epic generation stopped part-way. Resuming from checkpoints in {files['checkpoints']}...")
+        else:
+            print(f"{epics_file} does not exist. Creating new epics...")
+            checkpoints.clear("epics", "epic_questions", "epic_answers")
+        if args.parallel_epics:
+            parallel_epic_generation(
+                llm, themes, epics_file, vectorstores_utils.manager, max_workers=args.llm_workers, checkpoints=checkpoints, resume=resume_epics
+            )
+        else:
+            interactive_epic_generation(llm, themes, epics_file, vectorstores_utils.manager, checkpoints=checkpoints, resume=resume_epics)
+    else:
+        print(f"{epics_file} exists. Skipping epic generation.")
+
+    with open(epics_file, "r", encoding="utf-8") as f:
+        epics = json.load(f)
+
+    epic_docs = [
+        Document(
+            page_content=epic["description"],
+            metadata={
+                "name": epic["name"],
+                "id": epic["id"],
+                "theme_id": epic["theme_id"],
+                "type": "epic",
+                "category": "epic"
+            }
+        )
+        for epic in epics
+    ]
+    print(f"Loaded {len(epic_docs)} epics from {epics_file}")
+    sync_stats = vectorstores_utils.manager.sync_documents(store_name, epic_docs, "epic")
+    print(f"Epics synced to pipeline retriever: {sync_stats}")
+    stage_done("epic")
+
+    # User story generation
+    # A leftover progress file means the last run stopped part-way; generate_user_stories resumes it.
+    if not os.path.exists(user_stories_file) or os.path.exists(story_progress_path(user_stories_file)):
+        print(f"{user_stories_file} does not exist or is incomplete. Creating new user stories...")
+        generate_user_stories(llm, epics, user_stories_file, max_workers=args.llm_workers)
+    else:
+        print(f"{user_stories_file} exists. Skipping user story generation.")
+
+    with open(user_stories_file, "r", encoding="utf-8") as f:
+        user_stories = json.load(f)
+
+    story_docs = [
+        Document(
+            page_content=story["description"],
+            metadata={
+                "name": story["name"],
+                "id": story["id"],
+                "epic_id": story["epic_id"],
+                "theme_id": story["theme_id"],
+                "type": "story",
+                "category": "story",
+                "story_category": story.get("category", "general")  # frontend, backend, ...
+            }
+        )
+        for story in user_stories
+    ]
+    print(f"Loaded {len(story_docs)} user stories from {user_stories_file}")
+    sync_stats = vectorstores_utils.manager.sync_documents(store_name, story_docs, "story")
+    print(f"User stories synced to pipeline retriever: {sync_stats}")
+    stage_done("story")
+#endregion
+    
+#region: Flow Generation
+    # Generate user flows from user stories
+    if os.path.exists(user_stories_file):
+        with open(user_stories_file, "r", encoding="utf-8") as f:
+            all_user_stories = json.load(f)
+        # Filter for frontend user stories (category/type may be "frontend" or similar)
+        frontend_user_stories = [
+            story for story in all_user_stories
+            if story.get("category", story.get("category", "")).lower() == "frontend"
+        ]
+        print(f"Found {len(frontend_user_stories)} frontend user stories.")
+    else:
+        print(f"{user_stories_file} does not exist. No user stories to generate flows.")
+        frontend_user_stories = []
+
+    if frontend_user_stories:
+        if not os.path.exists(flows_file):
+            if args.dedup_stories:
+                # Reuse the pipeline store's (cached) embedding model when it is in this process
+                store = vectorstores_utils.manager.get_store(store_name)
+                story_embedding = getattr(store, "embeddings", None) or HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+                frontend_user_stories, dedup_report = dedupe_stories(
+                    frontend_user_stories, story_embedding, threshold=args.story_similarity, merge=args.dedup_stories == "merge"
+                )
+                save_dedup_report(dedup_report, files["story_dedup_report"])
+                print(f"Story dedup: {dedup_report['duplicates']} near-duplicate stories in {len(dedup_report['clusters'])} clusters "
+                      f"(threshold {args.story_similarity}); flow-generation LLM calls avoided: {dedup_report['llm_calls_avoided']}.")
+            # Generate flows and save to file
+            generate_user_flows(llm, frontend_user_stories, flows_file)
+        else:
+            print(f"{flows_file} exists. Skipping flow generation.")
+
+        # Add flows to vector DB
+        with open(flows_file, "r", encoding="utf-8") as f:
+            flows = json.load(f)
+
+        flow_docs = [
+            Document(
+                page_content=flow["description"] + "\n\nSteps:\n" + json.dumps(flow.get("steps", []), indent=2),
+                metadata={
+                    "name": flow["name"],
+                    "id": flow["flow_id"],
+                    "type": "flow",
+                    "category": "flow"
+                }
+            )
+            for flow in flows
+        ]
+        sync_stats = vectorstores_utils.manager.sync_documents(store_name, flow_docs, "flow")
+        print(f"Flows synced to pipeline retriever: {sync_stats}")
+        stage_done("flow")
+    else:
+        print("No frontend user stories found.")
+#endregion
+
+    return {"themes": themes, "epics": epics, "user_stories": user_stories, "flows": flows}
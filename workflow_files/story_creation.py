@@ -1,44 +1,139 @@
 import uuid
 import json
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, messages_from_dict, messages_to_dict
 from langchain.memory import ConversationBufferMemory
 from utils.llm_utils import *
 from utils.vectorstores_utils import manager
 from llm_tools.stories_to_box_tools import make_rag_tool, ask_user_tool
-from prompts.story_creation_prompts import theme_generator_instructions, question_agent_instructions, epic_generator_instructions, user_story_generator_instructions
+from prompts.story_creation_prompts import theme_generator_instructions, question_agent_instructions, epic_generator_instructions, user_story_generator_instructions, epic_question_instructions, epic_batch_generator_instructions, theme_refinement_instructions
 from langchain.tools import Tool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.checkpoints import CheckpointStore
+import os
 
 
 
-def interactive_theme_generation(llm, app_query, theme_file, manager):
+def apply_theme_changes(themes, changes):
+    """
+    Applies a theme refinement response to themes. Updated themes keep their id and position,
+    added themes get a new id, and themes the response does not mention are left untouched.
+    Returns (themes, stats).
+    """
+    by_id = {theme["id"]: theme for theme in themes}
+    stats = {"updated": 0, "added": 0, "removed": 0}
+    updated = {}
+    for change in changes.get("updated", []):
+        theme = by_id.get(change.get("id"))
+        if not theme or not change.get("name") or not change.get("description"):
+            print(f"Skipping theme update for unknown or incomplete theme: {change}")
+            continue
+        if (theme["name"], theme["description"]) != (change["name"], change["description"]):
+            updated[theme["id"]] = dict(theme, name=change["name"], description=change["description"])
+            stats["updated"] += 1
+    removed = {theme_id for theme_id in changes.get("removed", []) if theme_id in by_id}
+    stats["removed"] = len(removed)
+
+    refined = [updated.get(theme["id"], theme) for theme in themes if theme["id"] not in removed]
+    for theme in changes.get("added", []):
+        if "name" in theme and "description" in theme:
+            refined.append({"name": theme["name"], "description": theme["description"], "id": str(uuid.uuid4())})
+            stats["added"] += 1
+    stats["unchanged"] = len(themes) - stats["updated"] - stats["removed"]
+    return refined, stats
+
+
+def refine_affected_themes(llm, themes, analysis_text):
+    """
+    Regenerates only the themes affected by the analysis of the user's answers.
+    """
+    if not analysis_text:
+        return themes, {"updated": 0, "added": 0, "removed": 0, "unchanged": len(themes)}
+    refinement_input = json.dumps({"themes": themes, "analysis": analysis_text})
+    response = call_agent(llm, build_prompt(escape_curly_braces(theme_refinement_instructions)), refinement_input, tools=[])
+    changes = extract_json_from_llm(response)
+    if not isinstance(changes, dict):
+        print("Failed to extract theme changes; keeping the current themes.")
+        return themes, {"updated": 0, "added": 0, "removed": 0, "unchanged": len(themes)}
+    return apply_theme_changes(themes, changes)
+
+
+def interactive_theme_generation(llm, app_query, theme_file, manager, refine_themes=False, checkpoints=None, resume=False):
+    """
+    Generates themes and asks the question agent for clarifications until it has none left.
+    By default every round regenerates all themes. With refine_themes=True, only the first
+    round does; later rounds rewrite just the themes the answers affect and keep every
+    theme id stable, so epics and stories built on the other themes stay valid.
+    With checkpoints, the loop state (themes, asked questions, analysis, chat history) is
+    saved after the themes of each iteration are generated and after its questions are
+    answered; resume=True continues from the last saved step.
+    """
     memory = ConversationBufferMemory(
         memory_key="chat_history",
         return_messages=True
      )
-    story_retriever = manager.get_retriever("rag_info", search_type="mmr", search_kwargs={"k": 5})
+    story_retriever = manager.get_retriever("rag_info", search_type="mmr", search_kwargs={"k": 5}, rerank=True)
     tools = []
     asked_questions = set()
+    all_themes = []
+    analysis_text = None
+    iteration = 0
+    skip_generation = False
+
+    def save_iteration(phase):
+        if checkpoints is not None:
+            checkpoints.put("themes", str(iteration), {
+                "phase": phase,
+                "themes": all_themes,
+                "asked_questions": sorted(asked_questions),
+                "analysis_text": analysis_text,
+                "memory": messages_to_dict(memory.chat_memory.messages)
+            })
+
+    if resume and checkpoints is not None and checkpoints.items("themes"):
+        iteration = max(int(key) for key in checkpoints.items("themes"))
+        state = checkpoints.get("themes", str(iteration))
+        all_themes = state["themes"]
+        asked_questions = set(state["asked_questions"])
+        analysis_text = state["analysis_text"]
+        memory.chat_memory.messages = messages_from_dict(state["memory"])
+        if state["phase"] == "generated":
+            # Themes were saved; the crash happened while asking questions.
+            skip_generation = True
+        else:
+            iteration += 1
+        print(f"Resuming theme generation at iteration {iteration} ({len(all_themes)} themes, {len(asked_questions)} questions asked).")
 
     while True:
-        theme_prompt_template = build_prompt(escape_curly_braces(theme_generator_instructions))
-        theme_response = call_agent(llm, theme_prompt_template, app_query, tools, memory)
-        themes_data = extract_json_from_llm(theme_response)
-        if not themes_data:
-            print("Failed to extract JSON from theme_response.")
-            themes_data = {}
-
-        all_themes = []
-        for theme in themes_data.get("theme", []):
-            theme_id = str(uuid.uuid4())
-            theme["id"] = theme_id
-            all_themes.append(theme)
+        if skip_generation:
+            skip_generation = False
+            changed = True
+        elif refine_themes and all_themes:
+            all_themes, refine_stats = refine_affected_themes(llm, all_themes, analysis_text)
+            print(f"\nRefined themes: {refine_stats}")
+            changed = refine_stats["updated"] or refine_stats["added"] or refine_stats["removed"]
+        else:
+            theme_prompt_template = build_prompt(escape_curly_braces(theme_generator_instructions))
+            theme_response = call_agent(llm, theme_prompt_template, app_query, tools, memory)
+            themes_data = extract_json_from_llm(theme_response)
+            if not themes_data:
+                print("Failed to extract JSON from theme_response.")
+                themes_data = {}
+
+            all_themes = []
+            for theme in themes_data.get("theme", []):
+                theme_id = str(uuid.uuid4())
+                theme["id"] = theme_id
+                all_themes.append(theme)
+            changed = True
         print("\nGenerated themes:")
         for idx, theme in enumerate(all_themes, 1):
             print(f"{idx}. {theme.get('name', '')}: {theme.get('description', '')}")
 
-        # Write themes to file after every iteration
-        with open(theme_file, "w") as f:
-            json.dump(all_themes, f, indent=2)
+        # Write themes to file after every iteration that changed them
+        if changed:
+            with open(theme_file, "w") as f:
+                json.dump(all_themes, f, indent=2)
+        save_iteration("generated")
 
         ask_user_tool_lc = Tool(
             name="ask_user_tool",
@@ -62,7 +157,8 @@ def interactive_theme_generation(llm, app_query, theme_file, manager):
         # Parse the JSON output for questions and analysis
         try:
             response_json = extract_json_from_llm(question_response)
-            response_json = json.loads(response_json)
+            if isinstance(response_json, str):
+                response_json = json.loads(response_json)
             questions_list = response_json.get("questions", [])
         except Exception:
             print("Failed to parse questions from LLM, skipping.")
@@ -87,14 +183,23 @@ def interactive_theme_generation(llm, app_query, theme_file, manager):
             if analysis and question_text:
                 analysis_entry = f"Analysis for '{question_text}': {analysis}"
                 analysis_entries.append(analysis_entry)
+        analysis_text = None
         if analysis_entries:
             analysis_text = "\n".join(analysis_entries)
             print("\nAnalysis of user answers:")
             print(analysis_text)
-            memory.append(AIMessage(content=json.dumps(themes_data)))
-            memory.append(AIMessage(content=analysis_text))
+            memory.chat_memory.add_message(AIMessage(content=json.dumps({"theme": all_themes})))
+            memory.chat_memory.add_message(AIMessage(content=analysis_text))
+
+        save_iteration("answered")
+        iteration += 1
 
-        print("\nRegenerating themes with updated information...\n")
+        if refine_themes and analysis_text:
+            print("\nRefining the themes affected by the answers...\n")
+        else:
+            print("\nRegenerating themes with updated information...\n")
+    if checkpoints is not None:
+        checkpoints.complete("themes")
     return all_themes
 
 
@@ -131,9 +236,18 @@ def interactive_epic_generation(llm, themes, epic_file, manager):
 
 
 
-def interactive_epic_generation(llm, themes, epic_file, manager):
+def interactive_epic_generation(llm, themes, epic_file, manager, checkpoints=None, resume=False):
+    """
+    Generates the epics of one theme at a time. With checkpoints, each theme's epics are saved
+    as soon as they are generated, and resume=True skips the themes already saved.
+    """
     epics = []
+    done = checkpoints.items("epics") if checkpoints is not None and resume else {}
     for theme in themes:
+        if theme['id'] in done:
+            print(f"\nReusing checkpointed epics for theme: {theme['name']}")
+            epics.extend(done[theme['id']])
+            continue
         print(f"\nGenerating epics for theme: {theme['name']}")
         epic_prompt_template = build_prompt(escape_curly_braces(epic_generator_instructions))
         theme_context = json.dumps(theme)
@@ -145,72 +259,245 @@ def interactive_epic_generation(llm, themes, epic_file, manager):
         tools = [ask_user_tool_lc]
         memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
         epic_response = call_agent(llm, epic_prompt_template, theme_context, tools, memory)
-        epic_data = extract_json_from_llm(epic_response)
+        theme_epics = epics_from_response(epic_response, theme)
+        if checkpoints is not None:
+            checkpoints.put("epics", theme['id'], theme_epics)
+        epics.extend(theme_epics)
 
-        # Ensure epic_data is a list of epics
-        # Ensure epic_data is a list of epics
-        if isinstance(epic_data, dict) and "epics" in epic_data:
-            epic_list = epic_data["epics"]
-        elif isinstance(epic_data, list):
-            epic_list = epic_data
+    # Save epics to file
+    with open(epic_file, "w", encoding="utf-8") as f:
+        json.dump(epics, f, indent=2)
+    print(f"Epics saved to {epic_file}")
+    if checkpoints is not None:
+        checkpoints.complete("epics")
+
+
+def epics_from_response(epic_response, theme):
+    """
+    Parses an epic generator response into complete epics with a new id and the theme's id.
+    """
+    epic_data = extract_json_from_llm(epic_response)
+
+    # Ensure epic_data is a list of epics
+    if isinstance(epic_data, dict) and "epics" in epic_data:
+        epic_list = epic_data["epics"]
+    elif isinstance(epic_data, list):
+        epic_list = epic_data
+    else:
+        print("Failed to extract epics for theme:", theme['name'])
+        return []
+
+    # Add unique id and theme_id to each epic
+    epics = []
+    for epic in epic_list:
+        if "name" in epic and "description" in epic:
+            epic['id'] = str(uuid.uuid4())
+            epic['theme_id'] = theme['id']
+            epics.append(epic)
         else:
-            print("Failed to extract epics for theme:", theme['name'])
-            continue
+            print(f"Skipping incomplete epic: {epic}")
+    return epics
+
+
+def collect_epic_questions(llm, theme, themes):
+    """
+    Asks the LLM which clarifying questions it needs answered before generating epics for theme.
+    """
+    question_input = json.dumps({
+        "theme": theme,
+        "other_themes": [other["name"] for other in themes if other is not theme]
+    })
+    response = call_agent(llm, build_prompt(escape_curly_braces(epic_question_instructions)), question_input, tools=[])
+    data = extract_json_from_llm(response)
+    questions = data.get("questions", []) if isinstance(data, dict) else []
+    return [str(q.get("question", "") if isinstance(q, dict) else q).strip() for q in questions if q]
+
+
+def generate_epics_for_theme(llm, theme, clarifications):
+    theme_context = json.dumps({"theme": theme, "clarifications": clarifications})
+    epic_response = call_agent(llm, build_prompt(escape_curly_braces(epic_batch_generator_instructions)), theme_context, tools=[])
+    return epics_from_response(epic_response, theme)
+
+
+def parallel_epic_generation(llm, themes, epic_file, manager, max_workers=4, checkpoints=None, resume=False):
+    """
+    Epic generation without per-theme blocking on the user:
+    - the clarifying questions for every theme are collected concurrently,
+    - themes without questions start generating epics right away,
+    - all questions are shown to the user as a single batch while those run,
+    - the remaining themes then generate their epics concurrently with their answers.
+    Epics are saved in theme order.
+    With checkpoints, each theme's questions, the answer batch and each theme's epics are
+    saved as they arrive; resume=True reuses them, so no question is asked twice.
+    """
+    saved = lambda stage: checkpoints.items(stage) if checkpoints is not None and resume else {}
+    done, saved_questions, saved_answers = saved("epics"), saved("epic_questions"), saved("epic_answers")
+    pending = [theme for theme in themes if theme['id'] not in done]
+    if len(pending) < len(themes):
+        print(f"\nReusing checkpointed epics for {len(themes) - len(pending)} of {len(themes)} themes.")
+
+    def theme_questions(theme):
+        if theme['id'] in saved_questions:
+            return saved_questions[theme['id']]
+        collected = collect_epic_questions(llm, theme, themes)
+        if checkpoints is not None:
+            checkpoints.put("epic_questions", theme['id'], collected)
+        return collected
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        print(f"\nCollecting clarifying questions for {len(pending)} themes...")
+        questions = list(pool.map(theme_questions, pending))
+
+        futures = {}
+        for index, theme in enumerate(pending):
+            if not questions[index]:
+                futures[pool.submit(generate_epics_for_theme, llm, theme, {})] = theme
+            elif theme['id'] in saved_answers:
+                futures[pool.submit(generate_epics_for_theme, llm, theme, saved_answers[theme['id']])] = theme
+
+        # Questions are prefixed with their theme so one batch can cover every theme.
+        labeled = {}
+        for index, theme in enumerate(pending):
+            if theme['id'] in saved_answers:
+                continue
+            for question in questions[index]:
+                labeled[f"[{theme['name']}] {question}"] = (index, question)
+        if labeled:
+            print(f"\n{len(labeled)} clarifying questions for {len(pending) - len(futures)} themes "
+                  f"({len(futures)} themes are already generating epics):")
+            answers = json.loads(ask_user_tool(json.dumps(list(labeled))))
+        else:
+            answers = {}
+
+        clarifications = {}
+        for label, (index, question) in labeled.items():
+            clarifications.setdefault(index, {})[question] = answers.get(label, "")
+        for index, theme_clarifications in clarifications.items():
+            if checkpoints is not None:
+                checkpoints.put("epic_answers", pending[index]['id'], theme_clarifications)
+            futures[pool.submit(generate_epics_for_theme, llm, pending[index], theme_clarifications)] = pending[index]
 
-        # Add unique id and theme_id to each epic
-        for epic in epic_list:
-            if "name" in epic and "description" in epic:
-                epic['id'] = str(uuid.uuid4())
-                epic['theme_id'] = theme['id']
-                epics.append(epic)
-            else:
-                print(f"Skipping incomplete epic: {epic}")
+        for future in as_completed(futures):
+            theme = futures[future]
+            theme_epics = future.result()
+            if checkpoints is not None:
+                checkpoints.put("epics", theme['id'], theme_epics)
+            print(f"Generated {len(theme_epics)} epics for theme: {theme['name']}")
+            done[theme['id']] = theme_epics
+
+    epics = [epic for theme in themes for epic in done.get(theme['id'], [])]
 
     # Save epics to file
     with open(epic_file, "w", encoding="utf-8") as f:
         json.dump(epics, f, indent=2)
     print(f"Epics saved to {epic_file}")
+    if checkpoints is not None:
+        checkpoints.complete("epics")
 
 
-def generate_user_stories(llm, epics, user_stories_file):
-    user_stories = []
-    for epic in epics:
-        print(f"\nGenerating user stories for epic: {epic['name']}")
-        # Build a prompt for user story generation
-        user_story_prompt = f"""
-            EPIC:
-            Name: {epic['name']}
-            Description: {epic['description']}
-        """
-
-        # Call the LLM to generate user stories
-        user_story_response = call_agent(
-            llm,
-            build_prompt(escape_curly_braces(user_story_generator_instructions)),
-            input_text=user_story_prompt,
-            tools=[],  # No tools
-            memory=None,
-            verbose=True
-        )
-        stories_json = extract_json_from_llm(user_story_response)
-        if isinstance(stories_json, dict):
-            stories_list = stories_json["stories"]
-        elif isinstance(stories_json, list):
-            stories_list = stories_json
+def generate_stories_for_epic(llm, epic):
+    """
+    Generates the user stories of one epic. Returns None if the response could not be parsed.
+    """
+    # Build a prompt for user story generation
+    user_story_prompt = f"""
+        EPIC:
+        Name: {epic['name']}
+        Description: {epic['description']}
+    """
+
+    # Call the LLM to generate user stories
+    user_story_response = call_agent(
+        llm,
+        build_prompt(escape_curly_braces(user_story_generator_instructions)),
+        input_text=user_story_prompt,
+        tools=[],  # No tools
+        memory=None,
+        verbose=True
+    )
+    stories_json = extract_json_from_llm(user_story_response)
+    if isinstance(stories_json, dict):
+        stories_list = stories_json.get("stories", [])
+    elif isinstance(stories_json, list):
+        stories_list = stories_json
+    else:
+        print("Failed to extract stories for epic:", epic['name'])
+        return None
+
+    stories = []
+    for story in stories_list:
+        if "name" in story and "description" in story:
+            story['id'] = str(uuid.uuid4())
+            story['epic_id'] = epic['id']
+            story['theme_id'] = epic['theme_id']
+            stories.append(story)
         else:
-            print("Failed to extract stories for epic:", epic['name'])
+            print(f"Skipping incomplete story: {story}")
+    return stories
+
+
+def story_progress_path(user_stories_file):
+    return os.path.splitext(user_stories_file)[0] + ".jsonl"
+
+
+def generate_stories_with_retries(llm, epic, max_attempts=3):
+    """
+    Calls generate_stories_for_epic up to max_attempts times, until the response parses.
+    Returns None if every attempt failed.
+    """
+    for attempt in range(max_attempts):
+        try:
+            stories = generate_stories_for_epic(llm, epic)
+        except Exception as e:
+            print(f"User story generation failed for epic {epic['name']} (attempt {attempt + 1}/{max_attempts}): {e}")
             continue
+        if stories is not None:
+            return stories
+        print(f"Unparseable user stories for epic {epic['name']} (attempt {attempt + 1}/{max_attempts}).")
+    return None
+
 
-        for story in stories_list:
-            if "name" in story and "description" in story:
-                story['id'] = str(uuid.uuid4())
-                story['epic_id'] = epic['id']
-                story['theme_id'] = epic['theme_id']
-                user_stories.append(story)
-            else:
-                print(f"Skipping incomplete story: {story}")
+def generate_user_stories(llm, epics, user_stories_file, max_workers=4, max_attempts=3):
+    """
+    Generates user stories for up to max_workers epics at a time, trying each epic up to
+    max_attempts times. Each epic's stories are checkpointed to <user_stories_file>.jsonl as
+    soon as they finish, and a restarted run only generates the epics missing from it. The
+    progress file is created before any epic starts, so an interrupted run always leaves it behind.
+    The stories are saved to user_stories_file in epic order. If every epic is done the progress
+    file is removed; otherwise a warning names the missing epics and the progress file is kept,
+    so the next run retries them.
+    """
+    progress_file = story_progress_path(user_stories_file)
+    checkpoints = CheckpointStore(progress_file)
+    checkpoints.touch()
+    done = checkpoints.items("stories")
+    pending = [epic for epic in epics if epic['id'] not in done]
+    if len(pending) < len(epics):
+        print(f"Resuming user story generation: {len(epics) - len(pending)} of {len(epics)} epics already done.")
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(generate_stories_with_retries, llm, epic, max_attempts): epic for epic in pending}
+            for future in as_completed(futures):
+                epic = futures[future]
+                stories = future.result()
+                if stories is None:
+                    continue
+                checkpoints.put("stories", epic['id'], stories)
+                done[epic['id']] = stories
+                print(f"Generated {len(stories)} user stories for epic: {epic['name']} ({len(done)}/{len(epics)})")
+
+    user_stories = [story for epic in epics for story in done.get(epic['id'], [])]
 
     # Save user stories to file
     with open(user_stories_file, "w", encoding="utf-8") as f:
         json.dump(user_stories, f, indent=2)
-    print(f"User stories saved to {user_stories_file}")
\ No newline at end of file
+    print(f"User stories saved to {user_stories_file}")
+    missing = [epic['name'] for epic in epics if epic['id'] not in done]
+    if missing:
+        logger.warning(
+            f"No user stories for {len(missing)} epics after {max_attempts} attempts each: {missing}. "
+            f"Rerun to retry them; finished epics are kept in {progress_file}."
+        )
+    else:
+        checkpoints.delete()